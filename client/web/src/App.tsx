@@ -9,10 +9,11 @@ import { MembersList } from './components/MembersList'
 import { LoginModal } from './components/LoginModal'
 import { SignupModal } from './components/SignupModal'
 import { CommandAutocomplete } from './components/CommandAutocomplete'
+import { MemberAutocomplete } from './components/MemberAutocomplete'
 import { useUser } from './contexts/UserContext'
 import { useWebSocket } from './contexts/WebSocketContext'
-import type { Message } from './types/messages'
-import { filterCommands, parseCommand, type Command } from './config/commandRegistry'
+import type { Message, UserFrom } from './types/messages'
+import { filterCommands, getCommand, parseCommand, type Command } from './config/commandRegistry'
 
 interface Channel {
   id: number
@@ -37,6 +38,8 @@ function App() {
   const [joinChannelId, setJoinChannelId] = useState('')
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const joinedChannelsRef = useRef<Set<number>>(new Set())
+  // Channels in large mode, their members are listed on demand
+  const largeChannelsRef = useRef<Set<number>>(new Set())
 
   const [channelMembers, setChannelMembers] = useState<Map<number, Member[]>>(new Map())
 
@@ -51,6 +54,12 @@ function App() {
   const [selectedCommandIndex, setSelectedCommandIndex] = useState(0)
   const messageInputRef = useRef<HTMLInputElement>(null)
 
+  // Autocomplete of the target of /kick, /mute, ... searched on the server
+  const [memberSuggestions, setMemberSuggestions] = useState<UserFrom[]>([])
+  const [selectedMemberIndex, setSelectedMemberIndex] = useState(0)
+  const memberSearchRef = useRef<{ channelId: number; prefix: string } | null>(null)
+  const memberSearchTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null)
+
   const [muteEndTime, setMuteEndTime] = useState<number | null>(null)
   const [muteTimeRemaining, setMuteTimeRemaining] = useState<number>(0)
 
@@ -61,6 +70,7 @@ function App() {
   useEffect(() => {
     if (!isReady) {
       joinedChannelsRef.current.clear()
+      largeChannelsRef.current.clear()
     }
   }, [isReady])
 
@@ -92,6 +102,53 @@ function App() {
 
         processedMessageIds.current.add(messageKey)
       }
+
+      if (message.type === 'channel_presence') {
+        // Large channel: only the member count is broadcast, list the
+        // members once, on demand
+        const { channel_id: channelId, large } = message.payload
+        if (large && !largeChannelsRef.current.has(channelId)) {
+          largeChannelsRef.current.add(channelId)
+          wsSendMessage(MessageBuilder.memberList(channelId))
+        } else if (!large) {
+          largeChannelsRef.current.delete(channelId)
+        }
+        processedMessageIds.current.add(messageKey)
+      }
+
+      if (message.type === 'channel_member_list' && message.payload.offset === 0) {
+        const payload = message.payload
+        const members: Member[] = payload.members.map(m => ({
+          username: m.username,
+          isOnline: true,
+          isGuest: m.is_guest
+        }))
+
+        setChannelMembers(prev => {
+          const updated = new Map(prev)
+          updated.set(payload.channel_id, members)
+          return updated
+        })
+
+        processedMessageIds.current.add(messageKey)
+      }
+
+      if (message.type === 'channel_member_search') {
+        // Only the answer to the latest search is shown
+        const pending = memberSearchRef.current
+        const payload = message.payload
+        if (pending && pending.channelId === payload.channel_id && pending.prefix === payload.prefix) {
+          setMemberSuggestions(payload.members.filter(m => m.username !== username))
+          setSelectedMemberIndex(0)
+        }
+        processedMessageIds.current.add(messageKey)
+      }
+
+      if (message.type === 'channel_resume') {
+        // Rejoined by the server after a reconnect
+        joinedChannelsRef.current.add(message.payload.channel_id)
+        processedMessageIds.current.add(messageKey)
+      }
     })
   }, [messages])
 
@@ -297,7 +354,10 @@ function App() {
         if (msg.type === 'chat_unmute' && 'channel_id' in msg.payload) {
           return msg.payload.channel_id === currentChannelId
         }
-        if (msg.type === 'error') {
+        if (msg.type === 'chat_slowmode' && 'channel_id' in msg.payload) {
+          return msg.payload.channel_id === currentChannelId
+        }
+        if (msg.type === 'error' || msg.type === 'announcement') {
           return true
         }
         return false
@@ -307,29 +367,42 @@ function App() {
   function handleJoinChannel(e: FormEvent<HTMLFormElement>) {
     e.preventDefault()
 
-    const channelId = parseInt(joinChannelId)
-    if (isNaN(channelId) || channelId < 0) {
+    // Several channels can be joined at once, separated by commas
+    const channelIds = joinChannelId.split(',').map(id => parseInt(id.trim()))
+    if (channelIds.some(channelId => isNaN(channelId) || channelId < 0)) {
       alert('Please enter a valid channel ID (positive number)')
       return
     }
 
-    if (joinedChannelsRef.current.has(channelId)) {
+    const newChannelIds = Array.from(new Set(channelIds)).filter(
+      channelId => !joinedChannelsRef.current.has(channelId)
+    )
+    if (newChannelIds.length === 0) {
       alert('You have already joined this channel')
       setIsJoinModalOpen(false)
       setJoinChannelId('')
       return
     }
 
-    const channelJoinMessage = MessageBuilder.channelJoin(channelId)
-    wsSendMessage(channelJoinMessage)
-
-    joinedChannelsRef.current.add(channelId)
+    // One request, and one history query, for all the channels
+    if (newChannelIds.length > 1) {
+      wsSendMessage(MessageBuilder.channelSubscribe(newChannelIds))
+    } else {
+      wsSendMessage(MessageBuilder.channelJoin(newChannelIds[0]))
+    }
 
-    if (!channels.find(c => c.id === channelId)) {
-      setChannels(prev => [...prev, { id: channelId, name: `Channel ${channelId}` }])
+    for (const channelId of newChannelIds) {
+      joinedChannelsRef.current.add(channelId)
     }
 
-    setCurrentChannelId(channelId)
+    setChannels(prev => [
+      ...prev,
+      ...newChannelIds
+        .filter(channelId => !prev.find(c => c.id === channelId))
+        .map(channelId => ({ id: channelId, name: `Channel ${channelId}` })),
+    ])
+
+    setCurrentChannelId(newChannelIds[0])
 
     setIsJoinModalOpen(false)
     setJoinChannelId('')
@@ -359,10 +432,46 @@ function App() {
     }
   }
 
+  function clearMemberSuggestions() {
+    if (memberSearchTimeoutRef.current) {
+      clearTimeout(memberSearchTimeoutRef.current)
+      memberSearchTimeoutRef.current = null
+    }
+    memberSearchRef.current = null
+    setMemberSuggestions([])
+  }
+
+  // While the target of a command is typed, search the channel members by prefix
+  function searchCommandTarget(input: string): boolean {
+    const match = input.match(/^\/(\w+) (\S+)$/)
+    const command = match && getCommand(match[1])
+    if (!match || !command || command.arguments[0]?.type !== 'user' || currentChannelId === null) {
+      return false
+    }
+
+    const channelId = currentChannelId
+    const prefix = match[2]
+    if (memberSearchTimeoutRef.current) {
+      clearTimeout(memberSearchTimeoutRef.current)
+    }
+    // Wait for a pause in the typing, searches are rate limited
+    memberSearchTimeoutRef.current = setTimeout(() => {
+      memberSearchRef.current = { channelId, prefix }
+      wsSendMessage(MessageBuilder.memberSearch(channelId, prefix))
+    }, 200)
+    return true
+  }
+
   function handleMessageChange(newMessage: string) {
     setMessage(newMessage)
 
     if (newMessage.startsWith('/')) {
+      if (searchCommandTarget(newMessage)) {
+        setShowCommandAutocomplete(false)
+        return
+      }
+      clearMemberSuggestions()
+
       const parsed = parseCommand(newMessage)
       if (parsed) {
         const matches = filterCommands(parsed.command)
@@ -378,6 +487,7 @@ function App() {
       }
     } else {
       setShowCommandAutocomplete(false)
+      clearMemberSuggestions()
 
       if (currentChannelId !== null && newMessage.length > 0 && isConnected) {
         const now = Date.now()
@@ -399,7 +509,35 @@ function App() {
     messageInputRef.current?.focus()
   }
 
+  function handleMemberSelect(member: UserFrom) {
+    const parsed = parseCommand(message)
+    if (parsed) {
+      setMessage(`/${parsed.command} ${member.username} `)
+    }
+    clearMemberSuggestions()
+    messageInputRef.current?.focus()
+  }
+
   function handleKeyDown(e: KeyboardEvent<HTMLInputElement>) {
+    if (memberSuggestions.length > 0) {
+      if (e.key === 'ArrowDown') {
+        e.preventDefault()
+        setSelectedMemberIndex(prev =>
+          prev < memberSuggestions.length - 1 ? prev + 1 : prev
+        )
+      } else if (e.key === 'ArrowUp') {
+        e.preventDefault()
+        setSelectedMemberIndex(prev => (prev > 0 ? prev - 1 : 0))
+      } else if (e.key === 'Tab') {
+        e.preventDefault()
+        handleMemberSelect(memberSuggestions[selectedMemberIndex])
+      } else if (e.key === 'Escape') {
+        e.preventDefault()
+        clearMemberSuggestions()
+      }
+      return
+    }
+
     if (!showCommandAutocomplete) return
 
     if (e.key === 'ArrowDown') {
@@ -479,6 +617,15 @@ function App() {
         const unmuteMessage = MessageBuilder.chatUnmute(currentChannelId, target)
         wsSendMessage(unmuteMessage)
         setMessage('')
+      } else if (parsed.command === 'slowmode') {
+        const interval = parseInt(parsed.args[0])
+        if (isNaN(interval) || interval < 0) {
+          alert('Usage: /slowmode <seconds>')
+          return
+        }
+        const slowModeMessage = MessageBuilder.chatSlowMode(currentChannelId, interval)
+        wsSendMessage(slowModeMessage)
+        setMessage('')
       } else {
         alert(`Unknown command: ${parsed.command}`)
       }
@@ -490,6 +637,7 @@ function App() {
     }
 
     setShowCommandAutocomplete(false)
+    clearMemberSuggestions()
   }
 
   function handleLoginSuccess(loggedInUsername: string) {
@@ -534,13 +682,12 @@ function App() {
                 </label>
                 <input
                   id="channelId"
-                  type="number"
+                  type="text"
                   value={joinChannelId}
                   onChange={(e) => setJoinChannelId(e.target.value)}
-                  placeholder="Enter channel ID (e.g., 1)"
+                  placeholder="Enter channel ID (e.g., 1, or 1,2,3)"
                   className="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
                   autoFocus
-                  min="0"
                 />
               </div>
               <div className="flex justify-end gap-2">
@@ -710,6 +857,13 @@ function App() {
                 onSelect={handleCommandSelect}
               />
             )}
+            {memberSuggestions.length > 0 && (
+              <MemberAutocomplete
+                members={memberSuggestions}
+                selectedIndex={selectedMemberIndex}
+                onSelect={handleMemberSelect}
+              />
+            )}
 
             <div className="flex-1 relative">
               <input
@@ -0,0 +1,45 @@
+import type { UserFrom } from '../types/messages';
+
+interface MemberAutocompleteProps {
+  members: UserFrom[];
+  selectedIndex: number;
+  onSelect: (member: UserFrom) => void;
+}
+
+export function MemberAutocomplete({
+  members,
+  selectedIndex,
+  onSelect
+}: MemberAutocompleteProps) {
+  if (members.length === 0) {
+    return null;
+  }
+
+  return (
+    <div className="absolute bottom-full mb-2 bg-white border border-gray-300 rounded-lg shadow-lg overflow-hidden z-50 min-w-[240px] max-w-[400px]">
+      <div className="bg-gray-50 px-3 py-2 border-b border-gray-200">
+        <span className="text-xs font-semibold text-gray-600 uppercase">Members</span>
+      </div>
+      <div className="max-h-[300px] overflow-y-auto">
+        {members.map((member, index) => (
+          <button
+            key={member.username}
+            type="button"
+            onClick={() => onSelect(member)}
+            className={`w-full text-left px-3 py-2 hover:bg-blue-50 transition-colors ${
+              index === selectedIndex ? 'bg-blue-100' : ''
+            }`}
+          >
+            <span className="font-mono text-sm text-gray-800">{member.username}</span>
+            {member.is_guest && (
+              <span className="ml-2 text-xs text-gray-400">guest</span>
+            )}
+          </button>
+        ))}
+      </div>
+      <div className="bg-gray-50 px-3 py-1.5 border-t border-gray-200 text-xs text-gray-500">
+        Use <kbd className="px-1 py-0.5 bg-gray-200 rounded text-xs">↑</kbd> <kbd className="px-1 py-0.5 bg-gray-200 rounded text-xs">↓</kbd> to navigate, <kbd className="px-1 py-0.5 bg-gray-200 rounded text-xs">Tab</kbd> to complete
+      </div>
+    </div>
+  );
+}
@@ -0,0 +1,21 @@
+import type { AnnouncementMessage as AnnouncementMessageType } from '../../types/messages';
+
+interface AnnouncementMessageProps {
+  message: AnnouncementMessageType;
+  currentUsername?: string;
+}
+
+export function AnnouncementMessage({ message }: AnnouncementMessageProps) {
+  const { payload, timestamp } = message;
+
+  return (
+    <div className="flex justify-center my-3">
+      <div className="px-4 py-2 rounded-lg text-sm bg-amber-100 text-amber-900 border border-amber-300">
+        📢 <span className="font-semibold">Announcement:</span> {payload.content}
+        <span className="text-xs ml-2 opacity-50">
+          {new Date(timestamp).toLocaleTimeString()}
+        </span>
+      </div>
+    </div>
+  );
+}
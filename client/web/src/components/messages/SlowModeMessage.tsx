@@ -0,0 +1,30 @@
+import type { ChatSlowModeMessageServerToClient } from '../../types/messages';
+
+interface SlowModeMessageProps {
+  message: ChatSlowModeMessageServerToClient;
+  currentUsername?: string;
+}
+
+export function SlowModeMessage({ message }: SlowModeMessageProps) {
+  const { payload, timestamp } = message;
+  const isOn = payload.interval > 0;
+
+  return (
+    <div className="flex justify-center my-3">
+      <div className="px-4 py-2 rounded-lg text-sm bg-blue-100 text-blue-800">
+        {isOn ? (
+          <>
+            🐢 Slow mode is on: one message every{' '}
+            <span className="font-semibold">{payload.interval}s</span>
+            {payload.auto && ' (channel is busy)'}
+          </>
+        ) : (
+          '🐇 Slow mode is off'
+        )}
+        <span className="text-xs ml-2 opacity-50">
+          {new Date(timestamp).toLocaleTimeString()}
+        </span>
+      </div>
+    </div>
+  );
+}
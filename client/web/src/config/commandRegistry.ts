@@ -79,6 +79,19 @@ export const COMMANDS: Record<string, Command> = {
     ],
     format: '/unmute <target>',
   },
+  slowmode: {
+    name: 'slowmode',
+    description: 'Set the slow mode of the channel',
+    arguments: [
+      {
+        name: 'seconds',
+        description: 'Seconds between two messages of a user, 0 turns it off',
+        required: true,
+        type: 'number',
+      },
+    ],
+    format: '/slowmode <seconds>',
+  },
 };
 
 // Get all command names (for autocomplete filtering)
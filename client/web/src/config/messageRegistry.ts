@@ -8,6 +8,8 @@ import { ErrorMessage } from '../components/messages/ErrorMessage';
 import { KickMessage } from '../components/messages/KickMessage';
 import { MuteMessage } from '../components/messages/MuteMessage';
 import { UnmuteMessage } from '../components/messages/UnmuteMessage';
+import { SlowModeMessage } from '../components/messages/SlowModeMessage';
+import { AnnouncementMessage } from '../components/messages/AnnouncementMessage';
 
 // All message type registrations in one place
 export function initializeMessageHandlers() {
@@ -30,6 +32,9 @@ export function initializeMessageHandlers() {
   registerParser(MessageType.CHANNEL_JOIN, (data) => data as any);
   registerRenderer(MessageType.CHANNEL_JOIN, ChannelJoinMessage);
 
+  // CHANNEL_SUBSCRIBE (history of several channels, unpacked by WebSocketContext)
+  registerParser(MessageType.CHANNEL_SUBSCRIBE, (data) => data as any);
+
   // CHANNEL_LEAVE
   registerParser(MessageType.CHANNEL_LEAVE, (data) => data as any);
   registerRenderer(MessageType.CHANNEL_LEAVE, ChannelLeaveMessage);
@@ -58,5 +63,30 @@ export function initializeMessageHandlers() {
   registerParser(MessageType.CHAT_UNMUTE, (data) => data as any);
   registerRenderer(MessageType.CHAT_UNMUTE, UnmuteMessage);
 
+  // CHANNEL_RESUME (channel rejoined after a reconnect, handled by WebSocketContext)
+  registerParser(MessageType.CHANNEL_RESUME, (data) => data as any);
+
+  // CHAT_SLOWMODE (server broadcasts when slow mode changes)
+  registerParser(MessageType.CHAT_SLOWMODE, (data) => data as any);
+  registerRenderer(MessageType.CHAT_SLOWMODE, SlowModeMessage);
+
+  // CHANNEL_MEMBER_SEARCH (server answers a username prefix search)
+  registerParser(MessageType.MEMBER_SEARCH, (data) => data as any);
+  // No renderer needed - used by the command autocomplete
+
+  // CHANNEL_PRESENCE (member count of a large channel, handled by App)
+  registerParser(MessageType.CHANNEL_PRESENCE, (data) => data as any);
+
+  // CHANNEL_MEMBER_LIST (server answers a member list page, handled by App)
+  registerParser(MessageType.MEMBER_LIST, (data) => data as any);
+
+  // ANNOUNCEMENT (server-wide message from an admin, shown in every channel)
+  registerParser(MessageType.ANNOUNCEMENT, (data) => data as any);
+  registerRenderer(MessageType.ANNOUNCEMENT, AnnouncementMessage);
+
+  // PING/PONG (heartbeat, answered by WebSocketContext)
+  registerParser(MessageType.PING, (data) => data as any);
+  registerParser(MessageType.PONG, (data) => data as any);
+
   // Future types registered here
 }
@@ -18,6 +18,22 @@ const WebSocketContext = createContext<WebSocketContextType | undefined>(undefin
 
 const WS_URL = import.meta.env.VITE_WS_URL || 'ws://localhost:8000/ws'
 
+const RECONNECT_DELAY_MS = 3000
+// Server is restarting (drain), or overloaded (admission control),
+// it tells us when to come back
+const CLOSE_SERVICE_RESTART = 1012
+const CLOSE_TRY_AGAIN_LATER = 1013
+
+function reconnectDelay(event: CloseEvent): number {
+  if (event.code === CLOSE_SERVICE_RESTART || event.code === CLOSE_TRY_AGAIN_LATER) {
+    const match = /Retry after (\d+) ms/.exec(event.reason)
+    if (match) {
+      return Number(match[1])
+    }
+  }
+  return RECONNECT_DELAY_MS
+}
+
 interface WebSocketProviderProps {
   children: ReactNode
   username: string
@@ -32,6 +48,8 @@ export function WebSocketProvider({ children, username, enabled = true, onUserna
   const wsRef = useRef<WebSocket | null>(null)
   const reconnectTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null)
   const isIntentionalDisconnect = useRef(false)
+  // Channel id -> last sequence number seen, to resume after a reconnect
+  const lastSeqRef = useRef<Map<number, number>>(new Map())
 
   const connect = useCallback(() => {
     if (!enabled || !username) {
@@ -49,7 +67,8 @@ export function WebSocketProvider({ children, username, enabled = true, onUserna
 
       const token = tokenStorage.getToken()
 
-      const helloMessage = MessageBuilder.hello(token || undefined)
+      const resume = Object.fromEntries(lastSeqRef.current)
+      const helloMessage = MessageBuilder.hello(token || undefined, resume)
       ws.send(JSON.stringify(helloMessage))
     }
 
@@ -57,6 +76,44 @@ export function WebSocketProvider({ children, username, enabled = true, onUserna
       const parsedMessage = parseMessage(event.data)
 
       if (parsedMessage) {
+        // Heartbeat: answer and keep it out of the message list
+        if (parsedMessage.type === 'ping') {
+          ws.send(JSON.stringify(MessageBuilder.pong()))
+          return
+        }
+        if (parsedMessage.type === 'pong') {
+          return
+        }
+
+        // Bulk subscribe: unpack the history of all the channels, as sent by a join
+        if (parsedMessage.type === 'channel_subscribe') {
+          const history = parsedMessage.payload.history ?? []
+          for (const historyMsg of history) {
+            if (typeof historyMsg.seq === 'number') {
+              lastSeqRef.current.set(historyMsg.payload.channel_id, historyMsg.seq)
+            }
+          }
+          setMessages(prev => [...prev, ...history])
+          return
+        }
+
+        const channelId = (parsedMessage.payload as any)?.channel_id
+        if (typeof channelId === 'number') {
+          if (typeof parsedMessage.seq === 'number') {
+            // Never move back, an older event may arrive after a newer one
+            const lastSeq = lastSeqRef.current.get(channelId) ?? 0
+            lastSeqRef.current.set(channelId, Math.max(lastSeq, parsedMessage.seq))
+          }
+          if (parsedMessage.type === 'channel_leave' && parsedMessage.payload.user?.username === username) {
+            lastSeqRef.current.delete(channelId)
+          }
+          if (parsedMessage.type === 'channel_resume' && parsedMessage.payload.snapshot) {
+            // The history of the channel follows, drop what we have
+            lastSeqRef.current.delete(channelId)
+            setMessages(prev => prev.filter(m => (m.payload as any)?.channel_id !== channelId))
+          }
+        }
+
         if (parsedMessage.type === 'hello') {
           const helloPayload = parsedMessage.payload as any
 
@@ -77,7 +134,7 @@ export function WebSocketProvider({ children, username, enabled = true, onUserna
       console.error('WebSocket error:', error)
     }
 
-    ws.onclose = () => {
+    ws.onclose = (event) => {
       setIsConnected(false)
       setIsReady(false)
       wsRef.current = null
@@ -85,7 +142,7 @@ export function WebSocketProvider({ children, username, enabled = true, onUserna
       if (!isIntentionalDisconnect.current && enabled) {
         reconnectTimeoutRef.current = setTimeout(() => {
           connect()
-        }, 3000)
+        }, reconnectDelay(event))
       }
     }
 
@@ -94,6 +151,7 @@ export function WebSocketProvider({ children, username, enabled = true, onUserna
 
   const disconnect = useCallback(() => {
     isIntentionalDisconnect.current = true
+    lastSeqRef.current.clear()
     if (reconnectTimeoutRef.current) {
       clearTimeout(reconnectTimeoutRef.current)
     }
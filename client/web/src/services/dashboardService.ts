@@ -1,5 +1,5 @@
 import { tokenStorage } from './tokenStorage'
-import type { UserPublic, UsersPublic, MessagesPublic, UserUpdate, ChannelsStats, ChannelMembers } from '../types/dashboard'
+import type { UserPublic, UsersPublic, MessagesPublic, UserUpdate, ChannelsStats, ChannelMembers, BroadcastResult } from '../types/dashboard'
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 
@@ -130,4 +130,16 @@ export const dashboardService = {
     )
     return handleResponse<ChannelMembers>(response)
   },
+
+  async broadcast(content: string): Promise<BroadcastResult> {
+    const response = await fetch(
+      `${API_BASE_URL}/api/v1/dashboard/broadcast`,
+      {
+        method: 'POST',
+        headers: getAuthHeaders(),
+        body: JSON.stringify({ content }),
+      }
+    )
+    return handleResponse<BroadcastResult>(response)
+  },
 }
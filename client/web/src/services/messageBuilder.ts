@@ -1,8 +1,10 @@
 import { MessageType } from '../types/messages';
 import type {
+  FilterableEvent,
   HelloMessageClientToServer,
   ChatSendMessageClientToServer,
   ChannelJoinMessageClientToServer,
+  ChannelSubscribeMessageClientToServer,
   ChannelLeaveMessageClientToServer,
   ReactAddMessageClientToServer,
   ReactRemoveMessageClientToServer,
@@ -10,20 +12,32 @@ import type {
   ChatKickMessageClientToServer,
   ChatMuteMessageClientToServer,
   ChatUnmuteMessageClientToServer,
+  ChatSlowModeMessageClientToServer,
+  MemberSearchMessageClientToServer,
+  MemberListMessageClientToServer,
+  PongMessage,
 } from '../types/messages';
 
 export class MessageBuilder {
   /**
    * Build HELLO message (Client → Server).
    * Server will respond with HELLO containing assigned username for guests.
+   * On a reconnect, `resume` asks the server for the events missed in each channel.
+   * `ignore` lists the events the server must not send to this connection.
    */
-  static hello(token?: string): HelloMessageClientToServer {
+  static hello(
+    token?: string,
+    resume?: Record<number, number>,
+    ignore?: FilterableEvent[],
+  ): HelloMessageClientToServer {
     return {
       type: MessageType.HELLO,
       timestamp: new Date().toISOString(),
       id: crypto.randomUUID(),
       payload: {
         ...(token && { token }), // Include token only if provided
+        ...(resume && Object.keys(resume).length > 0 && { resume }), // Rejoin channels after a reconnect
+        ...(ignore && ignore.length > 0 && { ignore }), // Server-side event filters
       },
     };
   }
@@ -59,6 +73,21 @@ export class MessageBuilder {
     };
   }
 
+  /**
+   * Build CHANNEL_SUBSCRIBE message (Client → Server).
+   * Join several channels at once, their history comes back in a single message.
+   */
+  static channelSubscribe(channelIds: number[]): ChannelSubscribeMessageClientToServer {
+    return {
+      type: MessageType.CHANNEL_SUBSCRIBE,
+      timestamp: new Date().toISOString(),
+      id: crypto.randomUUID(),
+      payload: {
+        channel_ids: channelIds,
+      },
+    };
+  }
+
   /**
    * Build REACT_ADD message (Client → Server).
    * Add a reaction to a message.
@@ -159,6 +188,22 @@ export class MessageBuilder {
     };
   }
 
+  /**
+   * Build CHAT_SLOWMODE message (Client → Server).
+   * Set the slow mode of a channel, 0 turns it off.
+   */
+  static chatSlowMode(channelId: number, interval: number): ChatSlowModeMessageClientToServer {
+    return {
+      type: MessageType.CHAT_SLOWMODE,
+      timestamp: new Date().toISOString(),
+      id: crypto.randomUUID(),
+      payload: {
+        channel_id: channelId,
+        interval: interval,
+      },
+    };
+  }
+
   /**
    * Build CHANNEL_LEAVE message (Client → Server).
    * Leave a channel.
@@ -173,4 +218,51 @@ export class MessageBuilder {
       },
     };
   }
+
+  /**
+   * Build CHANNEL_MEMBER_SEARCH message (Client → Server).
+   * Search channel members by username prefix (e.g. autocomplete for /kick and /mute).
+   */
+  static memberSearch(channelId: number, prefix: string, limit?: number): MemberSearchMessageClientToServer {
+    return {
+      type: MessageType.MEMBER_SEARCH,
+      timestamp: new Date().toISOString(),
+      id: crypto.randomUUID(),
+      payload: {
+        channel_id: channelId,
+        prefix: prefix,
+        ...(limit !== undefined && { limit }), // Include limit only if provided
+      },
+    };
+  }
+
+  /**
+   * Build CHANNEL_MEMBER_LIST message (Client → Server).
+   * Ask for a page of the members of a large channel, whose members are not broadcast.
+   */
+  static memberList(channelId: number, offset?: number, limit?: number): MemberListMessageClientToServer {
+    return {
+      type: MessageType.MEMBER_LIST,
+      timestamp: new Date().toISOString(),
+      id: crypto.randomUUID(),
+      payload: {
+        channel_id: channelId,
+        ...(offset !== undefined && { offset }),
+        ...(limit !== undefined && { limit }),
+      },
+    };
+  }
+
+  /**
+   * Build PONG message (Client → Server).
+   * Answer to the server's heartbeat PING, keeps the connection from being reaped.
+   */
+  static pong(): PongMessage {
+    return {
+      type: MessageType.PONG,
+      timestamp: new Date().toISOString(),
+      id: crypto.randomUUID(),
+      payload: {},
+    };
+  }
 }
@@ -47,3 +47,9 @@ export interface ChannelMembers {
   count: number
   users: ChannelMember[]
 }
+
+export interface BroadcastResult {
+  recipients: number
+  connections: number
+  duration_ms: number
+}
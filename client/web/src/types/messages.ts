@@ -8,9 +8,18 @@ export const MessageType = {
   CHAT_KICK: "chat_kick",
   CHAT_MUTE: "chat_mute",
   CHAT_UNMUTE: "chat_unmute",
+  CHAT_SLOWMODE: "chat_slowmode",
   CHANNEL_JOIN: "channel_join",
+  CHANNEL_SUBSCRIBE: "channel_subscribe",
   CHANNEL_LEAVE: "channel_leave",
   CHANNEL_MEMBERS: "channel_members",
+  MEMBER_SEARCH: "channel_member_search",
+  CHANNEL_RESUME: "channel_resume",
+  CHANNEL_PRESENCE: "channel_presence",
+  MEMBER_LIST: "channel_member_list",
+  PING: "ping",
+  PONG: "pong",
+  ANNOUNCEMENT: "announcement",
   // Future types go here
 } as const;
 
@@ -20,6 +29,7 @@ export interface BaseMessage {
   type: MessageTypeValue;
   timestamp: string;
   id?: string; // Changed from correlation_id to id to match backend
+  seq?: number | null; // Server-only, sequence number of the event in its channel
   payload: any;
 }
 
@@ -32,7 +42,23 @@ export interface UserFrom {
 // Hello (Client → Server: send token only, no username)
 export interface HelloPayloadClientToServer {
   token?: string; // Optional JWT token for authentication
-}
+  resume?: Record<number, number>; // Reconnect: channel id -> last seq seen
+  ignore?: FilterableEvent[]; // Events the server must not send to this connection
+}
+
+// Events a connection can ask not to receive (HELLO `ignore`)
+export type FilterableEvent =
+  | typeof MessageType.TYPING_START
+  | typeof MessageType.REACT_ADD
+  | typeof MessageType.REACT_REMOVE
+  | typeof MessageType.CHANNEL_JOIN
+  | typeof MessageType.CHANNEL_LEAVE
+  | typeof MessageType.CHANNEL_MEMBERS
+  | typeof MessageType.CHANNEL_PRESENCE
+  | typeof MessageType.CHAT_KICK
+  | typeof MessageType.CHAT_MUTE
+  | typeof MessageType.CHAT_UNMUTE
+  | typeof MessageType.CHAT_SLOWMODE;
 
 export interface HelloMessageClientToServer extends BaseMessage {
   type: typeof MessageType.HELLO;
@@ -95,6 +121,27 @@ export interface ChannelJoinMessageServerToClient extends BaseMessage {
   payload: ChannelJoinPayloadServerToClient;
 }
 
+// Channel Subscribe (Client → Server: join several channels at once)
+export interface ChannelSubscribePayloadClientToServer {
+  channel_ids: number[]; // 1-50 channels
+}
+
+export interface ChannelSubscribeMessageClientToServer extends BaseMessage {
+  type: typeof MessageType.CHANNEL_SUBSCRIBE;
+  payload: ChannelSubscribePayloadClientToServer;
+}
+
+// Channel Subscribe (Server → Client: the history of all the channels, in one message)
+export interface ChannelSubscribePayloadServerToClient {
+  channel_ids: number[];
+  history: ChatSendMessageServerToClient[];
+}
+
+export interface ChannelSubscribeMessageServerToClient extends BaseMessage {
+  type: typeof MessageType.CHANNEL_SUBSCRIBE;
+  payload: ChannelSubscribePayloadServerToClient;
+}
+
 // Channel Leave (Client → Server)
 export interface ChannelLeavePayloadClientToServer {
   channel_id: number;
@@ -119,6 +166,8 @@ export interface ChannelLeaveMessageServerToClient extends BaseMessage {
 // Error (server sends this)
 export interface ErrorPayload {
   detail: string;
+  code?: 'rate_limited' | 'timeout' | 'unavailable' | null; // Machine readable reason
+  message_type?: string | null; // Type of the message that caused the error
 }
 
 export interface ErrorMessage extends BaseMessage {
@@ -264,11 +313,131 @@ export interface ChatUnmuteMessageServerToClient extends BaseMessage {
   payload: ChatUnmutePayloadServerToClient;
 }
 
+// Chat Slow Mode (Client → Server: set the slow mode of a channel)
+export interface ChatSlowModePayloadClientToServer {
+  channel_id: number;
+  interval: number; // Seconds between two messages of a user, 0 turns it off
+}
+
+export interface ChatSlowModeMessageClientToServer extends BaseMessage {
+  type: typeof MessageType.CHAT_SLOWMODE;
+  payload: ChatSlowModePayloadClientToServer;
+}
+
+// Chat Slow Mode (Server → Client: broadcasts when slow mode changes)
+export interface ChatSlowModePayloadServerToClient {
+  channel_id: number;
+  interval: number;
+  auto: boolean; // Turned on by the server because the channel is busy
+}
+
+export interface ChatSlowModeMessageServerToClient extends BaseMessage {
+  type: typeof MessageType.CHAT_SLOWMODE;
+  payload: ChatSlowModePayloadServerToClient;
+}
+
+// Channel Resume (Server → Client: a channel was rejoined after a reconnect)
+export interface ChannelResumePayload {
+  channel_id: number;
+  last_seq: number; // Missed events after this one follow
+  snapshot: boolean; // Missed events are gone, the channel history follows instead
+}
+
+export interface ChannelResumeMessage extends BaseMessage {
+  type: typeof MessageType.CHANNEL_RESUME;
+  payload: ChannelResumePayload;
+}
+
+// Member Search (Client → Server: search channel members by username prefix)
+export interface MemberSearchPayloadClientToServer {
+  channel_id: number;
+  prefix: string;
+  limit?: number; // Max results (1-50, default 10)
+}
+
+export interface MemberSearchMessageClientToServer extends BaseMessage {
+  type: typeof MessageType.MEMBER_SEARCH;
+  payload: MemberSearchPayloadClientToServer;
+}
+
+// Member Search (Server → Client: matching members, sorted by username)
+export interface MemberSearchPayloadServerToClient {
+  channel_id: number;
+  prefix: string;
+  limit: number;
+  members: UserFrom[];
+}
+
+export interface MemberSearchMessageServerToClient extends BaseMessage {
+  type: typeof MessageType.MEMBER_SEARCH;
+  payload: MemberSearchPayloadServerToClient;
+}
+
+// Channel Presence (Server → Client: member count of a large channel)
+export interface ChannelPresencePayload {
+  channel_id: number;
+  count: number;
+  large: boolean; // No members lists nor join/leave alerts, ask for MEMBER_LIST pages
+}
+
+export interface ChannelPresenceMessage extends BaseMessage {
+  type: typeof MessageType.CHANNEL_PRESENCE;
+  payload: ChannelPresencePayload;
+}
+
+// Member List (Client → Server: a page of the channel members)
+export interface MemberListPayloadClientToServer {
+  channel_id: number;
+  offset?: number; // Default 0
+  limit?: number; // Max results (1-200, default 100)
+}
+
+export interface MemberListMessageClientToServer extends BaseMessage {
+  type: typeof MessageType.MEMBER_LIST;
+  payload: MemberListPayloadClientToServer;
+}
+
+// Member List (Server → Client: the page, and the member count)
+export interface MemberListPayloadServerToClient {
+  channel_id: number;
+  offset: number;
+  limit: number;
+  members: UserFrom[];
+  total: number;
+}
+
+export interface MemberListMessageServerToClient extends BaseMessage {
+  type: typeof MessageType.MEMBER_LIST;
+  payload: MemberListPayloadServerToClient;
+}
+
+// Heartbeat (both directions: a PING must be answered with a PONG)
+export interface PingMessage extends BaseMessage {
+  type: typeof MessageType.PING;
+  payload: Record<string, never>;
+}
+
+export interface PongMessage extends BaseMessage {
+  type: typeof MessageType.PONG;
+  payload: Record<string, never>;
+}
+
+// Announcement (Server → Client: server-wide message from an admin)
+export interface AnnouncementPayload {
+  content: string;
+}
+
+export interface AnnouncementMessage extends BaseMessage {
+  type: typeof MessageType.ANNOUNCEMENT;
+  payload: AnnouncementPayload;
+}
+
 // Union type for messages received from server
 export type Message =
   | HelloMessageServerToClient
   | ChatSendMessageServerToClient
   | ChannelJoinMessageServerToClient
+  | ChannelSubscribeMessageServerToClient
   | ChannelLeaveMessageServerToClient
   | ErrorMessage
   | ReactAddMessageServerToClient
@@ -277,4 +446,12 @@ export type Message =
   | TypingStartMessageServerToClient
   | ChatKickMessageServerToClient
   | ChatMuteMessageServerToClient
-  | ChatUnmuteMessageServerToClient;
+  | ChatUnmuteMessageServerToClient
+  | ChatSlowModeMessageServerToClient
+  | MemberSearchMessageServerToClient
+  | ChannelResumeMessage
+  | ChannelPresenceMessage
+  | MemberListMessageServerToClient
+  | AnnouncementMessage
+  | PingMessage
+  | PongMessage;
@@ -0,0 +1,54 @@
+"""
+Run the microbenchmark suite.
+
+    python -m benchmarks                       # run all, print JSON report
+    python -m benchmarks -o bench.json         # save the report
+    python -m benchmarks -b bench.json -t 0.2  # fail if >20% slower than baseline
+    python -m benchmarks protocol.registry     # only benchmarks with this prefix
+
+Membership benchmarks use BENCH_MEMBERS members per channel (default 10000).
+"""
+
+import argparse
+import logging
+import sys
+
+from benchmarks import bench_handlers, bench_protocol, bench_state  # noqa: F401
+from benchmarks.runner import compare, dump, load, run
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks", description=__doc__)
+    parser.add_argument("names", nargs="*", help="Only run benchmarks with prefix")
+    parser.add_argument("-o", "--output", help="Write the JSON report to a file")
+    parser.add_argument("-b", "--baseline", help="Baseline JSON report to compare")
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown against the baseline (default: 0.2 == 20%%)",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Benchmarks measure the code, not the log output
+    logging.disable(logging.CRITICAL)
+
+    report = run(args.names, args.repeat)
+
+    regressions = []
+    if args.baseline:
+        regressions = compare(report, load(args.baseline), args.threshold)
+        report["threshold"] = args.threshold
+        report["regressions"] = regressions
+
+    dump(report, args.output)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
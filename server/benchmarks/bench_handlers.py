@@ -0,0 +1,89 @@
+"""
+Benchmarks for the handler decorator chain (`handler/decorators.py`).
+
+The services are replaced by minimal stubs so only the decorators are measured.
+"""
+
+from unittest.mock import MagicMock
+
+from chat_server.connection.channel import Channel
+from chat_server.connection.user import User
+from chat_server.handler.decorators import (
+    require_channel,
+    require_membership,
+    require_not_muted,
+    require_permission,
+    validate_message,
+)
+from chat_server.protocol.messages import (
+    ChatSend,
+    ChatSendPayload,
+    KickCommand,
+    KickCommandPayload,
+)
+
+from benchmarks.runner import benchmark
+
+CHANNEL = Channel(id=1, name="Channel 1")
+
+
+class _ChannelService:
+    def get_channel_by_id(self, channel_id: int) -> Channel | None:
+        return CHANNEL
+
+    def is_member(self, user: User, channel: Channel) -> bool:
+        return True
+
+
+class _ModerationService:
+    async def is_muted(self, target: User, channel: Channel) -> bool:
+        return False
+
+
+class _Manager:
+    def __init__(self) -> None:
+        self.channel_srvc = _ChannelService()
+        self.moderation = _ModerationService()
+
+    async def send_error(self, websocket, detail: str) -> None:
+        pass
+
+
+async def _noop_handler(ctx, message, manager, **kwargs) -> None:
+    return None
+
+
+def _context():
+    ctx = MagicMock()
+    ctx.user = User("benchuser", 1)
+    return ctx
+
+
+@benchmark("handler.decorators.chat_send_chain")
+def chat_send_chain():
+    """validate_message -> require_channel -> require_membership -> require_not_muted"""
+    handler = validate_message(ChatSend)(
+        require_channel(require_membership(require_not_muted(_noop_handler)))
+    )
+    ctx, manager = _context(), _Manager()
+    msg = ChatSend(payload=ChatSendPayload(channel_id=1, content="Hello, world!"))
+
+    async def op():
+        await handler(ctx, msg, manager)
+
+    return op
+
+
+@benchmark("handler.decorators.command_chain")
+def command_chain():
+    """validate_message -> require_channel -> require_membership -> require_permission"""
+    handler = validate_message(KickCommand)(
+        require_channel(require_membership(require_permission("kick")(_noop_handler)))
+    )
+    ctx, manager = _context(), _Manager()
+    msg = KickCommand(payload=KickCommandPayload(channel_id=1, target="victim"))
+
+    async def op():
+        await handler(ctx, msg, manager)
+
+    return op
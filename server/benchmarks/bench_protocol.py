@@ -0,0 +1,86 @@
+"""
+Benchmarks for the message protocol (parsing and serialization).
+"""
+
+from datetime import datetime
+from uuid import uuid4
+
+from chat_server.protocol import messages
+from chat_server.protocol.registry import message_reg
+
+from benchmarks.runner import benchmark
+
+SENDER = messages.UserFrom(username="benchuser", is_guest=False)
+
+# One representative instance for every message class
+SAMPLES: dict[str, messages.BaseMessage] = {
+    "Hello": messages.Hello(payload=messages.HelloPayload(user=SENDER)),
+    "ErrorMessage": messages.ErrorMessage(
+        payload=messages.ErrorMessagePayload(detail="Invalid message format")
+    ),
+    "ChannelJoin": messages.ChannelJoin(
+        payload=messages.ChannelJoinPayload(channel_id=1, user=SENDER)
+    ),
+    "ChannelLeave": messages.ChannelLeave(
+        payload=messages.ChannelLeavePayload(channel_id=1, user=SENDER)
+    ),
+    "ChatSend": messages.ChatSend(
+        timestamp=datetime.now(),
+        id=uuid4(),
+        payload=messages.ChatSendPayload(
+            channel_id=1, sender=SENDER, content="Hello, world! " * 4
+        ),
+    ),
+    "ReactAdd": messages.ReactAdd(
+        payload=messages.ReactPayload(emote=":+1:", message_id=uuid4(), channel_id=1)
+    ),
+    "ReactRemove": messages.ReactRemove(
+        payload=messages.ReactPayload(emote=":+1:", message_id=uuid4(), channel_id=1)
+    ),
+    "ChannelMembers": messages.ChannelMembers(
+        payload=messages.ChannelMembersPayload(
+            channel_id=1,
+            members=[messages.UserFrom(username=f"user{i}") for i in range(50)],
+        )
+    ),
+    "TypingStart": messages.TypingStart(
+        payload=messages.TypingStartPayload(channel_id=1, user=SENDER)
+    ),
+    "KickCommand": messages.KickCommand(
+        payload=messages.KickCommandPayload(channel_id=1, target="victim")
+    ),
+    "MuteCommand": messages.MuteCommand(
+        payload=messages.MuteCommandPayload(
+            channel_id=1, target="victim", duration=60, reason="spam"
+        )
+    ),
+    "UnMuteCommand": messages.UnMuteCommand(
+        payload=messages.UnMuteCommandPayload(channel_id=1, target="victim")
+    ),
+}
+
+
+for _name, _msg in SAMPLES.items():
+    benchmark(f"protocol.model_dump_json.{_name}")(lambda msg=_msg: msg.model_dump_json)
+
+
+@benchmark("protocol.registry_parse.chat_send")
+def parse_chat_send():
+    raw = messages.ChatSend(
+        payload=messages.ChatSendPayload(channel_id=1, content="Hello, world!")
+    ).model_dump_json()
+    return lambda: message_reg.parse(raw)
+
+
+@benchmark("protocol.registry_parse.typing")
+def parse_typing():
+    raw = messages.TypingStart(
+        payload=messages.TypingStartPayload(channel_id=1)
+    ).model_dump_json()
+    return lambda: message_reg.parse(raw)
+
+
+@benchmark("protocol.registry_parse.unknown_type")
+def parse_unknown():
+    raw = '{"type": "not_a_type", "payload": {}}'
+    return lambda: message_reg.parse(raw)
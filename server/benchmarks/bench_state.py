@@ -0,0 +1,203 @@
+"""
+Benchmarks for the in-memory chat state (identity hashing and membership).
+"""
+
+import asyncio
+import os
+
+from chat_server.connection.channel import Channel
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.user import User
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.member_set import MemberSet
+from chat_server.protocol.messages import ChatSend, ChatSendPayload
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.membership_service import MembershipService
+from chat_server.services.message_broker import MessageBroker
+
+from benchmarks.runner import benchmark, memory_benchmark
+
+# Channel size for the membership benchmarks
+MEMBERS = int(os.getenv("BENCH_MEMBERS", 10_000))
+
+
+def _populated(channels: int = 1) -> tuple[MembershipService, list[Channel]]:
+    """
+    MembershipService with `MEMBERS` users in each of `channels` channels.
+    """
+    membership = MembershipService()
+    chs = [Channel(id=i, name=f"Channel {i}") for i in range(1, channels + 1)]
+    for i in range(MEMBERS):
+        user = User(f"user{i}", i)
+        for ch in chs:
+            membership.join(user, ch)
+    return membership, chs
+
+
+@benchmark("state.user_hash")
+def user_hash():
+    user = User("benchuser", 1)
+    return lambda: hash(user)
+
+
+@benchmark("state.channel_hash")
+def channel_hash():
+    channel = Channel(id=1, name="Channel 1")
+    return lambda: hash(channel)
+
+
+@benchmark(f"state.membership_join_leave@{MEMBERS}")
+def membership_join_leave():
+    membership, (channel,) = _populated()
+    user = User("newcomer", MEMBERS + 1)
+
+    def op():
+        membership.join(user, channel)
+        membership.leave(user, channel)
+
+    return op
+
+
+@benchmark(f"state.membership_leave_all@{MEMBERS}")
+def membership_leave_all():
+    """Re-join 3 channels and leave them all (the disconnect path)."""
+    membership, chs = _populated(3)
+    user = User("newcomer", MEMBERS + 1)
+
+    def op():
+        for ch in chs:
+            membership.join(user, ch)
+        membership.leave_all(user)
+
+    return op
+
+
+@benchmark(f"state.membership_get_channel_members@{MEMBERS}")
+def membership_get_channel_members():
+    membership, (channel,) = _populated()
+    return lambda: membership.get_channel_members(channel)
+
+
+@benchmark(f"state.membership_member_ids_snapshot@{MEMBERS}")
+def membership_member_ids_snapshot():
+    """What a fan-out iterates on."""
+    membership, (channel,) = _populated()
+    return lambda: membership.get_channel_member_ids(channel)
+
+
+@benchmark(f"state.member_set_difference@{MEMBERS}")
+def member_set_difference():
+    """Members of a channel that are not in a 1k-member set (e.g. muted)."""
+    members = MemberSet(range(MEMBERS))
+    muted = MemberSet(range(0, MEMBERS, MEMBERS // 1000 or 1))
+    return lambda: members.difference(muted)
+
+
+@benchmark(f"state.membership_is_member@{MEMBERS}")
+def membership_is_member():
+    membership, (channel,) = _populated()
+    user = User("user42", 42)
+    return lambda: membership.is_member(user, channel)
+
+
+@benchmark("state.registry_get_by_user")
+def registry_get_by_user():
+    registry = ConnectionRegistry()
+    for i in range(MEMBERS):
+        registry.add(ConnectionContext(object(), User(f"user{i}", i)))  # type: ignore
+    user = User("user42", 42)
+    return lambda: registry.get_by_user(user)
+
+
+class _NullWebSocket:
+    async def send_text(self, data: str) -> None:
+        pass
+
+
+@benchmark(f"state.broker_send_to_channel@{MEMBERS}")
+def broker_send_to_channel():
+    """Fan-out of one chat message, until every outbox is drained."""
+    registry = ConnectionRegistry()
+    for i in range(MEMBERS):
+        registry.add(ConnectionContext(_NullWebSocket(), User(f"user{i}", i)))  # type: ignore
+    broker = MessageBroker(registry)
+    member_ids = list(range(MEMBERS))
+    message = ChatSend(payload=ChatSendPayload(channel_id=1, content="Hello"))
+
+    async def op():
+        await broker.send_to_channel(member_ids, message)
+        await asyncio.sleep(0)
+
+    return op
+
+
+def _channel_service(members: int) -> ChannelService:
+    membership = MembershipService()
+    channel_srvc = ChannelService(
+        ChannelManager(), membership, MessageBroker(ConnectionRegistry())
+    )
+    channel = channel_srvc.create_channel(Channel(id=1, name="Channel 1"))
+    for i in range(members):
+        membership.join(User(f"user{i}", i), channel)
+    return channel_srvc
+
+
+# Moderation target lookup must cost the same in small and huge channels
+for _size in (10, 50_000):
+
+    @benchmark(f"state.find_member_by_username@{_size}")
+    def find_member_by_username(size=_size):
+        channel_srvc = _channel_service(size)
+        target = f"user{size // 2}"
+        return lambda: channel_srvc.find_member_by_username(1, target)
+
+    @benchmark(f"state.search_members_prefix@{_size}")
+    def search_members_prefix(size=_size):
+        channel_srvc = _channel_service(size)
+        channel = channel_srvc.get_channel_by_id(1)
+        return lambda: channel_srvc.search_members(channel, "user1", 10)  # type: ignore
+
+
+@memory_benchmark("state.memory_per_connection")
+def memory_per_connection():
+    """User + ConnectionContext + both registry entries (the WebSocket excluded)."""
+    websockets = [object() for _ in range(MEMBERS)]
+
+    def build():
+        registry = ConnectionRegistry()
+        for i, ws in enumerate(websockets):
+            registry.add(ConnectionContext(ws, User(f"user{i}", i)))  # type: ignore
+        return registry
+
+    return build, MEMBERS
+
+
+@memory_benchmark(f"state.memory_per_member@{MEMBERS}")
+def memory_per_member():
+    """Members joining their first channel (includes the per-User state)."""
+    users = [User(f"user{i}", i) for i in range(MEMBERS)]
+    channel = Channel(id=1, name="Channel 1")
+
+    def build():
+        membership = MembershipService()
+        for user in users:
+            membership.join(user, channel)
+        return membership
+
+    return build, MEMBERS
+
+
+@memory_benchmark(f"state.memory_per_extra_membership@{MEMBERS}")
+def memory_per_extra_membership():
+    """Members already in another channel joining one more channel."""
+    membership, _ = _populated()
+    users = [User(f"user{i}", i) for i in range(MEMBERS)]
+    channel = Channel(id=2, name="Channel 2")
+
+    def build():
+        for user in users:
+            membership.join(user, channel)
+        return membership
+
+    return build, MEMBERS
@@ -0,0 +1,189 @@
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+# Name -> factory returning the operation to time
+BENCHMARKS: dict[str, Callable[[], Callable[[], Any]]] = {}
+
+# Name -> factory returning (build, count) to measure memory
+MEMORY_BENCHMARKS: dict[str, Callable[[], tuple[Callable[[], Any], int]]] = {}
+
+# Each timing sample runs for at least this long
+MIN_SAMPLE_TIME = 0.2
+
+
+def benchmark(name: str):
+    """
+    Decorator to register a benchmark.
+
+    The decorated function does the setup and returns a zero-argument callable
+    (sync or async) performing exactly ONE operation. Only that callable is timed.
+    """
+
+    def decorator(factory: Callable[[], Callable[[], Any]]):
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark {name} already registered")
+        BENCHMARKS[name] = factory
+        return factory
+
+    return decorator
+
+
+def memory_benchmark(name: str):
+    """
+    Decorator to register a memory benchmark.
+
+    The decorated function returns `(build, count)`: `build()` creates and
+    returns a structure holding `count` items. The result is the memory
+    allocated per item.
+    """
+
+    def decorator(factory: Callable[[], tuple[Callable[[], Any], int]]):
+        if name in MEMORY_BENCHMARKS:
+            raise ValueError(f"Benchmark {name} already registered")
+        MEMORY_BENCHMARKS[name] = factory
+        return factory
+
+    return decorator
+
+
+def _time_sync(op: Callable[[], Any], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        op()
+    return time.perf_counter() - start
+
+
+def _time_async(op: Callable[[], Any], number: int) -> float:
+    async def run() -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            await op()
+        return time.perf_counter() - start
+
+    return asyncio.run(run())
+
+
+def measure(op: Callable[[], Any], repeat: int) -> dict[str, float | int]:
+    """
+    Time a single operation.
+
+    Calibrates the number of iterations so every sample takes at least
+    MIN_SAMPLE_TIME, then takes `repeat` samples.
+    """
+    timer = _time_async if inspect.iscoroutinefunction(op) else _time_sync
+
+    number = 1
+    while True:
+        elapsed = timer(op, number)
+        if elapsed >= MIN_SAMPLE_TIME:
+            break
+        if elapsed == 0:
+            number *= 10
+        else:
+            number = max(number * 2, int(number * MIN_SAMPLE_TIME / elapsed) + 1)
+
+    samples = [timer(op, number) / number * 1e9 for _ in range(repeat)]
+    return {
+        "ns_per_op": min(samples),
+        "median_ns_per_op": statistics.median(samples),
+        "iterations": number,
+        "repeat": repeat,
+    }
+
+
+def measure_memory(build: Callable[[], Any], count: int) -> dict[str, float | int]:
+    """
+    Memory allocated by `build()` (and still alive), per item.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        obj = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del obj
+    return {"bytes_per_item": (after - before) / count, "items": count}
+
+
+def _value(result: dict[str, Any]) -> float:
+    return result["ns_per_op"] if "ns_per_op" in result else result["bytes_per_item"]
+
+
+def run(names: list[str] | None = None, repeat: int = 5) -> dict[str, Any]:
+    """
+    Run the selected benchmarks (all if None) and return a JSON-serializable report.
+    """
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if names and not any(name.startswith(n) for n in names):
+            continue
+        op = factory()
+        results[name] = measure(op, repeat)
+        print(
+            f"{name:<50} {results[name]['ns_per_op']:>14,.0f} ns/op",
+            file=sys.stderr,
+        )
+
+    for name, factory in MEMORY_BENCHMARKS.items():
+        if names and not any(name.startswith(n) for n in names):
+            continue
+        build, count = factory()
+        results[name] = measure_memory(build, count)
+        print(
+            f"{name:<50} {results[name]['bytes_per_item']:>14,.0f} bytes/item",
+            file=sys.stderr,
+        )
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(
+    report: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """
+    Compare a report against a baseline report.
+
+    Returns a description of every benchmark slower (or using more memory)
+    than the baseline by more than `threshold` (e.g. 0.2 == 20%).
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = _value(result) / _value(base)
+        result["baseline"] = _value(base)
+        result["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{name}: {_value(base):,.0f} -> {_value(result):,.0f} ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def load(path: str) -> dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def dump(report: dict[str, Any], path: str | None) -> None:
+    data = json.dumps(report, indent=2)
+    if path is None:
+        print(data)
+    else:
+        with open(path, "w") as f:
+            f.write(data + "\n")
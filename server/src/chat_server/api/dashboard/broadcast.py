@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+
+from chat_server.api.deps import DashbordSrvc, get_current_superuser
+from chat_server.api.models import BroadcastIn, BroadcastOut
+
+
+router = APIRouter(prefix="/broadcast", tags=["dashboard-broadcast"])
+
+
+@router.post("", dependencies=[Depends(get_current_superuser)])
+async def broadcast(dashboard_srvc: DashbordSrvc, body: BroadcastIn) -> BroadcastOut:
+    """
+    Endpoint to send an announcement to every connected user.
+    """
+    result = await dashboard_srvc.announce(body.content)
+    return BroadcastOut(
+        recipients=result.recipients,
+        connections=result.connections,
+        duration_ms=round(result.duration * 1000, 3),
+    )
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+
+from chat_server import metrics
+from chat_server.api.deps import get_current_user
+
+
+router = APIRouter(prefix="/metrics", tags=["dashboard-metrics"])
+
+
+@router.get("", dependencies=[Depends(get_current_user)])
+def get_metrics() -> dict[str, int]:
+    """
+    Endpoint to retrieve the server counters (rate limited messages, ...).
+    """
+    return metrics.snapshot()
@@ -1,8 +1,10 @@
 from fastapi.routing import APIRouter
 
-from chat_server.api.dashboard import channels, users
+from chat_server.api.dashboard import broadcast, channels, metrics, users
 
 
 dashboard_router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 dashboard_router.include_router(users.router)
 dashboard_router.include_router(channels.router)
+dashboard_router.include_router(metrics.router)
+dashboard_router.include_router(broadcast.router)
@@ -2,7 +2,7 @@ import logging
 from fastapi import Depends, HTTPException, status
 from fastapi.routing import APIRouter
 
-from chat_server.api.deps import get_current_user
+from chat_server.api.deps import DashbordSrvc, get_current_user
 from chat_server.api.models import MessagesPublic, UserPublic, UserUpdate, UsersPublic
 from chat_server.db import crud
 from chat_server.exceptions import UserNotFound, UsernameAlreadyExists
@@ -68,7 +68,12 @@ async def get_user_messages(
     response_model=UserPublic,
     dependencies=[Depends(get_current_user)],
 )
-async def update_user(session: DBSession, user_id: int, user_in: UserUpdate):
+async def update_user(
+    session: DBSession,
+    dashboard_srvc: DashbordSrvc,
+    user_id: int,
+    user_in: UserUpdate,
+):
     """
     Update user details
     """
@@ -76,6 +81,8 @@ async def update_user(session: DBSession, user_id: int, user_in: UserUpdate):
         user = await crud.update_user(session, user_id, user_in)
         if not user:
             raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+        if user_in.username:
+            dashboard_srvc.rename_user(user.id, user.username)
         return user
     except UserNotFound:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
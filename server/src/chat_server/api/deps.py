@@ -36,9 +36,20 @@ async def get_current_user(session: DBSession, token: TokenDeps) -> UserTable:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token")
 
 
+CurrentUser = Annotated[UserTable, Depends(get_current_user)]
+
+
+async def get_current_superuser(user: CurrentUser) -> UserTable:
+    """
+    Return the current user if it is a superuser.
+    """
+    if not user.is_superuser:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Not enough privileges")
+    return user
+
+
 def get_dashboard_service(request: Request) -> DashboardService:
     return request.app.state.dashboard_service
 
 
-CurrentUser = Annotated[UserTable, Depends(get_current_user)]
 DashbordSrvc = Annotated[DashboardService, Depends(get_dashboard_service)]
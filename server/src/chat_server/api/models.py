@@ -112,3 +112,13 @@ class ChannelMember(BaseModel):
 class ChannelMembers(BaseModel):
     count: int
     users: list[ChannelMember]
+
+
+class BroadcastIn(BaseModel):
+    content: str = Field(min_length=1, max_length=2000)
+
+
+class BroadcastOut(BaseModel):
+    recipients: int
+    connections: int
+    duration_ms: float
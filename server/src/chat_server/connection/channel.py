@@ -1,14 +1,23 @@
-from pydantic import BaseModel
+class Channel:
+    """
+    A chat channel.
 
+    Identity (hash and equality) is the channel id.
+    """
 
-# NOTE: Should this be a BaseModel instead of just a normal class ?
-# What if I need to add some methods here ?
-class Channel(BaseModel):
-    id: int
-    name: str
+    __slots__ = ("id", "name")
+
+    def __init__(self, id: int, name: str) -> None:
+        self.id = id
+        self.name = name
 
     def __eq__(self, other):
+        if not isinstance(other, Channel):
+            return NotImplemented
         return self.id == other.id
 
     def __hash__(self):
-        return hash(str(self))
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"Channel(id={self.id}, name={self.name!r})"
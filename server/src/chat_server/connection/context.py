@@ -1,14 +1,49 @@
+import time
+from typing import Iterable
+
 from fastapi import WebSocket
-from pydantic import BaseModel
 
 from chat_server.connection.user import User
+from chat_server.infrastructure.inbox import Inbox
+from chat_server.infrastructure.outbox import Outbox
+from chat_server.protocol.enums import MessageType
+from chat_server.settings import get_settings
+
+
+class ConnectionContext:
+    """
+    State of a single WebSocket connection.
+    """
+
+    __slots__ = (
+        "websocket",
+        "user",
+        "ignored",
+        "last_seen",
+        "inbox",
+        "outbox",
+    )
 
+    def __init__(
+        self, websocket: WebSocket, user: User, ignored: Iterable[MessageType] = ()
+    ) -> None:
+        self.websocket = websocket
+        self.user = user
+        # Event types not sent to this connection, declared in its HELLO
+        self.ignored = frozenset(ignored)
+        # time.monotonic() of the last frame received
+        self.last_seen = time.monotonic()
+        # Received messages waiting for their handler
+        settings = get_settings()
+        self.inbox = Inbox(settings.INBOUND_LANES, settings.INBOUND_QUEUE_SIZE)
+        # Outbound messages, see MessageBroker
+        self.outbox = Outbox(websocket)
 
-# NOTE: Should this be a BaseModel instead of just a normal class ?
-# What if I need to add some methods here ?
-class ConnectionContext(BaseModel):
-    # Required for WebSocket
-    model_config = {"arbitrary_types_allowed": True}
+    def touch(self) -> None:
+        """
+        Mark the connection as alive.
+        """
+        self.last_seen = time.monotonic()
 
-    websocket: WebSocket
-    user: User
+    def __repr__(self):
+        return f"ConnectionContext(user={self.user!r})"
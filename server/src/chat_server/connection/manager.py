@@ -1,13 +1,20 @@
+import asyncio
 import logging
-from fastapi import WebSocket
+import random
+from typing import Collection
+from fastapi import WebSocket, status
 from fastapi.websockets import WebSocketDisconnect
 from pydantic import ValidationError
 
 from chat_server.connection.context import ConnectionContext
+from chat_server.db import crud
+from chat_server.db.db import DatabaseUnavailable, async_session, db_guard
 from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.log import LogSampler
 from chat_server.protocol import messages
 from chat_server.protocol.basemessage import BaseMessage
-from chat_server.protocol.enums import MessageType
+from chat_server.protocol.enums import ErrorCode, MessageType
+from chat_server.services.admission_service import AdmissionService
 from chat_server.services.authorization_service import (
     AuthenticationError,
     AuthenticationService,
@@ -15,6 +22,14 @@ from chat_server.services.authorization_service import (
 from chat_server.services.channel_service import ChannelService
 from chat_server.services.message_broker import MessageBroker
 from chat_server.services.moderation_service import ModerationService
+from chat_server.services.slowmode_service import SlowModeService
+from chat_server.services.spool_service import SpoolService
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Per-message logs are sampled, there is one for every frame received
+_frame_sampler = LogSampler(get_settings().LOG_SAMPLE_RATE)
 
 SERVER_ONLY_MESSAGES = {
     MessageType.CHANNEL_JOIN,
@@ -35,6 +50,9 @@ class ConnectionManager:
         message_broker: MessageBroker,
         channel_service: ChannelService,
         moderation_service: ModerationService,
+        admission_service: AdmissionService | None = None,
+        slowmode_service: SlowModeService | None = None,
+        spool_service: SpoolService | None = None,
     ) -> None:
         self.connections = connection_registry
         # self.channels = channel_manager
@@ -43,6 +61,11 @@ class ConnectionManager:
         self.broker = message_broker
         self.channel_srvc = channel_service
         self.moderation = moderation_service
+        self.admission = admission_service or AdmissionService()
+        self.slowmode = slowmode_service or SlowModeService()
+        self.spool = spool_service or SpoolService()
+        # Shutting down, new connections are turned away
+        self.draining = False
 
     async def accept_connection(self, websocket: WebSocket) -> None:
         """
@@ -51,25 +74,90 @@ class ConnectionManager:
         For the connection to be accepted it needs to send
         a proper message (HELLO) to the server.
 
-        If invalid HELLO message raise a WebSocketDisconnect
+        If invalid HELLO message, or none is received within
+        HELLO_TIMEOUT, raise a WebSocketDisconnect.
+
+        Connections over the admission limits are closed with a
+        "retry after" reason, before any database work is done. So are
+        connections that cannot be authenticated while the database is
+        unavailable, and all connections while the server is draining.
         """
+        if self.draining:
+            await websocket.accept()
+            await self.reject(
+                websocket, self.restart_delay(), status.WS_1012_SERVICE_RESTART
+            )
+
+        retry_ms = self.admission.admit(websocket)
 
         await websocket.accept()
 
+        try:
+            await self._accept_connection(websocket, retry_ms)
+        except BaseException:
+            self.admission.release(websocket)
+            raise
+
+    async def reject(
+        self,
+        websocket: WebSocket,
+        retry_ms: int,
+        code: int = status.WS_1013_TRY_AGAIN_LATER,
+    ) -> None:
+        """
+        Close a connection and ask the client to retry later.
+
+        Raise a WebSocketDisconnect
+        """
+        await websocket.close(code=code, reason=f"Retry after {retry_ms} ms")
+        raise WebSocketDisconnect(code=code)
+
+    def restart_delay(self) -> int:
+        """
+        Get the delay (ms) to give a client to reconnect after a restart,
+        spread so the clients do not all come back at the same instant.
+        """
+        return random.randint(0, get_settings().DRAIN_RECONNECT_SPREAD_MS)
+
+    async def _accept_connection(
+        self, websocket: WebSocket, retry_ms: int | None
+    ) -> None:
+        if retry_ms is not None:
+            await self.reject(websocket, retry_ms)
+
         try:
             # Wait for HELLO Message and
-            hello_msg = await websocket.receive_text()
+            hello_msg = await asyncio.wait_for(
+                websocket.receive_text(), get_settings().HELLO_TIMEOUT
+            )
             # Validate the message received is a proper HELLO
             hello = messages.Hello.model_validate_json(hello_msg)
-            logging.debug(f"{hello =}")
+            logger.debug("%r", hello)
+
+            # Authentication may hit the database, rate limit it
+            retry_ms = self.admission.admit_hello()
+            if retry_ms is not None:
+                await self.reject(websocket, retry_ms)
 
             # Authenticate User
             user = await self.auth.authenticate(hello.payload.token)
+        except asyncio.TimeoutError:
+            logger.warning("No HELLO message received in time")
+            await websocket.close(
+                code=status.WS_1008_POLICY_VIOLATION, reason="HELLO timeout"
+            )
+            raise WebSocketDisconnect
         except ValidationError as e:
             logging.warning(f"Invalid HELLO message {e}")
             await self.send_error(websocket, "Invalid HELLO message")
             await websocket.close(reason="Invalid HELLO message")
             raise WebSocketDisconnect
+        except DatabaseUnavailable as e:
+            logger.warning("Cannot authenticate, database unavailable: %s", e)
+            await self.reject(
+                websocket,
+                self.admission.retry_after(get_settings().DB_RESET_TIMEOUT * 1000),
+            )
         except AuthenticationError as e:
             logging.warning(f"Authentication failed: {e}")
             await websocket.close(reason=str(e))
@@ -81,42 +169,126 @@ class ConnectionManager:
         # await websocket.send_text(msg.model_dump_json())
         await self.broker.send_to_websocket(websocket, msg)
 
+        ctx = ConnectionContext(
+            websocket=websocket, user=user, ignored=hello.payload.ignore or ()
+        )
+        # Still a member within its grace period, the events of the Channels
+        # it resumes must only reach it through their replay
+        if hello.payload.resume:
+            self.channel_srvc.hold(user, hello.payload.resume)
+
         # Register Connection
-        ctx = ConnectionContext(websocket=websocket, user=user)
         self.connections.add(ctx)
 
         logging.info(f"Connection accepted: {repr(ctx)}")
 
+        try:
+            # Back within the grace period, still in the channels it resumes
+            await self.channel_srvc.reconnect(user, hello.payload.resume or {})
+
+            # Reconnect, send what the client missed in its channels
+            if hello.payload.resume:
+                from chat_server.handler.channel_handler import resume_channels
+
+                await resume_channels(ctx, hello.payload.resume, self)
+        finally:
+            for channel_id in hello.payload.resume or {}:
+                self.channel_srvc.release(user, channel_id)
+
+    async def seed_seqs(self, channel_ids: Collection[int]) -> None:
+        """
+        Continue the sequence numbers of the Channels not numbered yet
+        (e.g. evicted, or not used since the start) from the last one
+        stored or spooled, before they are used.
+
+        Raise DatabaseUnavailable if they cannot be read.
+        """
+        channel_ids = [
+            channel_id
+            for channel_id in channel_ids
+            if not self.channel_srvc.is_seeded(channel_id)
+        ]
+        if not channel_ids:
+            return
+
+        async with db_guard():
+            async with async_session() as session:
+                last_seqs = await crud.get_last_seqs(session, channel_ids)
+        spooled = self.spool.spool.last_seqs()
+
+        for channel_id in channel_ids:
+            last_seq = max(last_seqs.get(channel_id, 0), spooled.get(channel_id, 0))
+            self.channel_srvc.seed_seq(channel_id, last_seq)
+
     async def handle_disconnect(self, websocket: WebSocket) -> None:
         """
         Clean up for disconnect.
         """
+        self.admission.release(websocket)
         ctx = self.connections.remove(websocket)
 
         if ctx is None:
-            logging.warning("Disconnect called for unknown connection")
+            # Already cleaned up, e.g. reaped by the HeartbeatService
+            logger.debug("Disconnect called for unknown connection")
             return
 
-        # Leave all channels
-        await self.channel_srvc.leave_all_channels(ctx.user)
+        # Finish handling what was received before the disconnect
+        try:
+            await asyncio.wait_for(
+                ctx.inbox.flush(), get_settings().INBOUND_DRAIN_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Dropping messages not handled in time from %r", ctx)
+        ctx.inbox.close()
+        ctx.outbox.close()
+
+        # Leave all channels after the grace period, unless the User
+        # reconnected in the meantime. Not while draining: everyone is
+        # leaving, nobody needs the alerts
+        if (
+            not self.draining
+            and self.connections.get_by_user_id(ctx.user.id) is None
+        ):
+            self.channel_srvc.disconnect(ctx.user)
 
         logging.info(f"Connection closed: {repr(ctx)}")
 
-    async def send_error(self, websocket: WebSocket, detail: str) -> None:
+    async def send_error(
+        self,
+        websocket: WebSocket,
+        detail: str,
+        code: ErrorCode | None = None,
+        message_type: MessageType | None = None,
+    ) -> None:
         """
         Send error message to client.
         """
-        payload = messages.ErrorMessagePayload(detail=detail)
+        payload = messages.ErrorMessagePayload(
+            detail=detail, code=code, message_type=message_type
+        )
         err = messages.ErrorMessage(payload=payload)
         await websocket.send_text(err.model_dump_json())
 
     async def handle_message(self, websocket: WebSocket, data: str) -> None:
         """
         Handle all the messages/data received from the client.
+
+        The message is only parsed here, its handler runs in the Inbox of
+        the connection, in order with the other messages of its Channel.
         """
         from chat_server.handler import router
 
-        logging.info(f"Received: {data}")
+        if _frame_sampler.sample() and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received: %s", data)
+
+        ctx = self.connections.get_by_websocket(websocket)
+
+        if ctx is None:
+            logging.warning("Received message from connection without a Context")
+            return
+
+        # Any frame, even a malformed one, proves the connection is alive
+        ctx.touch()
 
         # Parse message
         msg = BaseMessage.from_json(data)
@@ -128,10 +300,7 @@ class ConnectionManager:
             await self.send_error(websocket, "Invalid message format")
             return
 
-        ctx = self.connections.get_by_websocket(websocket)
-
-        if ctx is None:
-            logging.warning("Received message from connection without a Context")
-            return
-
-        await router.dispatch(ctx, msg, self)
+        await ctx.inbox.put(
+            getattr(msg.payload, "channel_id", None),
+            lambda: router.dispatch(ctx, msg, self),
+        )
@@ -1,4 +1,12 @@
 class User:
+    """
+    A connected user.
+
+    Identity (hash and equality) is the database id.
+    """
+
+    __slots__ = ("username", "id", "_is_guest")
+
     def __init__(self, username: str, id: int, is_guest: bool = False) -> None:
         self.username = username
         self.id = id
@@ -9,10 +17,12 @@ class User:
         return self._is_guest
 
     def __eq__(self, other):
-        return self.username == other.username
+        if not isinstance(other, User):
+            return NotImplemented
+        return self.id == other.id
 
     def __hash__(self):
-        return hash(str(self))
+        return hash(self.id)
 
     def __repr__(self):
         if self.is_guest:
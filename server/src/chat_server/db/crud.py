@@ -5,8 +5,9 @@ from datetime import timedelta
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import query
-from sqlalchemy.sql import delete, select
+from sqlalchemy.orm import aliased, query
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql import delete, insert, select
 
 from chat_server.api.models import UserCreate, UserUpdate, UsersPublic
 from chat_server.exceptions import UserNotFound, UsernameAlreadyExists
@@ -14,6 +15,13 @@ from chat_server.db.models import MessageTable, MuteTable, UserTable
 from chat_server.protocol.messages import ChatSend
 from chat_server.security.utils import get_password_hash
 
+# INSERT ... ON CONFLICT DO NOTHING, for the dialects that have it
+INSERT_IGNORE = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
 # TODO: User the new exceptions: UserNotFound and UsernameAlreadyExists
 
 
@@ -201,32 +209,23 @@ async def delete_user_by_id(session: AsyncSession, user_id: int):
 
 
 async def create_message(
-    session: AsyncSession, message: ChatSend
+    session: AsyncSession, message: ChatSend, sender_id: int | None = None
 ) -> MessageTable | None:
     """
     Store a message in the database.
+
+    If `sender_id` is not given the sender is looked up by username.
     """
-    user_db = await get_user_by_username(session, message.payload.sender.username)  # type: ignore
-    if not user_db:
-        return None
-    sender_id = user_db.id
-    sender_username = message.payload.sender.username  # type: ignore
-    channel_id = message.payload.channel_id
-    timestamp = message.timestamp
-
-    message_db = MessageTable(
-        id=message.id,
-        channel_id=channel_id,
-        sender_id=sender_id,
-        sender_username=sender_username,
-        timestamp=timestamp,
-        content=message.payload.content,
-    )
+    if sender_id is None:
+        user_db = await get_user_by_username(session, message.payload.sender.username)  # type: ignore
+        if not user_db:
+            return None
+        sender_id = user_db.id
+    message_db = MessageTable(**_message_values(message, sender_id))
 
     try:
         session.add(message_db)
         await session.commit()
-        await session.refresh(message_db)
         logging.debug(f"Created message in database successfully: {repr(message_db)}")
         return message_db
     except Exception as e:
@@ -235,16 +234,126 @@ async def create_message(
         raise e
 
 
+async def create_messages(
+    session: AsyncSession, messages: list[tuple[ChatSend, int]]
+) -> int:
+    """
+    Store many (message, sender ID) in the database, in one statement.
+
+    Messages already stored (same ID) are skipped, so storing them again
+    is harmless. Returns the number of messages stored.
+    """
+    rows = [_message_values(message, sender_id) for message, sender_id in messages]
+    dialect = session.get_bind().dialect.name
+    try:
+        if dialect in INSERT_IGNORE:
+            stmt = INSERT_IGNORE[dialect](MessageTable).values(rows)
+            res = await session.execute(
+                stmt.on_conflict_do_nothing(index_elements=[MessageTable.id])
+            )
+            stored = res.rowcount
+        else:
+            ids = [row["id"] for row in rows]
+            existing = set(
+                await session.scalars(
+                    select(MessageTable.id).where(MessageTable.id.in_(ids))
+                )
+            )
+            new_rows = [row for row in rows if row["id"] not in existing]
+            if new_rows:
+                await session.execute(insert(MessageTable), new_rows)
+            stored = len(new_rows)
+        await session.commit()
+        return stored
+    except Exception as e:
+        await session.rollback()
+        logging.error(f"Failed to create messages in database: {e}")
+        raise e
+
+
+def _message_values(message: ChatSend, sender_id: int) -> dict:
+    return {
+        "id": message.id,
+        "channel_id": message.payload.channel_id,
+        "sender_id": sender_id,
+        "sender_username": message.payload.sender.username,  # type: ignore
+        "timestamp": message.timestamp,
+        "content": message.payload.content,
+        "seq": message.seq,
+    }
+
+
 async def get_channel_messages(
-    session: AsyncSession, channel_id: int
+    session: AsyncSession,
+    channel_id: int,
+    limit: int | None = None,
 ) -> list[MessageTable] | None:
     """
-    Retrive all messages stored from a channel.
+    Retrive the messages stored from a channel, in order.
+
+    Only the last `limit` messages if given, read backwards on the
+    (channel_id, seq) index.
+    """
+    stmt = (
+        select(MessageTable)
+        .where(MessageTable.channel_id == channel_id)
+        .order_by(MessageTable.seq.desc(), MessageTable.id.desc())
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    res = await session.execute(stmt)
+    return list(reversed(res.scalars().all()))
+
+
+async def get_channels_messages(
+    session: AsyncSession, channel_ids: list[int], limit: int | None = None
+) -> dict[int, list[MessageTable]]:
+    """
+    Retrive the messages stored from several channels in a single query,
+    in order, per channel ID.
+
+    Only the last `limit` messages of each channel if given. Channels
+    without messages are left out.
+    """
+    stmt = select(MessageTable).where(MessageTable.channel_id.in_(channel_ids))
+    if limit is not None:
+        ranked = stmt.add_columns(
+            func.row_number()
+            .over(
+                partition_by=MessageTable.channel_id,
+                order_by=(MessageTable.seq.desc(), MessageTable.id.desc()),
+            )
+            .label("rank")
+        ).subquery()
+        message = aliased(MessageTable, ranked)
+        stmt = select(message).where(ranked.c.rank <= limit)
+    else:
+        message = MessageTable
+    stmt = stmt.order_by(message.channel_id, message.seq, message.id)
+    res = await session.execute(stmt)
+
+    messages: dict[int, list[MessageTable]] = {}
+    for message in res.scalars().all():
+        messages.setdefault(message.channel_id, []).append(message)
+    return messages
+
+
+async def get_last_seqs(
+    session: AsyncSession, channel_ids: list[int]
+) -> dict[int, int]:
+    """
+    Retrieve the last stored sequence number of each channel, served by
+    the (channel_id, seq) index.
+
+    Channels without messages are left out.
     """
-    # TODO: Paginate this
-    stmt = select(MessageTable).where(MessageTable.channel_id == channel_id)
+    stmt = (
+        select(MessageTable.channel_id, func.max(MessageTable.seq))
+        .where(MessageTable.channel_id.in_(channel_ids))
+        .group_by(MessageTable.channel_id)
+    )
     res = await session.execute(stmt)
-    return list(res.scalars().all())
+    return {channel_id: seq for channel_id, seq in res.all() if seq is not None}
 
 
 async def mute_user(
@@ -259,10 +368,13 @@ async def mute_user(
     Store mute in database
     """
     try:
-        if not await get_user_by_id(session, target_id):
-            raise ValueError("Target user does not exist.")
-        if not await get_user_by_id(session, by_id):
-            raise ValueError("Issuer user does not exist.")
+        # Check both users exist in a single query
+        ids = {target_id, by_id}
+        found = await session.scalar(
+            select(func.count()).select_from(UserTable).where(UserTable.id.in_(ids))
+        )
+        if found != len(ids):
+            raise ValueError("Target or issuer user does not exist.")
 
         mute_db = MuteTable(
             target_id=target_id,
@@ -273,7 +385,6 @@ async def mute_user(
 
         session.add(mute_db)
         await session.commit()
-        await session.refresh(mute_db)
         logging.info(f"Mute logged: {mute_db}")
     except Exception as e:
         await session.rollback()
@@ -288,14 +399,11 @@ async def get_mute(
     Check if `target_id` is muted in `channel_id`.
     """
     try:
-        if not await get_user_by_id(session, target_id):
-            raise ValueError("Target user does not exist.")
-
         stmt = select(MuteTable).where(
             MuteTable.target_id == target_id,
             MuteTable.channel_id == channel_id,
             (MuteTable.expires_at.is_(None)) | (MuteTable.expires_at > func.now()),
-        )
+        ).limit(1)
         res = await session.execute(stmt)
         return res.scalar_one_or_none()
 
@@ -309,10 +417,16 @@ async def unmute_user(session: AsyncSession, target_id: int, channel_id: int):
     Unmute a user.
     """
     try:
-        mute_db = await get_mute(session, target_id, channel_id)
-        if mute_db:
-            await session.delete(mute_db)
-            await session.commit()
+        stmt = delete(MuteTable).where(
+            MuteTable.target_id == target_id,
+            MuteTable.channel_id == channel_id,
+            (MuteTable.expires_at.is_(None)) | (MuteTable.expires_at > func.now()),
+        )
+        res = await session.execute(stmt)
+        await session.commit()
+        if res.rowcount:
             logging.info("Unmuted")
     except Exception as e:
+        await session.rollback()
         logging.error(f"Failed to unmute user in database: {e}")
+        raise e
@@ -1,7 +1,24 @@
-from typing import AsyncGenerator
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Connection,
+    Integer,
+    and_,
+    false,
+    func,
+    inspect,
+    or_,
+)
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.sql import insert, select
-from chat_server.db.models import Base, UserTable
+from sqlalchemy.sql import insert, select, update
+from chat_server.db.models import Base, MessageTable, UserTable
+from chat_server.infrastructure.circuit_breaker import CircuitBreaker, CircuitOpenError
 from chat_server.security.utils import get_password_hash
 from chat_server.settings import get_settings
 
@@ -11,6 +28,36 @@ async_engine = create_async_engine(str(settings.DATABASE_URL))
 
 async_session = async_sessionmaker(async_engine, expire_on_commit=False)
 
+# Database calls from the chat fail fast while the database is down or slow
+db_breaker = CircuitBreaker(
+    "db",
+    settings.DB_FAILURE_THRESHOLD,
+    settings.DB_RESET_TIMEOUT,
+    failures=(OperationalError, InterfaceError, OSError, TimeoutError),
+)
+
+
+class DatabaseUnavailable(Exception):
+    """
+    The database is down or too slow, or its circuit breaker is open.
+    """
+
+
+@asynccontextmanager
+async def db_guard() -> AsyncIterator[None]:
+    """
+    Guard a database call with the circuit breaker and DB_CALL_TIMEOUT.
+
+    Raise DatabaseUnavailable if the call fails on the database, takes
+    too long, or is not even tried because the circuit is open.
+    """
+    try:
+        async with db_breaker.guard():
+            async with asyncio.timeout(settings.DB_CALL_TIMEOUT):
+                yield
+    except (CircuitOpenError, *db_breaker.failures) as e:
+        raise DatabaseUnavailable(str(e) or type(e).__name__) from e
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -20,10 +67,66 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+def upgrade_schema(conn: Connection) -> None:
+    """
+    Add the columns and indexes missing from the tables created by an
+    older version, create_all() only creates the missing tables.
+    """
+    op = Operations(MigrationContext.configure(conn))
+    messages = MessageTable.__table__
+
+    columns = {column["name"] for column in inspect(conn).get_columns("user")}
+    if "is_superuser" not in columns:
+        op.add_column(
+            "user",
+            Column("is_superuser", Boolean, nullable=False, server_default=false()),
+        )
+        # Seeded before the flag existed. Only now: later on, the name may
+        # belong to anyone
+        conn.execute(
+            update(UserTable)
+            .where(UserTable.username == settings.SUPERUSER_USERNAME)
+            .values(is_superuser=True)
+        )
+
+    columns = {column["name"] for column in inspect(conn).get_columns("messages")}
+    if "seq" not in columns:
+        op.add_column("messages", Column("seq", Integer, nullable=True))
+        # Number the stored messages of each channel in the order they were sent
+        earlier = messages.alias("earlier")
+        rank = (
+            select(func.count())
+            .where(
+                earlier.c.channel_id == messages.c.channel_id,
+                or_(
+                    earlier.c.timestamp < messages.c.timestamp,
+                    and_(
+                        earlier.c.timestamp == messages.c.timestamp,
+                        earlier.c.id <= messages.c.id,
+                    ),
+                ),
+            )
+            .scalar_subquery()
+        )
+        conn.execute(update(messages).values(seq=rank))
+
+    unique = {
+        index["name"]
+        for index in inspect(conn).get_indexes("messages")
+        if index["unique"]
+    }
+    for index in messages.indexes:
+        if index.name in unique and not index.unique:
+            # Created unique by an older version
+            index.drop(conn)
+        index.create(conn, checkfirst=True)
+
+
 async def init_db() -> None:
     """Creates all database tables."""
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
         res = await conn.execute(
             select(UserTable).where(UserTable.username == settings.SUPERUSER_USERNAME)
         )
@@ -32,5 +135,6 @@ async def init_db() -> None:
                 insert(UserTable).values(
                     username=settings.SUPERUSER_USERNAME,
                     hashed_password=get_password_hash(settings.SUPERUSER_PASSWORD),
+                    is_superuser=True,
                 )
             )
@@ -1,9 +1,11 @@
 from datetime import datetime
-from uuid import UUID, uuid4
-from sqlalchemy import ForeignKey, func
+from uuid import UUID
+from sqlalchemy import ForeignKey, Index, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.types import Boolean, DateTime, Integer, String
 
+from chat_server.ids import new_id
+
 USERNAME_MAX_LENGTH = 30
 
 
@@ -19,6 +21,8 @@ class UserTable(Base):
     hashed_password: Mapped[str] = mapped_column(String(255))
     created_at: Mapped[str] = mapped_column(DateTime, default=func.now())
     is_guest: Mapped[bool] = mapped_column(Boolean, default=False)
+    # May use the admin endpoints (e.g. broadcast)
+    is_superuser: Mapped[bool] = mapped_column(Boolean, default=False)
 
 
 class ChannelTable(Base):
@@ -31,7 +35,7 @@ class ChannelTable(Base):
 class MessageTable(Base):
     __tablename__ = "messages"
 
-    id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
+    id: Mapped[UUID] = mapped_column(primary_key=True, default=new_id)
     channel_id: Mapped[int] = mapped_column(Integer)
     sender_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="SET NULL"))
     sender_username: Mapped[str] = mapped_column(
@@ -39,12 +43,21 @@ class MessageTable(Base):
     )
     timestamp: Mapped[datetime] = mapped_column(DateTime)
     content: Mapped[str] = mapped_column(String)
+    # Sequence number of the message in its channel
+    seq: Mapped[int] = mapped_column(Integer, nullable=True)
+
+    __table_args__ = (
+        # History is read as ranges of sequence numbers within a channel.
+        # Not unique: each worker process numbers the events of its own
+        # connections, two of them can give a channel the same seq
+        Index("ix_messages_channel_seq", "channel_id", "seq"),
+    )
 
 
 class MuteTable(Base):
     __tablename__ = "mutes"
 
-    id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
+    id: Mapped[UUID] = mapped_column(primary_key=True, default=new_id)
     target_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
     by_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
     reason: Mapped[str] = mapped_column(String(255), nullable=True)
@@ -4,29 +4,176 @@ from uuid import uuid4
 
 from pydantic import ValidationError
 
+from chat_server import metrics
 from chat_server.connection.channel import Channel
 from chat_server.connection.context import ConnectionContext
 from chat_server.connection.manager import ConnectionManager
 from chat_server.db import crud
-from chat_server.db.db import async_session
+from chat_server.db.db import DatabaseUnavailable, async_session, db_guard
+from chat_server.db.models import MessageTable
 from chat_server.handler.decorators import (
     require_channel,
     require_membership,
     validate_message,
 )
 from chat_server.protocol.basemessage import BaseMessage
+from chat_server.protocol.enums import MessageType
 from chat_server.protocol.messages import (
     ChannelJoin,
     ChannelLeave,
     ChannelLeavePayload,
+    ChannelResume,
+    ChannelResumePayload,
+    ChannelSubscribe,
+    ChannelSubscribePayload,
     ChatSend,
     ChatSendPayload,
+    MemberList,
+    MemberListPayload,
+    MemberSearch,
+    MemberSearchPayload,
     UserFrom,
 )
+from chat_server.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
 
+def history_message(row: MessageTable) -> ChatSend:
+    """
+    Build the Chat Send message of a stored message.
+    """
+    payload = ChatSendPayload(
+        channel_id=row.channel_id,
+        sender=UserFrom(username=row.sender_username),
+        content=row.content,
+    )
+    return ChatSend(timestamp=row.timestamp, id=row.id, seq=row.seq, payload=payload)
+
+
+async def send_history(
+    ctx: ConnectionContext, channel: Channel, manager: ConnectionManager
+) -> None:
+    """
+    Send the previous messages of a Channel to the User.
+
+    Only the last HISTORY_CACHE_SIZE messages are sent. While the database
+    is unavailable, the ones kept in memory are sent instead.
+    """
+    cache_size = get_settings().HISTORY_CACHE_SIZE
+    try:
+        # HACK: Not really beautiful
+        async with db_guard():
+            async with async_session() as session:
+                history_messages = await crud.get_channel_messages(
+                    session, channel.id, limit=cache_size
+                )
+    except DatabaseUnavailable:
+        metrics.incr("db.degraded.history")
+        for data in manager.channel_srvc.cached_history(channel):
+            await manager.broker.send_text_to_user(
+                ctx.user, data, MessageType.CHAT_SEND
+            )
+        return
+
+    if history_messages is not None:
+        history = []
+        for history_msg in history_messages:
+            data = history_message(history_msg).model_dump_json()
+            history.append(data)
+            await manager.broker.send_text_to_user(
+                ctx.user, data, MessageType.CHAT_SEND
+            )
+
+        manager.channel_srvc.cache_history(channel, history)
+
+
+async def join(
+    ctx: ConnectionContext, channel: Channel, manager: ConnectionManager
+) -> None:
+    """
+    Add the User to the Channel and tell it the state of the Channel.
+    """
+    await manager.channel_srvc.join_channel(ctx.user, channel)
+    logger.info("%r joined %r", ctx.user, channel)
+
+    # Let the User know the channel is in slow mode
+    if manager.slowmode.get_interval(channel):
+        await manager.broker.send_to_user(
+            ctx.user, manager.slowmode.announcement(channel)
+        )
+
+
+async def resume_channels(
+    ctx: ConnectionContext, resume: dict[int, int], manager: ConnectionManager
+) -> None:
+    """
+    Rejoin the Channels of a reconnecting client, sending only the events
+    it missed (after the last sequence number it saw in each Channel).
+
+    If they are no longer in the replay log, the history is sent instead.
+
+    The Channels must be held (ChannelService.hold()) before the connection
+    is registered, each one is released once its replay is sent.
+    """
+    for channel_id, last_seq in resume.items():
+        try:
+            await manager.seed_seqs([channel_id])
+            channel = manager.channel_srvc.get_or_create_channel(channel_id)
+            await resume_channel(ctx, channel, last_seq, manager)
+        except Exception as e:
+            logging.info(
+                f"Error resuming channel {channel_id} for {repr(ctx.user)}: {e}"
+            )
+            await manager.send_error(ctx.websocket, "Error trying to join the channel.")
+        finally:
+            manager.channel_srvc.release(ctx.user, channel_id)
+
+
+async def resume_channel(
+    ctx: ConnectionContext,
+    channel: Channel,
+    last_seq: int,
+    manager: ConnectionManager,
+) -> None:
+    """
+    Rejoin a single Channel, see resume_channels().
+    """
+
+    async def replay_and_join() -> bool:
+        # Run by the Sequencer of the Channel, no event can be sent to it
+        # between the replay and the join
+        missed = manager.channel_srvc.replay(channel, last_seq)
+
+        payload = ChannelResumePayload(
+            channel_id=channel.id, last_seq=last_seq, snapshot=missed is None
+        )
+        await manager.broker.send_to_user(ctx.user, ChannelResume(payload=payload))
+        if missed is None:
+            return False
+
+        for message_type, data in missed:
+            await manager.broker.send_text_to_user(ctx.user, data, message_type)
+        manager.channel_srvc.release(ctx.user, channel.id)
+        await join(ctx, channel, manager)
+        return True
+
+    replayed = await manager.channel_srvc.run_in_order(channel, replay_and_join)
+    if not replayed:
+        # The history is read from the database, outside of the Sequencer
+        await send_history(ctx, channel, manager)
+        manager.channel_srvc.release(ctx.user, channel.id)
+        await join(ctx, channel, manager)
+
+    logger.debug(
+        "%r resumed %r after seq %s (snapshot=%s)",
+        ctx.user,
+        channel,
+        last_seq,
+        not replayed,
+    )
+
+
 @validate_message(ChannelJoin)
 async def handler_channel_join(
     ctx: ConnectionContext,
@@ -38,39 +185,90 @@ async def handler_channel_join(
     Handle incoming message from Channel Join
     """
 
-    channel_response = Channel(
-        id=msg_in.payload.channel_id, name=f"Channel {msg_in.payload.channel_id}"
-    )
+    channel_id = msg_in.payload.channel_id
 
     try:
-        manager.channel_srvc.create_channel(channel_response)
+        await manager.seed_seqs([channel_id])
+        channel = manager.channel_srvc.get_or_create_channel(channel_id)
 
         # Send previous messages
-        # HACK: Not really beautiful
-        async with async_session() as session:
-            history_messages = await crud.get_channel_messages(
-                session, msg_in.payload.channel_id
-            )
-            print(f"{history_messages = }")
-        if history_messages is not None:
-            for history_msg in history_messages:
-                payload = ChatSendPayload(
-                    channel_id=history_msg.channel_id,
-                    sender=UserFrom(username=history_msg.sender_username),
-                    content=history_msg.content,
-                )
-                history_send = ChatSend(
-                    timestamp=history_msg.timestamp, id=history_msg.id, payload=payload
-                )
-                await manager.broker.send_to_user(ctx.user, history_send)
+        await send_history(ctx, channel, manager)
 
-        await manager.channel_srvc.join_channel(ctx.user, channel_response)
-        logging.info(f"{repr(ctx.user)} joined {repr(channel_response)}")
+        await join(ctx, channel, manager)
     except Exception as e:
-        logging.info(f"Error adding {repr(ctx.user)} to {repr(channel_response)}: {e}")
+        logging.info(f"Error adding {repr(ctx.user)} to channel {channel_id}: {e}")
         await manager.send_error(ctx.websocket, "Error trying to join the channel.")
 
 
+async def load_histories(
+    channels: list[Channel], manager: ConnectionManager
+) -> list[ChatSend]:
+    """
+    Get the previous messages of several Channels, with a single query.
+
+    Only the last HISTORY_CACHE_SIZE messages of each Channel are returned.
+    While the database is unavailable, the ones kept in memory are
+    returned instead.
+    """
+    cache_size = get_settings().HISTORY_CACHE_SIZE
+    try:
+        async with db_guard():
+            async with async_session() as session:
+                rows = await crud.get_channels_messages(
+                    session, [channel.id for channel in channels], limit=cache_size
+                )
+    except DatabaseUnavailable:
+        metrics.incr("db.degraded.history")
+        return [
+            ChatSend.model_validate_json(data)
+            for channel in channels
+            for data in manager.channel_srvc.cached_history(channel)
+        ]
+
+    history = []
+    for channel in channels:
+        messages = [history_message(row) for row in rows.get(channel.id, ())]
+        manager.channel_srvc.cache_history(
+            channel, [msg.model_dump_json() for msg in messages]
+        )
+        history.extend(messages)
+    return history
+
+
+@validate_message(ChannelSubscribe)
+async def handler_channel_subscribe(
+    ctx: ConnectionContext,
+    message: BaseMessage,
+    manager: ConnectionManager,
+    msg_in,
+) -> None:
+    """
+    Handle a join of several Channels at once
+
+    The history of all the Channels is loaded with a single query and
+    sent back in one message, instead of one Channel Join each.
+    """
+    channel_ids = list(dict.fromkeys(msg_in.payload.channel_ids))
+
+    try:
+        await manager.seed_seqs(channel_ids)
+        channels = [
+            manager.channel_srvc.get_or_create_channel(channel_id)
+            for channel_id in channel_ids
+        ]
+
+        history = await load_histories(channels, manager)
+
+        payload = ChannelSubscribePayload(channel_ids=channel_ids, history=history)
+        await manager.broker.send_to_user(ctx.user, ChannelSubscribe(payload=payload))
+
+        for channel in channels:
+            await join(ctx, channel, manager)
+    except Exception as e:
+        logging.info(f"Error subscribing {repr(ctx.user)} to {channel_ids}: {e}")
+        await manager.send_error(ctx.websocket, "Error trying to join the channels.")
+
+
 @validate_message(ChannelLeave)
 @require_channel
 @require_membership
@@ -90,3 +288,65 @@ async def handler_channel_leave(
     except Exception as e:
         logging.error(f"Unexpected error: {e}")
         await manager.send_error(ctx.websocket, "Unexpeted error. Try again.")
+
+
+@validate_message(MemberSearch)
+@require_channel
+@require_membership
+async def handler_member_search(
+    ctx: ConnectionContext,
+    message: BaseMessage,
+    manager: ConnectionManager,
+    *,
+    msg_in,
+    channel: Channel,
+) -> None:
+    """
+    Handle a search of the channel members by username prefix
+
+    Used by the client to autocomplete usernames, e.g. for /kick and /mute.
+    """
+    payload = msg_in.payload
+    members = manager.channel_srvc.search_members(
+        channel, payload.prefix, payload.limit
+    )
+
+    response_payload = MemberSearchPayload(
+        channel_id=channel.id,
+        prefix=payload.prefix,
+        limit=payload.limit,
+        members=[UserFrom.model_validate(user) for user in members],
+    )
+    await manager.broker.send_to_user(ctx.user, MemberSearch(payload=response_payload))
+
+
+@validate_message(MemberList)
+@require_channel
+@require_membership
+async def handler_member_list(
+    ctx: ConnectionContext,
+    message: BaseMessage,
+    manager: ConnectionManager,
+    *,
+    msg_in,
+    channel: Channel,
+) -> None:
+    """
+    Handle a request for a page of the channel members
+
+    The members of a large channel are not broadcast, the client asks
+    for the pages it shows.
+    """
+    payload = msg_in.payload
+    members = manager.channel_srvc.get_members_page(
+        channel, payload.offset, payload.limit
+    )
+
+    response_payload = MemberListPayload(
+        channel_id=channel.id,
+        offset=payload.offset,
+        limit=payload.limit,
+        members=[UserFrom.model_validate(user) for user in members],
+        total=manager.channel_srvc.count_members(channel),
+    )
+    await manager.broker.send_to_user(ctx.user, MemberList(payload=response_payload))
@@ -1,18 +1,20 @@
 import logging
-import uuid
 from datetime import datetime
 
 from chat_server.connection.channel import Channel
 from chat_server.connection.context import ConnectionContext
 from chat_server.connection.manager import ConnectionManager
 from chat_server.db import crud
-from chat_server.db.db import async_session
+from chat_server.db.db import DatabaseUnavailable, async_session, db_guard
 from chat_server.handler.decorators import (
+    enforce_slowmode,
+    rate_limit_channel,
     require_channel,
     require_membership,
     require_not_muted,
     validate_message,
 )
+from chat_server.ids import new_id
 from chat_server.protocol.basemessage import BaseMessage
 from chat_server.protocol.enums import MessageType
 from chat_server.protocol.messages import (
@@ -26,11 +28,15 @@ from chat_server.protocol.messages import (
     UserFrom,
 )
 
+logger = logging.getLogger(__name__)
+
 
 @validate_message(ChatSend)
 @require_channel
 @require_membership
 @require_not_muted
+@rate_limit_channel
+@enforce_slowmode
 async def handler_chat_send(
     ctx: ConnectionContext,
     message: BaseMessage,
@@ -49,20 +55,34 @@ async def handler_chat_send(
             content=msg_in.payload.content,
         )
 
-        server_response = ChatSend(
-            timestamp=datetime.now(), id=uuid.uuid4(), payload=response_payload
-        )
+        async def deliver() -> None:
+            server_response = ChatSend(
+                timestamp=datetime.now(),
+                id=new_id(),
+                seq=manager.channel_srvc.next_seq(channel),
+                payload=response_payload,
+            )
 
-        logging.info(
-            f"Server sending <{server_response.model_dump_json()}> to {repr(ctx.user)}"
-        )
+            # Save message to database
+            try:
+                async with db_guard():
+                    async with async_session() as session:
+                        await crud.create_message(
+                            session, server_response, ctx.user.id
+                        )
+            except DatabaseUnavailable:
+                # Keep chatting, the message is stored once the database is back
+                if not manager.spool.add(server_response, ctx.user.id):
+                    raise
 
-        # Save message to database
-        async with async_session() as session:
-            await crud.create_message(session, server_response)
+            await manager.channel_srvc.send_to_channel(channel, server_response)
 
-        await manager.channel_srvc.send_to_channel(channel, server_response)
-        logging.info(f"Message sent to channel {repr(channel)} by {repr(ctx.user)}")
+        # Number, store and send the messages of the channel in order. The
+        # deadline only covers the wait for its turn: once stored, a message
+        # must be sent, or a retry of the client stores it twice. The
+        # database call is bounded by DB_CALL_TIMEOUT
+        await manager.channel_srvc.run_in_order(channel, deliver, shielded=True)
+        logger.debug("Message sent to channel %r by %r", channel, ctx.user)
     except Exception as e:
         logging.error(f"Error handling CHAT_SEND: {e}")
         await manager.send_error(ctx.websocket, "Failed to send message")
@@ -71,6 +91,7 @@ async def handler_chat_send(
 @validate_message(ReactAdd)
 @require_channel
 @require_membership
+@rate_limit_channel
 async def handler_chat_react(
     ctx: ConnectionContext,
     message: BaseMessage,
@@ -84,7 +105,6 @@ async def handler_chat_react(
     """
     # FIX: Does this message even exist ? How to check
     # if the message_id exists?
-    # Also, how to block the user from sending many react add ?
     payload = ReactPayload(
         emote=msg_in.payload.emote,
         message_id=msg_in.payload.message_id,
@@ -92,19 +112,22 @@ async def handler_chat_react(
     )
 
     if msg_in.type is MessageType.REACT_ADD:
-        response = ReactAdd(timestamp=datetime.now(), id=uuid.uuid4(), payload=payload)
+        response = ReactAdd(timestamp=datetime.now(), id=new_id(), payload=payload)
     else:
         response = ReactRemove(
-            timestamp=datetime.now(), id=uuid.uuid4(), payload=payload
+            timestamp=datetime.now(), id=new_id(), payload=payload
         )
 
-    await manager.channel_srvc.send_to_channel(channel, response)
+    await manager.channel_srvc.run_in_order(
+        channel, lambda: manager.channel_srvc.send_to_channel(channel, response)
+    )
 
 
 @validate_message(TypingStart)
 @require_channel
 @require_membership
 @require_not_muted
+@rate_limit_channel
 async def handler_chat_typing(
     ctx: ConnectionContext,
     message: BaseMessage,
@@ -116,10 +139,8 @@ async def handler_chat_typing(
     """
     Handles typing start message
     """
-    logging.debug(f"{msg_in = }")
-
     response_payload = TypingStartPayload(channel_id=channel.id, user=ctx.user)
     response = TypingStart(
-        timestamp=datetime.now(), id=uuid.uuid4(), payload=response_payload
+        timestamp=datetime.now(), id=new_id(), payload=response_payload
     )
     await manager.channel_srvc.send_to_channel(channel, response)
@@ -1,21 +1,24 @@
 import logging
 from datetime import datetime, datetime_CAPI
-from uuid import uuid4
 
 from chat_server.connection.channel import Channel
 from chat_server.connection.context import ConnectionContext
 from chat_server.connection.manager import ConnectionManager
+from chat_server.db.db import DatabaseUnavailable
 from chat_server.handler.decorators import (
     require_channel,
     require_membership,
     require_permission,
     validate_message,
 )
+from chat_server.ids import new_id
 from chat_server.protocol.basemessage import BaseMessage
+from chat_server.protocol.enums import ErrorCode, MessageType
 from chat_server.protocol.messages import (
     KickCommand,
     MuteCommand,
     MuteCommandPayload,
+    SlowModeCommand,
     UnMuteCommand,
     UnMuteCommandPayload,
 )
@@ -44,7 +47,7 @@ async def handler_kick(
         if target:
             payload = msg_in.payload
             kick_msg = KickCommand(
-                timestamp=datetime.now(), id=uuid4(), payload=payload
+                timestamp=datetime.now(), id=new_id(), payload=payload
             )
             await manager.channel_srvc.send_to_channel(channel, kick_msg)
             await manager.channel_srvc.leave_channel(target, channel)
@@ -91,11 +94,18 @@ async def handler_mute(
             )
 
             server_rsp = MuteCommand(
-                timestamp=datetime.now(), id=uuid4(), payload=server_payload
+                timestamp=datetime.now(), id=new_id(), payload=server_payload
             )
 
             await manager.channel_srvc.send_to_channel(channel, server_rsp)
 
+    except DatabaseUnavailable:
+        await manager.send_error(
+            ctx.websocket,
+            "Service temporarily unavailable",
+            code=ErrorCode.UNAVAILABLE,
+            message_type=MessageType.CHAT_MUTE,
+        )
     except Exception as e:
         logging.error(f"Error handling CHAT_MUTE: {e}")
 
@@ -131,10 +141,46 @@ async def handler_unmute(
             )
 
             server_rsp = UnMuteCommand(
-                timestamp=datetime.now(), id=uuid4(), payload=server_payload
+                timestamp=datetime.now(), id=new_id(), payload=server_payload
             )
 
             await manager.channel_srvc.send_to_channel(channel, server_rsp)
 
+    except DatabaseUnavailable:
+        await manager.send_error(
+            ctx.websocket,
+            "Service temporarily unavailable",
+            code=ErrorCode.UNAVAILABLE,
+            message_type=MessageType.CHAT_UNMUTE,
+        )
     except Exception as e:
         logging.error(f"Error handling CHAT_UNMUTE: {e}")
+
+
+@validate_message(SlowModeCommand)
+@require_channel
+@require_membership
+@require_permission("slowmode")
+async def handler_slowmode(
+    ctx: ConnectionContext,
+    message: BaseMessage,
+    manager: ConnectionManager,
+    *,
+    msg_in,  # require_channel
+    channel: Channel,  # @require_membership
+):
+    """
+    Handle slow mode command
+    """
+    try:
+        manager.slowmode.set_interval(channel, msg_in.payload.interval)
+        logging.info(
+            f"{repr(ctx.user)} set slow mode of {channel} to {msg_in.payload.interval}s."
+        )
+
+        await manager.channel_srvc.send_to_channel(
+            channel, manager.slowmode.announcement(channel)
+        )
+
+    except Exception as e:
+        logging.error(f"Error handling CHAT_SLOWMODE: {e}")
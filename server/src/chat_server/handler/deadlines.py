@@ -0,0 +1,30 @@
+from chat_server.protocol.enums import MessageType
+from chat_server.settings import get_settings
+
+# Max time (s) to handle a message, for each Message Type. The whole
+# handler is cancelled past it. Other types get HANDLER_DEADLINE
+DEADLINES = {
+    MessageType.PING: 1,
+    MessageType.PONG: 1,
+    MessageType.TYPING_START: 1,
+    MessageType.REACT_ADD: 2,
+    MessageType.REACT_REMOVE: 2,
+    MessageType.MEMBER_SEARCH: 2,
+    MessageType.MEMBER_LIST: 2,
+    MessageType.CHAT_SLOWMODE: 2,
+    MessageType.CHAT_SEND: 5,
+    MessageType.CHAT_KICK: 5,
+    MessageType.CHAT_MUTE: 5,
+    MessageType.CHAT_UNMUTE: 5,
+    MessageType.CHANNEL_LEAVE: 5,
+    # Sends the channel history
+    MessageType.CHANNEL_JOIN: 10,
+    MessageType.CHANNEL_SUBSCRIBE: 10,
+}
+
+
+def deadline(message_type: MessageType) -> float:
+    """
+    Get the max time to handle a message of the given type.
+    """
+    return DEADLINES.get(message_type, get_settings().HANDLER_DEADLINE)
@@ -4,7 +4,12 @@ from typing import Type
 
 from pydantic import ValidationError
 
+from chat_server.handler import rate_limit
 from chat_server.protocol.basemessage import BaseMessage
+from chat_server.protocol.enums import ErrorCode
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
 
 
 def validate_message(message_class: Type[BaseMessage]):
@@ -21,7 +26,7 @@ def validate_message(message_class: Type[BaseMessage]):
                 msg = message_class.model_validate(message)
             except ValidationError:
                 await manager.send_error(ctx.websocket, "Malformed message.")
-                logging.info(f"User sent malformed message: {message}")
+                logger.info("User sent malformed message: %s", message)
                 return
             return await handler(ctx, message, manager, msg_in=msg, **kwargs)
 
@@ -70,6 +75,34 @@ def require_membership(handler):
     return wrapper
 
 
+def rate_limit_channel(handler):
+    """
+    Enforce the per Channel rate limit of the message.
+
+    Checked once the User is known to be a member, so nobody can spend
+    the budget of a channel it is not in.
+    """
+
+    @wraps(handler)
+    async def wrapper(ctx, message, manager, *, msg_in, channel, **kwargs):
+        if get_settings().RATE_LIMIT_ENABLED and not (
+            rate_limit.rate_limiter.allow_channel(ctx, message, channel.id)
+        ):
+            if message.type not in rate_limit.SILENT_DROP:
+                await manager.send_error(
+                    ctx.websocket,
+                    "Rate limit exceeded",
+                    code=ErrorCode.RATE_LIMITED,
+                    message_type=message.type,
+                )
+            return
+        return await handler(
+            ctx, message, manager, msg_in=msg_in, channel=channel, **kwargs
+        )
+
+    return wrapper
+
+
 def require_permission(permission: str):
     """
     Check for permission
@@ -85,7 +118,7 @@ def require_permission(permission: str):
                 )
                 return
 
-            logging.warning(f"Permission check '{permission}' - allowing {ctx.user}")
+            logger.debug("Permission check '%s' - allowing %r", permission, ctx.user)
             return await handler(ctx, message, manager, channel=channel, **kwargs)
 
         return wrapper
@@ -93,6 +126,33 @@ def require_permission(permission: str):
     return decorator
 
 
+def enforce_slowmode(handler):
+    """
+    Enforce the slow mode of the channel, and record the message
+    so hot channels get slow mode turned on automatically.
+    """
+
+    @wraps(handler)
+    async def wrapper(ctx, message, manager, *, msg_in, channel, **kwargs):
+        wait = manager.slowmode.retry_after(ctx.user, channel)
+        if wait:
+            await manager.send_error(
+                ctx.websocket, f"Slow mode is on. Wait {wait:.0f}s before sending."
+            )
+            return
+
+        if manager.slowmode.record(ctx.user, channel):
+            await manager.channel_srvc.send_to_channel(
+                channel, manager.slowmode.announcement(channel)
+            )
+
+        return await handler(
+            ctx, message, manager, msg_in=msg_in, channel=channel, **kwargs
+        )
+
+    return wrapper
+
+
 def require_not_muted(handler):
     """
     Ensure the user is not muted in the channel
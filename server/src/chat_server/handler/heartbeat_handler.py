@@ -0,0 +1,28 @@
+import logging
+
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.protocol.basemessage import BaseMessage
+from chat_server.protocol.messages import Pong
+
+logger = logging.getLogger(__name__)
+
+
+async def handler_ping(
+    ctx: ConnectionContext, message: BaseMessage, manager: ConnectionManager
+) -> None:
+    """
+    Handle a PING sent by the client. Answer with a PONG.
+    """
+    await manager.broker.send_to_websocket(ctx.websocket, Pong())
+
+
+async def handler_pong(
+    ctx: ConnectionContext, message: BaseMessage, manager: ConnectionManager
+) -> None:
+    """
+    Handle a PONG sent by the client.
+
+    Nothing to do, the connection was already marked as alive
+    by ConnectionManager.handle_message().
+    """
@@ -0,0 +1,126 @@
+import logging
+from dataclasses import dataclass
+
+from chat_server import metrics
+from chat_server.connection.context import ConnectionContext
+from chat_server.infrastructure.rate_limiter import RateLimiter
+from chat_server.protocol.basemessage import BaseMessage
+from chat_server.protocol.enums import MessageType
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Limit:
+    """
+    Sustained rate (events per second) and burst allowed.
+    """
+
+    rate: float
+    burst: int
+
+
+# Per User, for each Message Type
+USER_LIMITS = {
+    MessageType.CHAT_SEND: Limit(rate=2, burst=10),
+    MessageType.REACT_ADD: Limit(rate=3, burst=10),
+    MessageType.REACT_REMOVE: Limit(rate=3, burst=10),
+    MessageType.TYPING_START: Limit(rate=0.5, burst=2),
+    MessageType.MEMBER_SEARCH: Limit(rate=5, burst=10),
+    MessageType.MEMBER_LIST: Limit(rate=5, burst=10),
+    MessageType.CHANNEL_JOIN: Limit(rate=1, burst=10),
+    MessageType.CHANNEL_SUBSCRIBE: Limit(rate=0.2, burst=2),
+    MessageType.CHAT_KICK: Limit(rate=1, burst=5),
+    MessageType.CHAT_MUTE: Limit(rate=1, burst=5),
+    MessageType.CHAT_UNMUTE: Limit(rate=1, burst=5),
+    MessageType.CHAT_SLOWMODE: Limit(rate=1, burst=5),
+}
+
+# Per Channel, for each Message Type. Bounds the fan-out of a channel.
+# Enforced by the rate_limit_channel decorator of the handler, after the
+# membership check
+CHANNEL_LIMITS = {
+    MessageType.CHAT_SEND: Limit(rate=50, burst=100),
+    MessageType.REACT_ADD: Limit(rate=50, burst=100),
+    MessageType.REACT_REMOVE: Limit(rate=50, burst=100),
+    MessageType.TYPING_START: Limit(rate=10, burst=20),
+}
+
+# Dropped without telling the client, an error would be as noisy as the event
+SILENT_DROP = {
+    MessageType.TYPING_START,
+}
+
+
+class InboundRateLimiter:
+    """
+    Rate limit inbound messages per User and per Channel.
+    """
+
+    def __init__(self) -> None:
+        max_keys = get_settings().RATE_LIMIT_MAX_KEYS
+        self._user = {
+            msg_type: RateLimiter(limit.rate, limit.burst, max_keys)
+            for msg_type, limit in USER_LIMITS.items()
+        }
+        self._channel = {
+            msg_type: RateLimiter(limit.rate, limit.burst, max_keys)
+            for msg_type, limit in CHANNEL_LIMITS.items()
+        }
+
+    def _user_limited(self, ctx: ConnectionContext, message: BaseMessage) -> None:
+        metrics.incr(f"rate_limited.user.{message.type.value}")
+        logger.debug("%r rate limited on %s", ctx.user, message.type)
+
+    def allow(self, ctx: ConnectionContext, message: BaseMessage) -> bool:
+        """
+        Check if a message is within the limits of its User, on dispatch.
+
+        A message also limited per Channel is only checked here, its
+        tokens are taken by allow_channel() once the User is known to
+        be a member. Violations are counted in the metrics as
+        "rate_limited.<scope>.<message type>".
+        """
+        limiter = self._user.get(message.type)
+        if limiter is None:
+            return True
+
+        if message.type in self._channel:
+            allowed = limiter.peek(ctx.user.id)
+        else:
+            allowed = limiter.allow(ctx.user.id)
+
+        if not allowed:
+            self._user_limited(ctx, message)
+        return allowed
+
+    def allow_channel(
+        self, ctx: ConnectionContext, message: BaseMessage, channel_id: int
+    ) -> bool:
+        """
+        Check if a message is within the limits of its User and Channel.
+
+        Both are checked before a token is taken from either, so a
+        message rejected by one limit is not charged to the other.
+        """
+        user_limiter = self._user.get(message.type)
+        channel_limiter = self._channel.get(message.type)
+
+        if user_limiter is not None and not user_limiter.peek(ctx.user.id):
+            self._user_limited(ctx, message)
+            return False
+
+        if channel_limiter is not None and not channel_limiter.peek(channel_id):
+            metrics.incr(f"rate_limited.channel.{message.type.value}")
+            logger.debug("Channel %s rate limited on %s", channel_id, message.type)
+            return False
+
+        if user_limiter is not None:
+            user_limiter.allow(ctx.user.id)
+        if channel_limiter is not None:
+            channel_limiter.allow(channel_id)
+        return True
+
+
+rate_limiter = InboundRateLimiter()
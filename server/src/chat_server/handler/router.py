@@ -1,16 +1,33 @@
+import asyncio
 import logging
 
+from chat_server import metrics
 from chat_server.connection.context import ConnectionContext
 from chat_server.connection.manager import ConnectionManager
-from chat_server.handler import channel_handler, chat_handler, commands_handler
+from chat_server.handler import (
+    channel_handler,
+    chat_handler,
+    commands_handler,
+    heartbeat_handler,
+)
+from chat_server.handler.deadlines import deadline
+from chat_server.handler import rate_limit
 from chat_server.protocol.basemessage import BaseMessage
-from chat_server.protocol.enums import MessageType
+from chat_server.protocol.enums import ErrorCode, MessageType
+from chat_server.settings import get_settings
 
+logger = logging.getLogger(__name__)
 
 HANDLERS = {
+    # Heartbeat
+    MessageType.PING: heartbeat_handler.handler_ping,
+    MessageType.PONG: heartbeat_handler.handler_pong,
     # Channel
     MessageType.CHANNEL_JOIN: channel_handler.handler_channel_join,
+    MessageType.CHANNEL_SUBSCRIBE: channel_handler.handler_channel_subscribe,
     MessageType.CHANNEL_LEAVE: channel_handler.handler_channel_leave,
+    MessageType.MEMBER_SEARCH: channel_handler.handler_member_search,
+    MessageType.MEMBER_LIST: channel_handler.handler_member_list,
     # Chat
     MessageType.CHAT_SEND: chat_handler.handler_chat_send,
     MessageType.REACT_ADD: chat_handler.handler_chat_react,
@@ -20,6 +37,7 @@ HANDLERS = {
     MessageType.CHAT_KICK: commands_handler.handler_kick,
     MessageType.CHAT_MUTE: commands_handler.handler_mute,
     MessageType.CHAT_UNMUTE: commands_handler.handler_unmute,
+    MessageType.CHAT_SLOWMODE: commands_handler.handler_slowmode,
 }
 
 
@@ -31,14 +49,37 @@ async def dispatch(
     """
 
     handler = HANDLERS.get(message.type)
-    logging.debug(
-        f"This handler was invoked: {handler.__name__ if handler else 'Unknown Handler'} "
-    )
-
     if handler is None:
         # TODO: Return a message error or some exception. It will never happen
         # here since there is a verification check in manager.handle_message()
-        logging.debug(f"Unknown Message Type: {message.type}. Payload: {message}")
+        logger.debug("Unknown Message Type: %s. Payload: %s", message.type, message)
+        return
+
+    if get_settings().RATE_LIMIT_ENABLED and not rate_limit.rate_limiter.allow(
+        ctx, message
+    ):
+        if message.type not in rate_limit.SILENT_DROP:
+            await manager.send_error(
+                ctx.websocket,
+                "Rate limit exceeded",
+                code=ErrorCode.RATE_LIMITED,
+                message_type=message.type,
+            )
         return
 
-    await handler(ctx, message, manager)
+    logger.debug("This handler was invoked: %s", handler.__name__)
+
+    # Bound the whole handler, a hung database call must not hold the
+    # connection (or the channel) forever
+    try:
+        async with asyncio.timeout(deadline(message.type)):
+            await handler(ctx, message, manager)
+    except TimeoutError:
+        metrics.incr(f"handler.timeout.{message.type}")
+        logger.warning("%s from %r timed out", message.type, ctx.user)
+        await manager.send_error(
+            ctx.websocket,
+            "Request timed out",
+            code=ErrorCode.TIMEOUT,
+            message_type=message.type,
+        )
@@ -43,3 +43,9 @@ class ChannelManager:
         Check if a channel exists.
         """
         return channel_id in self._channels
+
+    def get_all(self) -> list[Channel]:
+        """
+        Retrieve all channels.
+        """
+        return list(self._channels.values())
@@ -0,0 +1,152 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from enum import StrEnum
+from typing import AsyncIterator
+
+from chat_server import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a dependency whose circuit is open.
+    """
+
+
+class State(StrEnum):
+    CLOSED = "closed"  # Calls go through
+    OPEN = "open"  # Calls fail fast
+    HALF_OPEN = "half_open"  # A single trial call goes through
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency that keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail fast with CircuitOpenError, instead of piling up on the
+    dependency. After `reset_timeout` seconds a single trial call is let
+    through: if it succeeds the circuit closes again, otherwise it stays
+    open for another `reset_timeout`.
+
+    Only the exceptions in `failures` count as failures, others (e.g. an
+    integrity error) are not held against the dependency.
+    """
+
+    __slots__ = (
+        "name",
+        "failure_threshold",
+        "reset_timeout",
+        "failures",
+        "_state",
+        "_failure_count",
+        "_opened_at",
+        "_trial",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        failures: tuple[type[BaseException], ...] = (Exception,),
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = failures
+        self._state = State.CLOSED
+        self._failure_count = 0
+        self._opened_at = 0.0
+        # A trial call is in flight
+        self._trial = False
+
+    @property
+    def state(self) -> State:
+        return self._state
+
+    def is_open(self, now: float | None = None) -> bool:
+        """
+        Check if calls would fail fast, without taking the trial call.
+        """
+        if now is None:
+            now = time.monotonic()
+        if self._state is State.CLOSED:
+            return False
+        if self._trial:
+            return True
+        return now - self._opened_at < self.reset_timeout
+
+    def allow(self, now: float | None = None) -> bool:
+        """
+        Check if a call can go through. The result of an allowed call
+        must be recorded.
+        """
+        if now is None:
+            now = time.monotonic()
+        if self._state is State.CLOSED:
+            return True
+        if self._trial or now - self._opened_at < self.reset_timeout:
+            return False
+
+        self._state = State.HALF_OPEN
+        self._trial = True
+        return True
+
+    def record_success(self) -> None:
+        self._failure_count = 0
+        self._trial = False
+        if self._state is not State.CLOSED:
+            self._state = State.CLOSED
+            logger.info("Circuit %s closed", self.name)
+            metrics.incr(f"circuit.{self.name}.closed")
+
+    def record_failure(self, now: float | None = None) -> None:
+        if now is None:
+            now = time.monotonic()
+        self._failure_count += 1
+        self._trial = False
+        if (
+            self._state is State.HALF_OPEN
+            or self._failure_count >= self.failure_threshold
+        ):
+            if self._state is State.CLOSED:
+                logger.warning(
+                    "Circuit %s opened after %d failures",
+                    self.name,
+                    self._failure_count,
+                )
+                metrics.incr(f"circuit.{self.name}.opened")
+            self._state = State.OPEN
+            self._opened_at = now
+
+    def release(self) -> None:
+        """
+        Give back the trial call of an allowed call with no result
+        (e.g. cancelled).
+        """
+        self._trial = False
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Guard a call to the dependency.
+
+        Raise CircuitOpenError if the circuit is open.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+
+        try:
+            yield
+        except self.failures:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Not the dependency's fault (e.g. cancelled), no result either
+            self.release()
+            raise
+        else:
+            self.record_success()
@@ -17,15 +17,15 @@ class ConnectionRegistry:
         # WebSocket -> Context
         self._connections: dict[WebSocket, ConnectionContext] = {}
 
-        # User -> Context
-        self._connection_by_user: dict[User, ConnectionContext] = {}
+        # User ID -> Context
+        self._connection_by_user: dict[int, ConnectionContext] = {}
 
     def add(self, ctx: ConnectionContext) -> None:
         """
         Register a new connection.
         """
         self._connections[ctx.websocket] = ctx
-        self._connection_by_user[ctx.user] = ctx
+        self._connection_by_user[ctx.user.id] = ctx
 
     def remove(self, websocket: WebSocket) -> ConnectionContext | None:
         """
@@ -33,8 +33,9 @@ class ConnectionRegistry:
         """
         ctx = self._connections.pop(websocket, None)
 
-        if ctx:
-            self._connection_by_user.pop(ctx.user, None)
+        # The User may already have a newer connection
+        if ctx and self._connection_by_user.get(ctx.user.id) is ctx:
+            self._connection_by_user.pop(ctx.user.id, None)
             logging.info(f"Connection removed: {repr(ctx.user)}")
 
         return ctx
@@ -49,7 +50,19 @@ class ConnectionRegistry:
         """
         Get ConnectionContext by User.
         """
-        return self._connection_by_user.get(user)
+        return self._connection_by_user.get(user.id)
+
+    def get_by_user_id(self, user_id: int) -> ConnectionContext | None:
+        """
+        Get ConnectionContext by User ID.
+        """
+        return self._connection_by_user.get(user_id)
+
+    def get_all(self) -> list[ConnectionContext]:
+        """
+        Get all active connections.
+        """
+        return list(self._connections.values())
 
     def count(self) -> int:
         """
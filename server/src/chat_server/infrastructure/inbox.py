@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Hashable
+
+from chat_server import metrics
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class Inbox:
+    """
+    Per connection queue of received messages, handled by worker tasks.
+
+    The receive loop only parses a frame and queues its handler, so a
+    slow handler (e.g. a database write) does not stop the connection
+    from reading. Jobs are spread over `lanes` by key (e.g. the Channel
+    ID): jobs with the same key run one at a time in the order received,
+    jobs in different lanes run concurrently.
+
+    At most `capacity` jobs are queued or running, past that `put` waits,
+    which stops reading the socket and pushes back on the client.
+
+    The lanes and the worker tasks only exist while there is something
+    to handle, an idle connection costs nothing more.
+    """
+
+    __slots__ = ("_lanes", "_workers", "_slots", "closed")
+
+    def __init__(self, lanes: int, capacity: int) -> None:
+        self._lanes: list[deque[Job] | None] = [None] * lanes
+        self._workers: list[asyncio.Task | None] = [None] * lanes
+        self._slots = asyncio.Semaphore(capacity)
+        self.closed = False
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self._lanes if lane)
+
+    async def put(self, key: Hashable, job: Job) -> None:
+        """
+        Queue a job, after the jobs queued before with the same key.
+        """
+        if self.closed:
+            return
+
+        if self._slots.locked():
+            metrics.incr("inbound.backpressure")
+        await self._slots.acquire()
+        if self.closed:
+            return
+
+        index = hash(key) % len(self._lanes)
+        lane = self._lanes[index]
+        if lane is None:
+            lane = self._lanes[index] = deque()
+        lane.append(job)
+
+        if self._workers[index] is None:
+            self._workers[index] = asyncio.create_task(self._run(index))
+
+    async def _run(self, index: int) -> None:
+        lane = self._lanes[index]
+        try:
+            while lane:
+                job = lane.popleft()
+                try:
+                    await job()
+                except Exception:
+                    logger.exception("Failed to handle message")
+                finally:
+                    self._slots.release()
+        finally:
+            self._workers[index] = None
+            # Free the lanes of idle connections
+            if self._lanes[index] is lane and not lane:
+                self._lanes[index] = None
+
+    def close(self) -> None:
+        """
+        Drop the queued jobs and stop the workers.
+        """
+        self.closed = True
+        for index, lane in enumerate(self._lanes):
+            if lane:
+                lane.clear()
+            self._lanes[index] = None
+        current = asyncio.current_task()
+        for index, worker in enumerate(self._workers):
+            if worker is not None and worker is not current:
+                worker.cancel()
+                self._workers[index] = None
+
+    async def flush(self) -> None:
+        """
+        Wait until the queued jobs are handled.
+        """
+        while workers := {worker for worker in self._workers if worker is not None}:
+            await asyncio.wait(workers)
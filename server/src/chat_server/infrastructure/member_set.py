@@ -0,0 +1,98 @@
+from array import array
+from bisect import bisect_left
+from typing import Collection, Iterator
+
+
+class MemberSet:
+    """
+    Compact set of User IDs, for channels with many members.
+
+    IDs are kept sorted in an `array` of 64-bit ints (8 bytes per member,
+    O(log n) lookups).
+
+    `snapshot()` is copy-on-write: it returns the underlying array without
+    copying it, and the next mutation copies the array instead of changing it
+    in place. Fan-outs can iterate a snapshot while members join and leave.
+    """
+
+    __slots__ = ("_ids", "_shared")
+
+    def __init__(self, ids: Collection[int] = ()) -> None:
+        self._ids = array("q", sorted(set(ids)))
+        # True while a snapshot of `_ids` may still be in use
+        self._shared = False
+
+    def _writable(self) -> array:
+        if self._shared:
+            self._ids = array("q", self._ids)
+            self._shared = False
+        return self._ids
+
+    def add(self, user_id: int) -> bool:
+        """
+        Add an ID. Returns False if it was already present.
+        """
+        i = bisect_left(self._ids, user_id)
+        if i < len(self._ids) and self._ids[i] == user_id:
+            return False
+        self._writable().insert(i, user_id)
+        return True
+
+    def discard(self, user_id: int) -> bool:
+        """
+        Remove an ID. Returns False if it was not present.
+        """
+        i = bisect_left(self._ids, user_id)
+        if i == len(self._ids) or self._ids[i] != user_id:
+            return False
+        del self._writable()[i]
+        return True
+
+    def snapshot(self) -> array:
+        """
+        Sorted IDs at this moment, without copying.
+
+        The returned array must not be modified.
+        """
+        self._shared = True
+        return self._ids
+
+    def difference(self, other: "MemberSet | Collection[int]") -> list[int]:
+        """
+        IDs in this set but not in `other`.
+        """
+        exclude = set(other._ids if isinstance(other, MemberSet) else other)
+        return [i for i in self._ids if i not in exclude]
+
+    def intersection(self, other: "MemberSet | Collection[int]") -> list[int]:
+        """
+        IDs in both this set and `other`.
+        """
+        if isinstance(other, MemberSet):
+            small, large = sorted((self, other), key=len)
+            include = set(large._ids)
+            return [i for i in small._ids if i in include]
+        include = other if isinstance(other, (set, frozenset)) else set(other)
+        return [i for i in self._ids if i in include]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by the IDs.
+        """
+        return self._ids.buffer_info()[1] * self._ids.itemsize
+
+    def __contains__(self, user_id: object) -> bool:
+        if not isinstance(user_id, int):
+            return False
+        i = bisect_left(self._ids, user_id)
+        return i < len(self._ids) and self._ids[i] == user_id
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.snapshot())
+
+    def __repr__(self):
+        return f"MemberSet(size={len(self._ids)})"
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from enum import IntEnum
+from itertools import count
+from typing import Hashable
+
+from fastapi import WebSocket, status
+
+from chat_server import metrics
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """
+    Outbound priority lanes.
+    """
+
+    HIGH = 0  # Must arrive: chat messages, moderation, membership
+    LOW = 1  # May be coalesced or dropped under pressure: typing, reactions
+
+
+class Outbox:
+    """
+    Per connection queue of serialized messages, drained by a writer task.
+
+    Producers (e.g. a channel fan-out) never wait on a slow socket, they
+    only enqueue. There are two lanes, the HIGH lane is always drained
+    first:
+        - HIGH is never dropped. A connection that lets it grow past
+          OUTBOX_HIGH_CAPACITY is too slow to keep up, and is closed.
+        - LOW holds at most OUTBOX_LOW_CAPACITY messages, the oldest is
+          dropped when full. Messages with the same coalescing key
+          (e.g. the typing indicator of a User) replace each other.
+
+    The lanes and the writer task only exist while there is something
+    to send, an idle connection costs nothing more.
+    """
+
+    __slots__ = ("_websocket", "_high", "_low", "_writer", "closed")
+
+    # Messages queued in all the outboxes of the process
+    pending_total = 0
+
+    _unique_keys = count()
+
+    def __init__(self, websocket: WebSocket) -> None:
+        self._websocket = websocket
+        self._high: deque[str] | None = None
+        self._low: OrderedDict[Hashable, tuple[str, str]] | None = None
+        self._writer: asyncio.Task | None = None
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._high or ()) + len(self._low or ())
+
+    def put(
+        self,
+        data: str,
+        priority: Priority = Priority.HIGH,
+        kind: str = "",
+        key: Hashable | None = None,
+    ) -> None:
+        """
+        Queue a serialized message.
+
+        `kind` names the message in the metrics, `key` lets a LOW
+        priority message replace a queued one with the same key.
+        """
+        if self.closed:
+            return
+
+        settings = get_settings()
+
+        if priority is Priority.HIGH:
+            if self._high is None:
+                self._high = deque()
+            if len(self._high) >= settings.OUTBOX_HIGH_CAPACITY:
+                metrics.incr("outbound.slow_consumer")
+                logger.warning("Closing slow consumer %r", self._websocket)
+                self._close_slow_consumer()
+                return
+            self._high.append(data)
+            Outbox.pending_total += 1
+        else:
+            if self._low is None:
+                self._low = OrderedDict()
+            if key is not None and key in self._low:
+                self._low[key] = (kind, data)
+                metrics.incr(f"outbound.coalesced.{kind}")
+                return
+            if len(self._low) >= settings.OUTBOX_LOW_CAPACITY:
+                dropped_kind, _ = self._low.popitem(last=False)[1]
+                Outbox.pending_total -= 1
+                metrics.incr(f"outbound.dropped.{dropped_kind}")
+            if key is None:
+                key = next(Outbox._unique_keys)
+            self._low[key] = (kind, data)
+            Outbox.pending_total += 1
+
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._drain())
+
+    def _pop(self) -> str | None:
+        if self._high:
+            data = self._high.popleft()
+        elif self._low:
+            _, (_, data) = self._low.popitem(last=False)
+        else:
+            # Free the lanes of idle connections
+            self._high = self._low = None
+            return None
+
+        Outbox.pending_total -= 1
+        return data
+
+    async def _drain(self) -> None:
+        try:
+            while (data := self._pop()) is not None:
+                await self._websocket.send_text(data)
+        except Exception as e:
+            logger.error("Failed to send message to %r: %s", self._websocket, e)
+            self.close()
+        finally:
+            self._writer = None
+
+    def _clear(self) -> None:
+        Outbox.pending_total -= len(self)
+        self._high = self._low = None
+
+    def _close_slow_consumer(self) -> None:
+        self.close()
+        # Keep a reference to the task, until the socket is closed
+        self._writer = asyncio.create_task(self._close_websocket())
+
+    async def _close_websocket(self) -> None:
+        try:
+            await self._websocket.close(
+                code=status.WS_1008_POLICY_VIOLATION, reason="Too slow"
+            )
+        except Exception as e:
+            logger.debug("Failed to close %r: %s", self._websocket, e)
+        finally:
+            self._writer = None
+
+    def close(self) -> None:
+        """
+        Drop the queued messages and stop the writer.
+        """
+        self.closed = True
+        self._clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+            self._writer = None
+
+    async def flush(self) -> None:
+        """
+        Wait until the queued messages are sent.
+        """
+        while self._writer is not None:
+            await asyncio.wait({self._writer})
@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from chat_server.infrastructure.token_bucket import TokenBucket
+
+
+class RateLimiter:
+    """
+    One token bucket per key (user, channel, ...).
+
+    Buckets are kept in least recently used order. A bucket that has
+    refilled completely behaves exactly like a new one, so idle buckets
+    are evicted from the old end, a few on each call. Memory stays
+    proportional to the number of recently active keys, and is capped
+    at `max_keys`.
+    """
+
+    # Buckets checked for eviction per call
+    EVICT_PER_CALL = 2
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = 100_000) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[Hashable, TokenBucket] = OrderedDict()
+
+    def allow(self, key: Hashable, now: float | None = None) -> bool:
+        """
+        Take a token for `key`. Return False if it is over the limit.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.capacity, now)
+            self._buckets[key] = bucket
+        else:
+            self._buckets.move_to_end(key)
+
+        allowed = bucket.try_acquire(now=now)
+        self._evict(now)
+        return allowed
+
+    def peek(self, key: Hashable, now: float | None = None) -> bool:
+        """
+        Check if `key` is within the limit, without taking a token.
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self.capacity >= 1
+        return bucket.retry_after(now=now) == 0
+
+    def _evict(self, now: float) -> None:
+        for _ in range(self.EVICT_PER_CALL):
+            if not self._buckets:
+                return
+            key, oldest = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and not oldest.is_full(now):
+                return
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
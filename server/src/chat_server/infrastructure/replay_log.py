@@ -0,0 +1,99 @@
+import time
+from bisect import bisect_right
+from collections import deque
+from itertools import islice
+from typing import Generic, TypeVar
+
+E = TypeVar("E")
+
+
+class ReplayLog(Generic[E]):
+    """
+    Bounded log of the last events sent to a Channel.
+
+    Each event gets the next sequence number of the Channel and is kept
+    (e.g. serialized, with its type) for a reconnecting client to receive
+    what it missed. The log keeps at most `size` events, none older than
+    `ttl` seconds.
+    """
+
+    __slots__ = ("last_seq", "_entries", "_ttl")
+
+    def __init__(self, size: int, ttl: float, last_seq: int = 0) -> None:
+        self.last_seq = last_seq
+        # (seq, time.monotonic(), event), ordered by seq
+        self._entries: deque[tuple[int, float, E]] = deque(maxlen=size)
+        self._ttl = ttl
+
+    def next_seq(self) -> int:
+        """
+        Reserve the next sequence number.
+        """
+        self.last_seq += 1
+        return self.last_seq
+
+    def append(self, seq: int, event: E, now: float | None = None) -> None:
+        """
+        Log an event under the sequence number from next_seq().
+        """
+        if now is None:
+            now = time.monotonic()
+
+        entries = self._entries
+        if not entries or seq > entries[-1][0]:
+            entries.append((seq, now, event))
+        else:
+            # Numbered before an await (e.g. stored first), sent after a later one
+            if len(entries) == entries.maxlen:
+                entries.popleft()
+            index = bisect_right(entries, seq, key=lambda entry: entry[0])
+            entries.insert(index, (seq, now, event))
+        self._expire(now)
+
+    def _expire(self, now: float) -> None:
+        deadline = now - self._ttl
+        while self._entries and self._entries[0][1] < deadline:
+            self._entries.popleft()
+
+    def since(self, seq: int, now: float | None = None) -> list[E] | None:
+        """
+        Get the events after `seq`, oldest first.
+
+        Return None if some of them are no longer in the log, or `seq`
+        is unknown, then the client needs a snapshot instead.
+        """
+        self._expire(time.monotonic() if now is None else now)
+
+        if seq == self.last_seq:
+            return []
+        if seq > self.last_seq or seq < 0:
+            return None
+        if not self._entries or self._entries[0][0] > seq + 1:
+            return None
+
+        start = bisect_right(self._entries, seq, key=lambda entry: entry[0])
+        return [event for _, _, event in islice(self._entries, start, None)]
+
+    def dump(self, now: float | None = None) -> list[tuple[int, float, E]]:
+        """
+        Get the logged events as (seq, age in seconds, event),
+        e.g. to load them in the next process.
+        """
+        if now is None:
+            now = time.monotonic()
+        return [(seq, now - logged, event) for seq, logged, event in self._entries]
+
+    def load(
+        self, entries: list[tuple[int, float, E]], now: float | None = None
+    ) -> None:
+        """
+        Log events from dump(), keeping their age.
+        """
+        if now is None:
+            now = time.monotonic()
+        for seq, age, event in entries:
+            self.append(seq, event, now - age)
+            self.last_seq = max(self.last_seq, seq)
+
+    def __len__(self) -> int:
+        return len(self._entries)
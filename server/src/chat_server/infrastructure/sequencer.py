@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+Job = Callable[[], Awaitable[T]]
+
+
+class Sequencer:
+    """
+    Runs the jobs submitted to it one at a time, in submission order.
+
+    Every active Channel gets one, so the events of a Channel are numbered,
+    stored and sent in a deterministic order, while the jobs of different
+    Channels still run concurrently. A submitter that stops waiting
+    (e.g. its deadline passed) cancels its job, queued or running, unless
+    the job is shielded.
+
+    The inbox and the worker task only exist while there are jobs to run.
+    """
+
+    __slots__ = ("_inbox", "_worker", "_running")
+
+    def __init__(self) -> None:
+        self._inbox: deque[tuple[Job, asyncio.Future]] | None = None
+        self._worker: asyncio.Task | None = None
+        # Future of the job being run by the worker
+        self._running: asyncio.Future | None = None
+
+    def __len__(self) -> int:
+        return len(self._inbox or ())
+
+    def idle(self) -> bool:
+        """
+        Check if there are no jobs queued or running.
+        """
+        return self._worker is None and not self._inbox
+
+    async def submit(self, job: Job[T], shielded: bool = False) -> T:
+        """
+        Queue a job and wait for its result.
+
+        A shielded job can only be cancelled while it is queued. Once it
+        runs, its submitter waits for it to the end, even when cancelled
+        (the job has to bound its own awaits).
+
+        A job submitted from a running job (e.g. a leave during a kick)
+        runs right away, waiting for it would deadlock.
+        """
+        if self._worker is not None and self._worker is asyncio.current_task():
+            return await job()
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(self._on_done)
+        if self._inbox is None:
+            self._inbox = deque()
+        self._inbox.append((job, future))
+
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+        if not shielded:
+            return await future
+
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future is not self._running and not future.done():
+                # Still queued, it will be skipped
+                future.cancel()
+                raise
+        # Running (or just done), see it through
+        return await asyncio.shield(future)
+
+    def _on_done(self, future: asyncio.Future) -> None:
+        # The submitter gave up, stop its job if it is running
+        if (
+            future.cancelled()
+            and future is self._running
+            and self._worker is not None
+        ):
+            self._worker.cancel()
+
+    async def _run(self) -> None:
+        try:
+            while self._inbox:
+                job, future = self._inbox.popleft()
+                # The submitter stopped waiting, nobody wants the result
+                if future.done():
+                    continue
+                self._running = future
+                try:
+                    result = await job()
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        # Closing
+                        future.cancel()
+                        raise
+                    # Only this job was cancelled, go on with the next ones
+                    asyncio.current_task().uncancel()
+                    continue
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+                finally:
+                    self._running = None
+        finally:
+            self._worker = None
+            # Cancelled with jobs left, free their submitters
+            self._cancel_pending()
+
+    def _cancel_pending(self) -> None:
+        if self._inbox:
+            for _, future in self._inbox:
+                future.cancel()
+        self._inbox = None
+
+    def close(self) -> None:
+        """
+        Cancel the queued jobs and stop the worker.
+        """
+        self._cancel_pending()
+        if self._worker is not None and self._worker is not asyncio.current_task():
+            self._worker.cancel()
+            self._worker = None
@@ -0,0 +1,58 @@
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Holds up to `capacity` tokens, refilled at `rate` tokens per second.
+    Refill is computed lazily on access, so an idle bucket costs nothing.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def try_acquire(self, tokens: float = 1, now: float | None = None) -> bool:
+        """
+        Take `tokens` from the bucket. Return False if there are not enough.
+        """
+        self._refill(time.monotonic() if now is None else now)
+
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def retry_after(self, tokens: float = 1, now: float | None = None) -> float:
+        """
+        Seconds until `tokens` will be available.
+        """
+        self._refill(time.monotonic() if now is None else now)
+
+        missing = tokens - self.tokens
+        if missing <= 0:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return missing / self.rate
+
+    def is_full(self, now: float | None = None) -> bool:
+        """
+        Check if the bucket has refilled completely, i.e. it has been idle.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        return self.tokens >= self.capacity
+
+    def __repr__(self):
+        return f"TokenBucket(rate={self.rate}, capacity={self.capacity}, tokens={self.tokens:.2f})"
@@ -0,0 +1,63 @@
+from bisect import bisect_left, insort
+
+
+class UsernameIndex:
+    """
+    Index of the usernames of a channel's members.
+
+    Exact lookups are O(1) (dict). Prefix searches are case-insensitive and
+    O(log n + k) over a sorted list of the casefolded usernames.
+    """
+
+    __slots__ = ("_ids", "_sorted")
+
+    def __init__(self) -> None:
+        # Username -> User ID
+        self._ids: dict[str, int] = {}
+        # Sorted (casefolded username, username)
+        self._sorted: list[tuple[str, str]] = []
+
+    def add(self, username: str, user_id: int) -> None:
+        """
+        Index a username.
+        """
+        if username in self._ids:
+            self._ids[username] = user_id
+            return
+        self._ids[username] = user_id
+        insort(self._sorted, (username.casefold(), username))
+
+    def remove(self, username: str) -> None:
+        """
+        Remove a username from the index.
+        """
+        if self._ids.pop(username, None) is None:
+            return
+        key = (username.casefold(), username)
+        i = bisect_left(self._sorted, key)
+        if i < len(self._sorted) and self._sorted[i] == key:
+            del self._sorted[i]
+
+    def get(self, username: str) -> int | None:
+        """
+        User ID of a username.
+        """
+        return self._ids.get(username)
+
+    def search(self, prefix: str, limit: int) -> list[int]:
+        """
+        IDs of the first `limit` usernames (alphabetically) starting with `prefix`.
+        """
+        prefix = prefix.casefold()
+        result = []
+        i = bisect_left(self._sorted, (prefix,))
+        while i < len(self._sorted) and len(result) < limit:
+            folded, username = self._sorted[i]
+            if not folded.startswith(prefix):
+                break
+            result.append(self._ids[username])
+            i += 1
+        return result
+
+    def __len__(self) -> int:
+        return len(self._ids)
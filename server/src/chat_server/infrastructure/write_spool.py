@@ -0,0 +1,274 @@
+import asyncio
+import fcntl
+import itertools
+import logging
+import os
+from collections import deque
+from pathlib import Path
+from typing import IO
+
+from pydantic import ValidationError
+
+from chat_server.protocol.messages import ChatSend
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "spool-"
+SEGMENT_SUFFIX = ".log"
+LOCK_NAME = "lock"
+
+
+class WriteSpool:
+    """
+    Chat messages waiting to be stored, while the database is unavailable.
+
+    An append-only write-ahead log on disk: messages are appended to the
+    current segment file, a new segment is started past `segment_bytes`,
+    and a segment is deleted once all of its messages are stored.
+    Messages spooled before a restart are loaded back.
+
+    Every worker process has a spool of its own, in a numbered slot of
+    `directory` that it keeps locked (flock) until closed. A slot with
+    messages left by a process that is gone is claimed first, so that a
+    restarted worker stores them.
+
+    Appending only writes to a buffer, so it runs at memory speed. The
+    buffer is flushed, and fsynced in a thread, at most `sync_interval`
+    seconds after an append: one fsync for all the messages spooled in
+    that interval, which is also the most that a crash can lose.
+
+    The messages are kept in memory too, oldest first. At most `capacity`
+    of them: past that, messages are refused rather than kept without
+    bound.
+    """
+
+    __slots__ = (
+        "capacity",
+        "root",
+        "directory",
+        "segment_bytes",
+        "sync_interval",
+        "_entries",
+        "_segments",
+        "_segment",
+        "_file",
+        "_size",
+        "_retired",
+        "_dirty",
+        "_sync_handle",
+        "_sync_task",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        directory: str | Path,
+        capacity: int,
+        segment_bytes: int = 4 * 1024 * 1024,
+        sync_interval: float = 0.05,
+    ) -> None:
+        self.capacity = capacity
+        self.root = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.sync_interval = sync_interval
+        # (message, sender ID, segment number)
+        self._entries: deque[tuple[ChatSend, int, int]] = deque()
+        # Segment number -> messages of the segment not stored yet
+        self._segments: dict[int, int] = {}
+        # Segment being appended to
+        self._segment = 0
+        self._file: IO[bytes] | None = None
+        # Bytes written to the segment being appended to
+        self._size = 0
+        # Files of finished segments, closed after their last fsync
+        self._retired: list[IO[bytes]] = []
+        self._dirty = False
+        self._sync_handle: asyncio.TimerHandle | None = None
+        self._sync_task: asyncio.Task | None = None
+        self._lock: IO[bytes] | None = None
+
+        self.directory = self._claim()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _path(self, segment: int) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{segment:08d}{SEGMENT_SUFFIX}"
+
+    def _claim(self) -> Path:
+        """
+        Lock the first free slot, preferring the ones with messages left.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        slots = sorted(
+            (path for path in self.root.iterdir() if path.name.isdigit()),
+            key=lambda path: (
+                not any(path.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")),
+                int(path.name),
+            ),
+        )
+        new_slots = (self.root / str(n) for n in itertools.count())
+        for path in itertools.chain(slots, new_slots):
+            path.mkdir(exist_ok=True)
+            lock = (path / LOCK_NAME).open("ab")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Owned by another process
+                lock.close()
+                continue
+            self._lock = lock
+            return path
+
+    def _load(self) -> None:
+        """
+        Load the messages spooled before a restart.
+        """
+        paths = sorted(self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+        for path in paths:
+            segment = int(path.name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+            self._segment = max(self._segment, segment)
+            count = 0
+            with path.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        sender_id, data = line.split("\t", 1)
+                        message = ChatSend.model_validate_json(data)
+                        self._entries.append((message, int(sender_id), segment))
+                        count += 1
+                    except (ValueError, ValidationError):
+                        # Torn write of a crash
+                        logger.warning("Skipping a corrupt line of %s", path)
+            if count:
+                self._segments[segment] = count
+            else:
+                path.unlink()
+
+        if self._entries:
+            logger.warning("Loaded %d spooled messages", len(self._entries))
+
+    def append(self, message: ChatSend, sender_id: int) -> bool:
+        """
+        Spool a message. Return False if the spool is full.
+        """
+        if len(self._entries) >= self.capacity:
+            return False
+
+        if self._file is None or self._size >= self.segment_bytes:
+            self._rotate()
+
+        line = f"{sender_id}\t{message.model_dump_json()}\n".encode()
+        self._file.write(line)
+        self._size += len(line)
+        self._entries.append((message, sender_id, self._segment))
+        self._segments[self._segment] = self._segments.get(self._segment, 0) + 1
+
+        self._dirty = True
+        self._schedule_sync()
+        return True
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._retired.append(self._file)
+        self._segment += 1
+        self._file = self._path(self._segment).open("ab")
+        self._size = 0
+
+    def peek(self, limit: int) -> list[tuple[ChatSend, int]]:
+        """
+        Get the `limit` oldest messages, without removing them.
+        """
+        return [
+            (message, sender_id)
+            for message, sender_id, _ in (
+                self._entries[i] for i in range(min(limit, len(self._entries)))
+            )
+        ]
+
+    def discard(self, count: int) -> None:
+        """
+        Remove the `count` oldest messages, once stored. Delete the
+        segments left with no message.
+        """
+        for _ in range(min(count, len(self._entries))):
+            _, _, segment = self._entries.popleft()
+            self._segments[segment] -= 1
+            if self._segments[segment]:
+                continue
+
+            del self._segments[segment]
+            if segment == self._segment and self._file is not None:
+                # Start a new segment on the next append
+                self._retired.append(self._file)
+                self._file = None
+                self._schedule_sync()
+            self._path(segment).unlink(missing_ok=True)
+
+    def _schedule_sync(self) -> None:
+        if self._sync_handle is None and self._sync_task is None:
+            self._sync_handle = asyncio.get_running_loop().call_later(
+                self.sync_interval, self._start_sync
+            )
+
+    def _start_sync(self) -> None:
+        self._sync_handle = None
+        self._sync_task = asyncio.create_task(self.sync())
+
+    async def sync(self) -> None:
+        """
+        Write the spooled messages to disk, and fsync them.
+        """
+        try:
+            while self._dirty or self._retired:
+                files, self._retired = self._retired, []
+                if self._file is not None:
+                    files.append(self._file)
+                for f in files:
+                    f.flush()
+                self._dirty = False
+
+                await asyncio.to_thread(_fsync, [f.fileno() for f in files])
+
+                for f in files:
+                    if f is not self._file and f not in self._retired:
+                        f.close()
+        except Exception:
+            logger.exception("Failed to sync the spool")
+        finally:
+            if self._sync_task is asyncio.current_task():
+                self._sync_task = None
+
+    async def close(self) -> None:
+        """
+        Sync and close the spool files, and free the slot. Messages left
+        are loaded back on the next start.
+        """
+        if self._sync_handle is not None:
+            self._sync_handle.cancel()
+            self._sync_handle = None
+        if self._sync_task is not None:
+            await self._sync_task
+        if self._file is not None:
+            self._retired.append(self._file)
+            self._file = None
+        await self.sync()
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def last_seqs(self) -> dict[int, int]:
+        """
+        Get the last sequence number spooled for each channel.
+        """
+        last_seqs: dict[int, int] = {}
+        for message, _, _ in self._entries:
+            channel_id = message.payload.channel_id
+            if message.seq is not None and message.seq > last_seqs.get(channel_id, 0):
+                last_seqs[channel_id] = message.seq
+        return last_seqs
+
+
+def _fsync(fds: list[int]) -> None:
+    for fd in fds:
+        os.fsync(fd)
@@ -0,0 +1,78 @@
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = "{asctime}  |  {levelname}  |  {filename}::{funcName}  |  {message}"
+DATE_FORMAT = "%d-%m-%Y %H:%M"
+
+_listener: QueueListener | None = None
+
+
+def setup_logging(level: str | int = logging.INFO) -> QueueListener:
+    """
+    Configure the root logger to write through a queue.
+
+    Records are put in an in-memory queue by the event loop thread and a
+    background thread (QueueListener) does the formatting and the stdout I/O,
+    so logging never blocks the event loop.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT, style="{"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """
+    Flush the queued records and stop the background thread.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class LogSampler:
+    """
+    Sample high-volume logs (e.g. one line per message received).
+
+    `rate` is the fraction of calls let through: 0.01 logs 1 of every 100
+    calls, 1 logs everything and 0 logs nothing.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self._every = round(1 / rate) if rate > 0 else 0
+        self._count = 0
+
+    def sample(self) -> bool:
+        """
+        Returns True if this call should be logged.
+        """
+        if not self._every:
+            return False
+        self._count += 1
+        if self._count >= self._every:
+            self._count = 0
+            return True
+        return False
@@ -9,32 +9,30 @@ from chat_server.connection.manager import ConnectionManager
 from chat_server.db.db import init_db
 from chat_server.infrastructure.channel_manager import ChannelManager
 from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.log import setup_logging, stop_logging
+from chat_server.services.admission_service import AdmissionService
 from chat_server.services.authorization_service import AuthenticationService
 from chat_server.services.channel_service import ChannelService
 from chat_server.services.dashboard_service import DashboardService
+from chat_server.services.drain_service import DrainService
+from chat_server.services.eviction_service import EvictionService
+from chat_server.services.heartbeat_service import HeartbeatService
 from chat_server.services.membership_service import MembershipService
 from chat_server.services.message_broker import MessageBroker
 from chat_server.services.moderation_service import ModerationService
+from chat_server.services.spool_service import SpoolService
 from chat_server.settings import get_settings
 
 import logging
-import sys
-
-# Configure logging to work with uvicorn
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="{asctime}  |  {levelname}  |  {filename}::{funcName}  |  {message}",
-    style="{",
-    datefmt="%d-%m-%Y %H:%M",
-    handlers=[logging.StreamHandler(sys.stdout)],
-    force=True,  # Override any existing configuration
-)
+
+settings = get_settings()
+
+# Log through a queue so stdout I/O never blocks the event loop
+setup_logging(settings.LOG_LEVEL)
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
-
 # API Routes
 api_router = APIRouter(prefix="/api/v1", tags=["v1"])
 api_router.include_router(auth.router)
@@ -46,9 +44,26 @@ async def lifespan(app: FastAPI):
     logger.info("Initializing Database...")
     await init_db()
 
+    # Start warm, with the channel state of the previous process
+    await drain_service.load()
+
+    heartbeat_service.start()
+    spool_service.start()
+    eviction_service.start()
+
     yield
 
+    # Let the clients finish and reconnect elsewhere (or later), then
+    # store what is left to store. The connections are drained by
+    # ChatServer (chat_server.server) before uvicorn closes them, under
+    # the plain uvicorn CLI there are none left here
+    await drain_service.drain()
+    await heartbeat_service.stop()
+    await eviction_service.stop()
+    await spool_service.stop()
+    await drain_service.save()
     logger.info("Program Exit.")
+    stop_logging()
 
 
 # Create FastAPI app with settings
@@ -90,7 +105,9 @@ membership_service = MembershipService()
 message_broker = MessageBroker(connection_registry)
 channel_service = ChannelService(channel_manager, membership_service, message_broker)
 moderation_service = ModerationService()
-dashboard_service = DashboardService(channel_service)
+dashboard_service = DashboardService(channel_service, message_broker)
+admission_service = AdmissionService()
+spool_service = SpoolService()
 
 # Store dashboard_serivce in app.state for access in endpoints
 app.state.dashboard_service = dashboard_service
@@ -101,7 +118,12 @@ manager = ConnectionManager(
     message_broker,
     channel_service,
     moderation_service,
+    admission_service,
+    spool_service=spool_service,
 )
+heartbeat_service = HeartbeatService(manager)
+drain_service = DrainService(manager)
+eviction_service = EvictionService(manager)
 
 
 @app.websocket("/ws")
@@ -0,0 +1,37 @@
+"""
+In-process counters for operational events (drops, rejections, timeouts).
+
+Counter names are dotted, e.g. "rate_limited.user.chat_send".
+"""
+
+from collections import Counter
+
+_counters: Counter[str] = Counter()
+
+
+def incr(name: str, value: int = 1) -> None:
+    """
+    Increment a counter.
+    """
+    _counters[name] += value
+
+
+def get(name: str) -> int:
+    """
+    Get the current value of a counter.
+    """
+    return _counters[name]
+
+
+def snapshot() -> dict[str, int]:
+    """
+    Get a copy of all counters.
+    """
+    return dict(_counters)
+
+
+def reset() -> None:
+    """
+    Reset all counters.
+    """
+    _counters.clear()
@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Any
-from pydantic import UUID4, BaseModel
+from uuid import UUID
+
+from pydantic import BaseModel
 
 
 class BaseMessage(BaseModel):
@@ -10,7 +12,9 @@ class BaseMessage(BaseModel):
 
     type: Any
     timestamp: datetime | None = None
-    id: UUID4 | None = None
+    id: UUID | None = None
+    # Server-only. Sequence number of the event in its Channel
+    seq: int | None = None
     payload: Any
 
     @classmethod
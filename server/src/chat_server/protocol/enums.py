@@ -8,6 +8,9 @@ class MessageType(StrEnum):
 
     HELLO = "hello"  # First message expected after connecting to the websocket
     ERROR = "error"
+    PING = "ping"  # Heartbeat, the other side must answer with a PONG
+    PONG = "pong"
+    ANNOUNCEMENT = "announcement"  # Server-wide message from an admin
 
     CHAT_SEND = "chat_send"  # Used when a user send a normal message
     REACT_ADD = "chat_react_add"  # Use when a user reacts to a message
@@ -18,8 +21,24 @@ class MessageType(StrEnum):
     CHAT_KICK = "chat_kick"  # Kick a user from a channel
     CHAT_MUTE = "chat_mute"  # Mute a user in a channel
     CHAT_UNMUTE = "chat_unmute"  # Unmute a user in a channel
+    CHAT_SLOWMODE = "chat_slowmode"  # Set/announce the slow mode of a channel
 
     # Channel
     CHANNEL_JOIN = "channel_join"
+    CHANNEL_SUBSCRIBE = "channel_subscribe"  # join several channels at once
     CHANNEL_LEAVE = "channel_leave"  # used when a user leaves a channel
     CHANNEL_MEMBERS = "channel_members"  # used to list all the members in a channel
+    MEMBER_SEARCH = "channel_member_search"  # search members by username prefix
+    CHANNEL_RESUME = "channel_resume"  # channel resumed after a reconnect
+    CHANNEL_PRESENCE = "channel_presence"  # member count of a large channel
+    MEMBER_LIST = "channel_member_list"  # page of the members of a channel
+
+
+class ErrorCode(StrEnum):
+    """
+    Machine readable reasons of an error message.
+    """
+
+    RATE_LIMITED = "rate_limited"  # Too many messages, try again later
+    TIMEOUT = "timeout"  # The message took too long to handle, it was cancelled
+    UNAVAILABLE = "unavailable"  # Needs the database, which is unavailable
@@ -1,9 +1,11 @@
 from typing import Literal
 
-from pydantic import UUID4, BaseModel, ConfigDict
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
 
 from chat_server.protocol.basemessage import BaseMessage
-from chat_server.protocol.enums import MessageType
+from chat_server.protocol.enums import ErrorCode, MessageType
 from chat_server.protocol.registry import register_message
 
 
@@ -20,6 +22,9 @@ class UserFrom(BaseModel):
 # Error
 class ErrorMessagePayload(BaseModel):
     detail: str
+    code: ErrorCode | None = None
+    # Type of the message that caused the error
+    message_type: MessageType | None = None
 
 
 @register_message(MessageType.ERROR)
@@ -29,10 +34,31 @@ class ErrorMessage(BaseMessage):
 
 
 # Hello
+# Events a connection can ask not to receive, e.g. a bot or archiver
+# that only cares about the chat messages
+FilterableEvent = Literal[
+    MessageType.TYPING_START,
+    MessageType.REACT_ADD,
+    MessageType.REACT_REMOVE,
+    MessageType.CHANNEL_JOIN,
+    MessageType.CHANNEL_LEAVE,
+    MessageType.CHANNEL_MEMBERS,
+    MessageType.CHANNEL_PRESENCE,
+    MessageType.CHAT_KICK,
+    MessageType.CHAT_MUTE,
+    MessageType.CHAT_UNMUTE,
+    MessageType.CHAT_SLOWMODE,
+]
+
+
 class HelloPayload(BaseModel):
     model_config = {"extra": "forbid"}
     token: str | None = None
     user: UserFrom | None = None
+    # Reconnect: Channel ID -> last sequence number seen in that Channel
+    resume: dict[int, int] | None = Field(default=None, max_length=50)
+    # Events not to send to this connection
+    ignore: list[FilterableEvent] | None = Field(default=None, max_length=16)
 
 
 @register_message(MessageType.HELLO)
@@ -41,6 +67,66 @@ class Hello(BaseMessage):
     payload: HelloPayload
 
 
+# Channel Resume
+class ChannelResumePayload(BaseModel):
+    model_config = {"extra": "forbid"}
+    channel_id: int
+    last_seq: int  # Events after this one follow
+    # The missed events are no longer available, the history follows instead
+    snapshot: bool = False
+
+
+@register_message(MessageType.CHANNEL_RESUME)
+class ChannelResume(BaseMessage):
+    type: Literal[MessageType.CHANNEL_RESUME] = MessageType.CHANNEL_RESUME
+    payload: ChannelResumePayload
+
+
+# Slow Mode
+class SlowModePayload(BaseModel):
+    model_config = {"extra": "forbid"}
+    channel_id: int
+    # Seconds a User must wait between two messages, 0 turns slow mode off
+    interval: float = Field(ge=0, le=3600)
+    # Server-only. True when turned on automatically because the channel is hot
+    auto: bool = False
+
+
+@register_message(MessageType.CHAT_SLOWMODE)
+class SlowModeCommand(BaseMessage):
+    type: Literal[MessageType.CHAT_SLOWMODE] = MessageType.CHAT_SLOWMODE
+    payload: SlowModePayload
+
+
+# Announcement
+class AnnouncementPayload(BaseModel):
+    model_config = {"extra": "forbid"}
+    content: str = Field(min_length=1, max_length=2000)
+
+
+@register_message(MessageType.ANNOUNCEMENT)
+class Announcement(BaseMessage):
+    type: Literal[MessageType.ANNOUNCEMENT] = MessageType.ANNOUNCEMENT
+    payload: AnnouncementPayload
+
+
+# Heartbeat
+class HeartbeatPayload(BaseModel):
+    model_config = {"extra": "forbid"}
+
+
+@register_message(MessageType.PING)
+class Ping(BaseMessage):
+    type: Literal[MessageType.PING] = MessageType.PING
+    payload: HeartbeatPayload = HeartbeatPayload()
+
+
+@register_message(MessageType.PONG)
+class Pong(BaseMessage):
+    type: Literal[MessageType.PONG] = MessageType.PONG
+    payload: HeartbeatPayload = HeartbeatPayload()
+
+
 # Channel Join
 class ChannelJoinPayload(BaseModel):
     model_config = {"extra": "forbid"}
@@ -81,12 +167,26 @@ class ChatSend(BaseMessage):
     payload: ChatSendPayload
 
 
+# Channel Subscribe
+class ChannelSubscribePayload(BaseModel):
+    model_config = {"extra": "forbid"}
+    channel_ids: list[int] = Field(min_length=1, max_length=50)
+    # History of all the channels, in order per channel
+    history: list[ChatSend] | None = None  # Server-only
+
+
+@register_message(MessageType.CHANNEL_SUBSCRIBE)
+class ChannelSubscribe(BaseMessage):
+    type: Literal[MessageType.CHANNEL_SUBSCRIBE] = MessageType.CHANNEL_SUBSCRIBE
+    payload: ChannelSubscribePayload
+
+
 # Reacts
 class ReactPayload(BaseModel):
     model_config = {"extra": "forbid"}
     # TODO: Limit the possible values for an emote
     emote: str
-    message_id: UUID4
+    message_id: UUID
     channel_id: int
 
 
@@ -115,6 +215,53 @@ class ChannelMembers(BaseMessage):
     payload: ChannelMembersPayload
 
 
+# Channel Presence
+class ChannelPresencePayload(BaseModel):
+    model_config = {"extra": "forbid"}
+    channel_id: int
+    count: int
+    # A large channel gets no members lists nor join/leave alerts, only
+    # this count. Its members are listed on demand (MEMBER_LIST)
+    large: bool
+
+
+@register_message(MessageType.CHANNEL_PRESENCE)
+class ChannelPresence(BaseMessage):
+    type: Literal[MessageType.CHANNEL_PRESENCE] = MessageType.CHANNEL_PRESENCE
+    payload: ChannelPresencePayload
+
+
+# Member List
+class MemberListPayload(BaseModel):
+    model_config = {"extra": "forbid"}
+    channel_id: int
+    offset: int = Field(default=0, ge=0)
+    limit: int = Field(default=100, ge=1, le=200)
+    members: list[UserFrom] | None = None  # Server-only
+    total: int | None = None  # Server-only
+
+
+@register_message(MessageType.MEMBER_LIST)
+class MemberList(BaseMessage):
+    type: Literal[MessageType.MEMBER_LIST] = MessageType.MEMBER_LIST
+    payload: MemberListPayload
+
+
+# Member Search
+class MemberSearchPayload(BaseModel):
+    model_config = {"extra": "forbid"}
+    channel_id: int
+    prefix: str
+    limit: int = Field(default=10, ge=1, le=50)
+    members: list[UserFrom] | None = None  # Server-only
+
+
+@register_message(MessageType.MEMBER_SEARCH)
+class MemberSearch(BaseMessage):
+    type: Literal[MessageType.MEMBER_SEARCH] = MessageType.MEMBER_SEARCH
+    payload: MemberSearchPayload
+
+
 # Typing Start
 class TypingStartPayload(BaseModel):
     model_config = {"extra": "forbid"}
@@ -0,0 +1,74 @@
+import argparse
+import logging
+import socket
+from typing import Awaitable, Callable
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ChatServer(uvicorn.Server):
+    """
+    Uvicorn server that drains the chat before it stops.
+
+    On SIGTERM/SIGINT, uvicorn closes the WebSocket connections itself
+    (1012, no "retry after") and only then runs the lifespan shutdown, by
+    which time there is nothing left to drain. The drain (DrainService)
+    runs first instead, while the connections are still open: they are
+    flushed and closed with a "retry after", and new ones are turned away.
+    """
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        drain: Callable[[], Awaitable[int]] | None = None,
+    ) -> None:
+        super().__init__(config)
+        self._drain = drain
+
+    async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
+        if not self.force_exit:
+            drain = self._drain
+            if drain is None:
+                # Imported by uvicorn already, in the worker process
+                from chat_server.main import drain_service
+
+                drain = drain_service.drain
+            try:
+                await drain()
+            except Exception:
+                logger.exception("Drain failed")
+
+        await super().shutdown(sockets)
+
+
+def main() -> None:
+    """
+    Run the chat server, e.g. `python -m chat_server.server --workers 4`
+    """
+    parser = argparse.ArgumentParser(description="Run the chat server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    if args.workers > 1 and get_settings().DRAIN_SNAPSHOT_PATH:
+        parser.error("DRAIN_SNAPSHOT_PATH needs a single worker")
+
+    config = uvicorn.Config(
+        "chat_server.main:app", host=args.host, port=args.port, workers=args.workers
+    )
+    server = ChatServer(config)
+
+    if config.workers > 1:
+        sock = config.bind_socket()
+        Multiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
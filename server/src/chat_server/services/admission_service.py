@@ -0,0 +1,112 @@
+import logging
+import random
+
+from fastapi import WebSocket
+
+from chat_server.infrastructure.token_bucket import TokenBucket
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionService:
+    """
+    Decide whether a new connection may be served.
+
+    Smooths reconnect storms (e.g. after a deploy) before they reach
+    the database:
+        - a global cap on open connections
+        - a per-IP cap on open connections
+        - a token bucket on HELLO messages, which are the ones that
+          hit the database on authentication
+
+    A rejected connection is told when to retry, with jitter so the
+    clients do not all come back at the same instant.
+    """
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.max_connections = settings.MAX_CONNECTIONS
+        self.max_connections_per_ip = settings.MAX_CONNECTIONS_PER_IP
+        self.retry_ms = settings.ADMISSION_RETRY_MS
+        self.retry_jitter_ms = settings.ADMISSION_RETRY_JITTER_MS
+        self._hello_bucket = TokenBucket(settings.HELLO_RATE, settings.HELLO_BURST)
+
+        # Admitted (pending and active) connections
+        self._ip_by_websocket: dict[WebSocket, str] = {}
+        self._connections_by_ip: dict[str, int] = {}
+
+    @staticmethod
+    def client_ip(websocket: WebSocket) -> str:
+        """
+        Get the IP address of the client of a WebSocket.
+        """
+        client = websocket.client
+        return client.host if client else "unknown"
+
+    def _jitter(self, base_ms: float) -> int:
+        return int(base_ms + random.uniform(0, self.retry_jitter_ms))
+
+    def retry_after(self, base_ms: float) -> int:
+        """
+        Get the delay (ms) to give a client to retry after about
+        `base_ms`, with jitter.
+        """
+        return self._jitter(base_ms)
+
+    def admit(self, websocket: WebSocket) -> int | None:
+        """
+        Reserve a slot for a new connection.
+
+        Return None if admitted, otherwise the number of milliseconds
+        the client should wait before retrying.
+        """
+        if websocket in self._ip_by_websocket:
+            return None
+
+        if len(self._ip_by_websocket) >= self.max_connections:
+            logger.warning("Connection rejected: server full")
+            return self._jitter(self.retry_ms)
+
+        ip = self.client_ip(websocket)
+        count = self._connections_by_ip.get(ip, 0)
+        if count >= self.max_connections_per_ip:
+            logger.warning("Connection rejected: too many connections from %s", ip)
+            return self._jitter(self.retry_ms)
+
+        self._ip_by_websocket[websocket] = ip
+        self._connections_by_ip[ip] = count + 1
+        return None
+
+    def admit_hello(self) -> int | None:
+        """
+        Take a token for authenticating a HELLO message.
+
+        Return None if allowed, otherwise the number of milliseconds
+        the client should wait before retrying.
+        """
+        if self._hello_bucket.try_acquire():
+            return None
+
+        logger.warning("Connection rejected: HELLO rate exceeded")
+        return self._jitter(self._hello_bucket.retry_after() * 1000)
+
+    def release(self, websocket: WebSocket) -> None:
+        """
+        Free the slot of a closed connection. Safe to call more than once.
+        """
+        ip = self._ip_by_websocket.pop(websocket, None)
+        if ip is None:
+            return
+
+        count = self._connections_by_ip[ip] - 1
+        if count:
+            self._connections_by_ip[ip] = count
+        else:
+            del self._connections_by_ip[ip]
+
+    def count(self) -> int:
+        """
+        Number of admitted connections.
+        """
+        return len(self._ip_by_websocket)
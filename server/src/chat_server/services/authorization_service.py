@@ -2,7 +2,7 @@ import logging
 import jwt
 from chat_server.connection.user import User
 from chat_server.db import crud
-from chat_server.db.db import async_session
+from chat_server.db.db import DatabaseUnavailable, async_session, db_guard
 from chat_server.security.utils import ALGORITHM
 from chat_server.settings import get_settings
 
@@ -19,6 +19,8 @@ class AuthenticationService:
     async def authenticate(self, token: str | None) -> User:
         """
         Authenticate a User via JWT Token or create a guest user with a random username.
+
+        Raise DatabaseUnavailable if the database cannot be reached.
         """
         if token is None:
             # Guest User
@@ -42,12 +44,15 @@ class AuthenticationService:
                 raise AuthenticationError("Token missing 'sub'")
 
             # Verify User exists in database
-            async with async_session() as session:
-                user_db = await crud.get_user_by_id(session, user_id)
-                if not user_db:
-                    raise AuthenticationError(f"User {user_id} not found in database")
+            async with db_guard():
+                async with async_session() as session:
+                    user_db = await crud.get_user_by_id(session, user_id)
+            if not user_db:
+                raise AuthenticationError(f"User {user_id} not found in database")
 
             return User(id=user_db.id, username=user_db.username)
+        except DatabaseUnavailable:
+            raise
         except Exception as e:
             raise AuthenticationError(f"Authentication failed: {str(e)}")
 
@@ -55,7 +60,8 @@ class AuthenticationService:
         """
         Create a Guest User.
         """
-        async with async_session() as session:
-            guest = await crud.create_guest_user(session)
+        async with db_guard():
+            async with async_session() as session:
+                guest = await crud.create_guest_user(session)
         logging.info(f"Created Guest User: {repr(guest)}")
         return User(guest.username, guest.id, True)
@@ -1,9 +1,16 @@
+import asyncio
+from collections import deque
 from datetime import datetime
 import logging
-import uuid
+import time
+from typing import Awaitable, Callable, Collection, TypeVar
+from chat_server import metrics
 from chat_server.connection.channel import Channel
 from chat_server.connection.user import User
+from chat_server.ids import new_id
 from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.replay_log import ReplayLog
+from chat_server.infrastructure.sequencer import Sequencer
 from chat_server.protocol.messages import (
     BaseMessage,
     ChannelJoin,
@@ -12,10 +19,35 @@ from chat_server.protocol.messages import (
     ChannelLeavePayload,
     ChannelMembers,
     ChannelMembersPayload,
+    ChannelPresence,
+    ChannelPresencePayload,
     UserFrom,
 )
 from chat_server.services.membership_service import MembershipService
+from chat_server.protocol.enums import MessageType
 from chat_server.services.message_broker import MessageBroker
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Events not worth replaying after a reconnect: they are ephemeral,
+# or a snapshot that is sent again when (re)joining. Reactions too, they
+# are low priority (see message_broker.LOW_PRIORITY): sent after the
+# events queued before them, or dropped, they would break the order of
+# the sequence numbers
+UNSEQUENCED = {
+    MessageType.TYPING_START,
+    MessageType.REACT_ADD,
+    MessageType.REACT_REMOVE,
+    MessageType.CHANNEL_MEMBERS,
+    MessageType.CHANNEL_PRESENCE,
+}
+
+# Event kept for reconnecting clients: its type, to filter it, and the
+# event serialized
+ReplayedEvent = tuple[MessageType, str]
 
 
 class ChannelService:
@@ -34,24 +66,103 @@ class ChannelService:
         self._channelmanager = channel_manager
         self._membershipsrvc = membership_srvc
         self._broker = message_broker
+        # Channel ID -> events recently sent to the Channel
+        self._replay_logs: dict[int, ReplayLog[ReplayedEvent]] = {}
+        # Channel ID -> time.monotonic() since the Channel has no members
+        self._idle_since: dict[int, float] = {}
+        # Channel ID -> serialized recent chat messages, the history served
+        # while the database is unavailable
+        self._history: dict[int, deque[str]] = {}
+        # Channel ID -> Sequencer of the Channel, while it has work
+        self._sequencers: dict[int, Sequencer] = {}
+        # User ID -> (User, time.monotonic() it leaves its Channels), of the
+        # disconnected Users within their grace period, oldest first
+        self._pending_leaves: dict[int, tuple[User, float]] = {}
+        self._leave_task: asyncio.Task | None = None
+        # Channel ID -> IDs of the reconnecting Users whose replay of the
+        # Channel is still to come, its events are not sent to them meanwhile
+        self._resuming: dict[int, set[int]] = {}
+        # IDs of the Channels in large mode
+        self._large: set[int] = set()
+        # IDs of the large Channels whose member count changed since it
+        # was last sent
+        self._presence_dirty: set[int] = set()
+        self._presence_task: asyncio.Task | None = None
 
     def create_channel(self, channel: Channel) -> Channel:
         return self._channelmanager.add(channel)
 
+    def get_or_create_channel(self, channel_id: int) -> Channel:
+        """
+        Get a Channel by its ID, creating it on first use.
+
+        The Channel is kept from eviction for another CHANNEL_IDLE_TTL.
+        Its sequence numbers must be seeded first, see seed_seq().
+        """
+        self._idle_since.pop(channel_id, None)
+        channel = self._channelmanager.get(channel_id)
+        if channel is None:
+            channel = self.create_channel(
+                Channel(id=channel_id, name=f"Channel {channel_id}")
+            )
+        return channel
+
+    def evict_idle(self, now: float | None = None) -> list[Channel]:
+        """
+        Evict the Channels without members for CHANNEL_IDLE_TTL seconds,
+        with their replay log and history cache. Nothing is kept, their
+        sequence numbers are seeded again if they are used again.
+
+        Returns the evicted Channels.
+        """
+        if now is None:
+            now = time.monotonic()
+        ttl = get_settings().CHANNEL_IDLE_TTL
+
+        evicted = []
+        for channel in self._channelmanager.get_all():
+            if (
+                self._membershipsrvc.count_members(channel)
+                or channel.id in self._sequencers
+            ):
+                self._idle_since.pop(channel.id, None)
+                continue
+
+            idle_since = self._idle_since.setdefault(channel.id, now)
+            if now - idle_since >= ttl:
+                self._evict(channel)
+                evicted.append(channel)
+
+        if evicted:
+            logger.info("Evicted %d idle channels", len(evicted))
+        return evicted
+
+    def _evict(self, channel: Channel) -> None:
+        self._channelmanager.remove(channel.id)
+        self._idle_since.pop(channel.id, None)
+        self._history.pop(channel.id, None)
+        self._large.discard(channel.id)
+        self._presence_dirty.discard(channel.id)
+        self._replay_logs.pop(channel.id, None)
+
     async def join_channel(self, user: User, channel: Channel) -> None:
         """
         Join a User to a Channel and send an alert to the Channel.
         """
-        self._membershipsrvc.join(user, channel)
+        await self.run_in_order(channel, lambda: self._join_channel(user, channel))
+
+    async def _join_channel(self, user: User, channel: Channel) -> None:
+        if not self._membershipsrvc.join(user, channel):
+            # Still a member (e.g. reconnected within the grace period),
+            # nothing changed for the others
+            await self._broker.send_to_user(user, self._presence_for(channel))
+            return
+
+        if await self._members_changed(channel, joined=user):
+            return
 
         # Send a list with the members in the channel
-        members = self._membershipsrvc.get_channel_members(channel)
-        channel_members = ChannelMembersPayload(
-            channel_id=channel.id,
-            members=[UserFrom.model_validate(user) for user in members],
-        )
-        msg = ChannelMembers(payload=channel_members)
-        await self.send_to_channel(channel, msg)
+        await self.send_to_channel(channel, self._members_message(channel))
 
         await self._alert_user_join(user, channel)
 
@@ -60,16 +171,15 @@ class ChannelService:
         Remove a User from a Channel and send the updated members list and
         an alert to to the Channel.
         """
+        await self.run_in_order(channel, lambda: self._leave_channel(user, channel))
+
+    async def _leave_channel(self, user: User, channel: Channel) -> None:
         self._membershipsrvc.leave(user, channel)
+        if await self._members_changed(channel):
+            return
 
         # Send a list with the members in the channel
-        members = self._membershipsrvc.get_channel_members(channel)
-        channel_members = ChannelMembersPayload(
-            channel_id=channel.id,
-            members=[UserFrom.model_validate(user) for user in members],
-        )
-        members_msg = ChannelMembers(payload=channel_members)
-        await self._broker.send_to_channel(members, members_msg)
+        await self.send_to_channel(channel, self._members_message(channel))
 
         await self._alert_user_left(user, channel)
 
@@ -77,12 +187,228 @@ class ChannelService:
         """
         Remove a User from all of its joined Channels.
         """
-        channels = self._membershipsrvc.leave_all(user)
+        await self.leave_users([user])
+
+    async def leave_users(self, users: list[User]) -> None:
+        """
+        Remove Users from all of their joined Channels, with a single
+        members update per Channel.
+
+        Past PRESENCE_ALERT_LIMIT Users leaving a Channel together (e.g.
+        a network blip), they get no individual leave alert.
+        """
+        left: dict[Channel, list[User]] = {}
+        for user in users:
+            for channel in self._membershipsrvc.leave_all(user):
+                left.setdefault(channel, []).append(user)
+
+        for channel, channel_users in left.items():
+            await self.run_in_order(
+                channel, lambda: self._alert_users_left(channel, channel_users)
+            )
+
+    async def _alert_users_left(self, channel: Channel, users: list[User]) -> None:
+        if await self._members_changed(channel):
+            return
+
+        await self.send_to_channel(channel, self._members_message(channel))
+
+        if len(users) > get_settings().PRESENCE_ALERT_LIMIT:
+            metrics.incr("presence.alerts_suppressed", len(users))
+            return
+        for user in users:
+            await self._alert_user_left(user, channel)
+
+    def disconnect(self, user: User) -> None:
+        """
+        Remove a disconnected User from its Channels in DISCONNECT_GRACE
+        seconds, unless it reconnects in the meantime.
+
+        The Users whose grace period ends within PRESENCE_BATCH_WINDOW
+        seconds leave together, see leave_users().
+        """
+        if self._membershipsrvc.get_user(user.id) is None:
+            return
+
+        # Keep the pending leaves ordered by deadline
+        self._pending_leaves.pop(user.id, None)
+        self._pending_leaves[user.id] = (
+            user,
+            time.monotonic() + get_settings().DISCONNECT_GRACE,
+        )
+        if self._leave_task is None:
+            self._leave_task = asyncio.create_task(self._run_leaves())
+
+    async def reconnect(self, user: User, channel_ids: Collection[int]) -> None:
+        """
+        Keep a User that reconnected within its grace period in the
+        Channels it resumes (`channel_ids`), without a leave and a join.
+        It leaves the others.
+        """
+        if self._pending_leaves.pop(user.id, None) is None:
+            return
+
+        metrics.incr("presence.reconnected")
+        for channel in self._membershipsrvc.get_user_channels(user):
+            if channel.id not in channel_ids:
+                await self.leave_channel(user, channel)
+
+    def hold(self, user: User, channel_ids: Collection[int]) -> None:
+        """
+        Stop sending the numbered events of Channels to a reconnecting
+        User until release(), so its new connection does not get them
+        live and then again in its replay.
+        """
+        for channel_id in channel_ids:
+            self._resuming.setdefault(channel_id, set()).add(user.id)
+
+    def release(self, user: User, channel_id: int) -> None:
+        """
+        Send the events of a Channel held by hold() to the User again.
+        """
+        resuming = self._resuming.get(channel_id)
+        if resuming is not None:
+            resuming.discard(user.id)
+            if not resuming:
+                del self._resuming[channel_id]
+
+    async def _run_leaves(self) -> None:
+        window = get_settings().PRESENCE_BATCH_WINDOW
+        try:
+            while self._pending_leaves:
+                _, deadline = next(iter(self._pending_leaves.values()))
+                await asyncio.sleep(max(0.0, deadline - time.monotonic()) + window)
+
+                now = time.monotonic()
+                users = []
+                for user_id, (user, deadline) in list(self._pending_leaves.items()):
+                    if deadline > now:
+                        break
+                    del self._pending_leaves[user_id]
+                    users.append(user)
+
+                try:
+                    await self.leave_users(users)
+                except Exception:
+                    logger.exception("Failed to remove disconnected users")
+        finally:
+            self._leave_task = None
+
+    def is_large(self, channel: Channel) -> bool:
+        """
+        Check if a Channel is in large mode: its members are only counted.
+        """
+        return channel.id in self._large
+
+    def count_members(self, channel: Channel) -> int:
+        """
+        Get the number of members of a Channel.
+        """
+        return self._membershipsrvc.count_members(channel)
+
+    def get_members_page(
+        self, channel: Channel, offset: int, limit: int
+    ) -> list[User]:
+        """
+        Get a page of the members of a Channel, in a stable order.
+        """
+        return self._membershipsrvc.get_channel_members_page(channel, offset, limit)
+
+    async def _members_changed(
+        self, channel: Channel, joined: User | None = None
+    ) -> bool:
+        """
+        Switch the mode of a Channel whose members changed, if they
+        crossed a threshold, and announce the switch.
 
-        for channel in channels:
-            await self.leave_channel(user, channel)
+        Return True if the members change needs nothing else sent: it was
+        announced, or the Channel is large and its members are only
+        counted (in LARGE_CHANNEL_PRESENCE_INTERVAL).
+        """
+        if self._switch_mode(channel):
+            await self.send_to_channel(channel, self._presence_message(channel))
+            if channel.id not in self._large:
+                await self.send_to_channel(channel, self._members_message(channel))
+            return True
+
+        if channel.id not in self._large:
+            return False
+
+        if joined is not None:
+            # The others get the count later, the new member needs it now
+            await self._broker.send_to_user(joined, self._presence_message(channel))
+        self._presence_dirty.add(channel.id)
+        if self._presence_task is None:
+            self._presence_task = asyncio.create_task(self._run_presence())
+        return True
+
+    def _switch_mode(self, channel: Channel) -> bool:
+        settings = get_settings()
+        count = self._membershipsrvc.count_members(channel)
+
+        # Hysteresis, so a channel around the threshold does not flap
+        if channel.id in self._large:
+            if count >= settings.LARGE_CHANNEL_EXIT_MEMBERS:
+                return False
+            self._large.discard(channel.id)
+            self._presence_dirty.discard(channel.id)
+            metrics.incr("channel.large.exited")
+        else:
+            if count < settings.LARGE_CHANNEL_MEMBERS:
+                return False
+            self._large.add(channel.id)
+            metrics.incr("channel.large.entered")
+
+        logger.info(
+            "%r switched to %s mode (%d members)",
+            channel,
+            "large" if channel.id in self._large else "normal",
+            count,
+        )
+        return True
+
+    async def _run_presence(self) -> None:
+        interval = get_settings().LARGE_CHANNEL_PRESENCE_INTERVAL
+        try:
+            while self._presence_dirty:
+                await asyncio.sleep(interval)
+
+                dirty, self._presence_dirty = self._presence_dirty, set()
+                for channel_id in dirty:
+                    channel = self._channelmanager.get(channel_id)
+                    if channel is not None and channel_id in self._large:
+                        await self.send_to_channel(
+                            channel, self._presence_message(channel)
+                        )
+        finally:
+            self._presence_task = None
 
-    def get_channel_members(self, channel: Channel) -> set[User]:
+    def _presence_message(self, channel: Channel) -> ChannelPresence:
+        payload = ChannelPresencePayload(
+            channel_id=channel.id,
+            count=self._membershipsrvc.count_members(channel),
+            large=channel.id in self._large,
+        )
+        return ChannelPresence(payload=payload)
+
+    def _presence_for(self, channel: Channel) -> BaseMessage:
+        """
+        What a member needs to know of the members of a Channel: the
+        count of a large Channel, the members list otherwise.
+        """
+        if channel.id in self._large:
+            return self._presence_message(channel)
+        return self._members_message(channel)
+
+    def _members_message(self, channel: Channel) -> ChannelMembers:
+        members = self._membershipsrvc.get_channel_members(channel)
+        payload = ChannelMembersPayload(
+            channel_id=channel.id,
+            members=[UserFrom.model_validate(user) for user in members],
+        )
+        return ChannelMembers(payload=payload)
+
+    def get_channel_members(self, channel: Channel) -> list[User]:
         """
         Get all members of a Channel.
         """
@@ -106,25 +432,187 @@ class ChannelService:
         """
         channel = self.get_channel_by_id(channel_id)
         if channel:
-            # PERF: O(n) search
-            for user in self._membershipsrvc.get_channel_members(channel):
-                if user.username == username:
-                    return user
+            return self._membershipsrvc.find_member(channel, username)
         return None
 
+    def search_members(self, channel: Channel, prefix: str, limit: int) -> list[User]:
+        """
+        Find the Users of a channel whose username starts with `prefix`.
+        """
+        return self._membershipsrvc.search_members(channel, prefix, limit)
+
+    def rename_member(self, user_id: int, username: str) -> None:
+        """
+        Update the username of a User in all of its Channels.
+        """
+        self._membershipsrvc.rename(user_id, username)
+
     def is_member(self, user: User, channel: Channel) -> bool:
         """
         Check if User is member of a Channel.
         """
         return self._membershipsrvc.is_member(user, channel)
 
+    async def run_in_order(
+        self, channel: Channel, job: Callable[[], Awaitable[T]], shielded: bool = False
+    ) -> T:
+        """
+        Run a job in the Sequencer of a Channel, after the jobs submitted
+        before it to the same Channel, and return its result.
+
+        Jobs of different Channels run concurrently. A shielded job is not
+        cancelled once it runs, see Sequencer.submit().
+        """
+        sequencer = self._sequencers.get(channel.id)
+        if sequencer is None:
+            sequencer = Sequencer()
+            self._sequencers[channel.id] = sequencer
+        try:
+            return await sequencer.submit(job, shielded)
+        finally:
+            if sequencer.idle() and self._sequencers.get(channel.id) is sequencer:
+                del self._sequencers[channel.id]
+
     async def send_to_channel(self, channel: Channel, message: BaseMessage) -> None:
         """
         Send a message to all members of a Channel.
         """
 
-        members = self._membershipsrvc.get_channel_members(channel)
-        await self._broker.send_to_channel(members, message)
+        members = self._membershipsrvc.get_channel_member_ids(channel)
+
+        if message.type in UNSEQUENCED:
+            await self._broker.send_to_channel(members, message)
+            return
+
+        # Number the event, unless done already, and keep it for
+        # reconnecting clients
+        log = self._replay_log(channel)
+        if message.seq is None:
+            message.seq = log.next_seq()
+        data = message.model_dump_json()
+        log.append(message.seq, (message.type, data))
+
+        if message.type is MessageType.CHAT_SEND:
+            history = self._history.get(channel.id)
+            if history is not None:
+                history.append(data)
+
+        resuming = self._resuming.get(channel.id)
+        if resuming:
+            # Their replay, still to come, includes this event
+            members = [user_id for user_id in members if user_id not in resuming]
+
+        await self._broker.send_to_channel(members, message, data)
+
+    def _replay_log(self, channel: Channel) -> ReplayLog[ReplayedEvent]:
+        log = self._replay_logs.get(channel.id)
+        if log is None:
+            settings = get_settings()
+            log = ReplayLog(settings.REPLAY_LOG_SIZE, settings.REPLAY_LOG_TTL)
+            self._replay_logs[channel.id] = log
+        return log
+
+    def cache_history(self, channel: Channel, history: list[str]) -> None:
+        """
+        Keep the most recent serialized chat messages of a Channel, read
+        from the database. From then on, messages sent to the Channel
+        are added to them.
+        """
+        if channel.id not in self._history:
+            self._history[channel.id] = deque(
+                history, maxlen=get_settings().HISTORY_CACHE_SIZE
+            )
+
+    def cached_history(self, channel: Channel) -> list[str]:
+        """
+        Get the recent serialized chat messages kept for a Channel.
+        """
+        return list(self._history.get(channel.id, ()))
+
+    def next_seq(self, channel: Channel) -> int:
+        """
+        Reserve the next sequence number of a Channel, for an event that
+        must be numbered before it is sent (e.g. to be stored).
+        """
+        return self._replay_log(channel).next_seq()
+
+    def is_seeded(self, channel_id: int) -> bool:
+        """
+        Check if the sequence numbers of a Channel are known, see seed_seq().
+        """
+        return channel_id in self._replay_logs
+
+    def seed_seq(self, channel_id: int, last_seq: int) -> None:
+        """
+        Continue the sequence numbers of a Channel where they were left
+        (e.g. the last one stored), so they keep increasing across
+        evictions and restarts.
+
+        A Channel already numbered is left as it is.
+        """
+        if channel_id not in self._replay_logs:
+            settings = get_settings()
+            self._replay_logs[channel_id] = ReplayLog(
+                settings.REPLAY_LOG_SIZE, settings.REPLAY_LOG_TTL, last_seq
+            )
+
+    def snapshot(self) -> list[dict]:
+        """
+        Get the in-memory state of the Channels (recent events and
+        history), to restore in the next process.
+        """
+        channels = []
+        for channel in self._channelmanager.get_all():
+            log = self._replay_logs.get(channel.id)
+            history = self._history.get(channel.id)
+            channels.append(
+                {
+                    "id": channel.id,
+                    "name": channel.name,
+                    "last_seq": log.last_seq if log else 0,
+                    "events": log.dump() if log else [],
+                    "history": list(history) if history is not None else None,
+                }
+            )
+        return channels
+
+    def restore(self, channels: list[dict]) -> None:
+        """
+        Restore the Channels of a snapshot(), after seed_seq().
+
+        The events and history of a Channel that moved on since the
+        snapshot was taken (e.g. an older snapshot) are not restored,
+        they would have gaps.
+        """
+        for state in channels:
+            channel = self._channelmanager.get(state["id"])
+            if channel is None:
+                channel = self.create_channel(
+                    Channel(id=state["id"], name=state["name"])
+                )
+
+            log = self._replay_log(channel)
+            if state["last_seq"] < log.last_seq:
+                logger.warning("Not restoring %r, the snapshot is stale", channel)
+                continue
+
+            log.load(
+                [
+                    (seq, age, (MessageType(message_type), data))
+                    for seq, age, (message_type, data) in state["events"]
+                ]
+            )
+            log.last_seq = state["last_seq"]
+            if state["history"] is not None:
+                self.cache_history(channel, state["history"])
+
+    def replay(self, channel: Channel, last_seq: int) -> list[ReplayedEvent] | None:
+        """
+        Get the events sent to a Channel after `last_seq`, with their type.
+
+        Return None if they are no longer available.
+        """
+        return self._replay_log(channel).since(last_seq)
 
     async def _alert_user_join(self, user: User, channel: Channel) -> None:
         """
@@ -133,9 +621,9 @@ class ChannelService:
         payload = ChannelJoinPayload(
             channel_id=channel.id, user=UserFrom.model_validate(user)
         )
-        msg = ChannelJoin(timestamp=datetime.now(), id=uuid.uuid4(), payload=payload)
+        msg = ChannelJoin(timestamp=datetime.now(), id=new_id(), payload=payload)
 
-        logging.info(f"User Join Alert: {repr(user)} has joined {repr(channel)}")
+        logger.debug("User Join Alert: %r has joined %r", user, channel)
 
         await self.send_to_channel(channel, msg)
 
@@ -146,8 +634,8 @@ class ChannelService:
         payload = ChannelLeavePayload(
             channel_id=channel.id, user=UserFrom.model_validate(user)
         )
-        msg = ChannelLeave(timestamp=datetime.now(), id=uuid.uuid4(), payload=payload)
+        msg = ChannelLeave(timestamp=datetime.now(), id=new_id(), payload=payload)
 
-        logging.info(f"User Left Alert: {repr(user)} has left {repr(channel)}")
+        logger.debug("User Left Alert: %r has left %r", user, channel)
 
         await self.send_to_channel(channel, msg)
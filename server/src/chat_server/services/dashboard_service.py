@@ -1,7 +1,9 @@
 from chat_server.connection.channel import Channel
 from chat_server.connection.user import User
 from chat_server.exceptions import ChannelDoesntExist
+from chat_server.protocol.messages import Announcement, AnnouncementPayload
 from chat_server.services.channel_service import ChannelService
+from chat_server.services.message_broker import BroadcastResult, MessageBroker
 
 
 class DashboardService:
@@ -12,8 +14,9 @@ class DashboardService:
     in the WebSocket chat application.
     """
 
-    def __init__(self, channelsrvc: ChannelService) -> None:
+    def __init__(self, channelsrvc: ChannelService, broker: MessageBroker) -> None:
         self._channelsrvc = channelsrvc
+        self._broker = broker
 
     def get_active_channels(self) -> list[Channel]:
         """
@@ -21,12 +24,25 @@ class DashboardService:
         """
         return self._channelsrvc.get_channels_in_use()
 
-    def get_channel_members(self, ch_id: int) -> set[User]:
+    def get_channel_members(self, ch_id: int) -> list[User]:
         ch = self._channelsrvc.get_channel_by_id(ch_id)
         if not ch:
             raise ChannelDoesntExist()
         return self._channelsrvc.get_channel_members(ch)
 
+    def rename_user(self, user_id: int, username: str) -> None:
+        """
+        Propagate a username change to the online state.
+        """
+        self._channelsrvc.rename_member(user_id, username)
+
+    async def announce(self, content: str) -> BroadcastResult:
+        """
+        Send an announcement to every connected User.
+        """
+        msg = Announcement(payload=AnnouncementPayload(content=content))
+        return await self._broker.send_broadcast(msg)
+
     def get_active_connections(self) -> int:
         """
         Get the number of active connections (WebSocket).
@@ -0,0 +1,210 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+from pathlib import Path
+from typing import IO
+
+from fastapi import status
+
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.db.db import DatabaseUnavailable
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class DrainService:
+    """
+    Shuts the server down without dropping work on the floor.
+
+    Draining:
+        - new connections are turned away
+        - what was received is handled, and what is queued is sent,
+          for at most DRAIN_TIMEOUT seconds
+        - connections are closed with 1012 (Service Restart) and a
+          "retry after" reason, spread over DRAIN_RECONNECT_SPREAD_MS
+          so the clients do not all come back at the same instant
+
+    The pending database writes are flushed by the SpoolService, stopped
+    after the drain.
+
+    If DRAIN_SNAPSHOT_PATH is set, the in-memory Channel state is saved
+    there, and restored on the next start: reconnecting clients resume
+    from the replay logs instead of reloading the history.
+
+    The snapshot is for a single worker process: the Channels of several
+    workers are numbered apart, and a client may reconnect to any of
+    them. The first process to start locks the snapshot (flock), the
+    others neither restore nor save one.
+    """
+
+    def __init__(self, manager: ConnectionManager) -> None:
+        settings = get_settings()
+        self._manager = manager
+        self.timeout = settings.DRAIN_TIMEOUT
+        self.batch_size = settings.HEARTBEAT_BATCH_SIZE
+        self.send_timeout = settings.HEARTBEAT_SEND_TIMEOUT
+        self.snapshot_path = settings.DRAIN_SNAPSHOT_PATH
+        self._lock: IO[bytes] | None = None
+
+    async def drain(self) -> int:
+        """
+        Stop accepting connections, flush and close the open ones.
+
+        Returns the number of connections closed.
+        """
+        self._manager.draining = True
+        contexts = self._manager.connections.get_all()
+        if not contexts:
+            return 0
+
+        logger.info("Draining %d connections", len(contexts))
+
+        # All the connections flush at once, within the same deadline
+        flushes = {asyncio.create_task(self._flush(ctx)): ctx for ctx in contexts}
+        _, pending = await asyncio.wait(flushes, timeout=self.timeout)
+        for task in pending:
+            task.cancel()
+            # Drop the rest, rather than wait for it again on disconnect
+            flushes[task].inbox.close()
+        if pending:
+            logger.warning("%d connections not flushed in time", len(pending))
+
+        for i in range(0, len(contexts), self.batch_size):
+            batch = contexts[i : i + self.batch_size]
+            await asyncio.gather(*(self._close(ctx) for ctx in batch))
+
+        logger.info("Drained %d connections", len(contexts))
+        return len(contexts)
+
+    async def _flush(self, ctx: ConnectionContext) -> None:
+        await ctx.inbox.flush()
+        await ctx.outbox.flush()
+
+    async def _close(self, ctx: ConnectionContext) -> None:
+        retry_ms = self._manager.restart_delay()
+        try:
+            await asyncio.wait_for(
+                ctx.websocket.close(
+                    code=status.WS_1012_SERVICE_RESTART,
+                    reason=f"Retry after {retry_ms} ms",
+                ),
+                self.send_timeout,
+            )
+        except Exception as e:
+            # The connection is most likely already broken
+            logger.debug("Failed to close %r: %s", ctx, e)
+
+        await self._manager.handle_disconnect(ctx.websocket)
+
+    def snapshot(self) -> dict:
+        """
+        Get the in-memory state to restore in the next process.
+        """
+        return {
+            "channels": self._manager.channel_srvc.snapshot(),
+            "slowmode": self._manager.slowmode.snapshot(),
+        }
+
+    def restore(self, snapshot: dict) -> None:
+        """
+        Restore a snapshot(), after the sequence numbers are seeded.
+        """
+        self._manager.channel_srvc.restore(snapshot["channels"])
+        # JSON object keys are strings
+        intervals = snapshot["slowmode"]
+        self._manager.slowmode.restore(
+            {int(channel_id): interval for channel_id, interval in intervals.items()}
+        )
+
+    def _claim(self) -> bool:
+        """
+        Lock the snapshot for this process, unless another one has it.
+        """
+        if self._lock is not None:
+            return True
+
+        lock = Path(self.snapshot_path + ".lock").open("ab")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            logger.warning(
+                "The snapshot is used by another process, not using it. "
+                "DRAIN_SNAPSHOT_PATH needs a single worker"
+            )
+            return False
+        self._lock = lock
+        return True
+
+    def _release(self) -> None:
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    async def save(self) -> None:
+        """
+        Save a snapshot() to DRAIN_SNAPSHOT_PATH, if set and locked by
+        this process.
+        """
+        if not self.snapshot_path or not self._claim():
+            return
+
+        data = json.dumps(self.snapshot())
+        try:
+            await asyncio.to_thread(_write_atomic, Path(self.snapshot_path), data)
+        except OSError as e:
+            logger.error("Failed to save the snapshot: %s", e)
+            return
+        finally:
+            self._release()
+        logger.info("Saved the snapshot to %s", self.snapshot_path)
+
+    async def load(self) -> None:
+        """
+        Restore the snapshot saved in DRAIN_SNAPSHOT_PATH, if any, and
+        keep it locked until save().
+
+        The snapshot is deleted once read, it only describes the moment
+        the previous process stopped. Its Channels are seeded first, to
+        tell if they moved on since.
+        """
+        if not self.snapshot_path or not self._claim():
+            return
+
+        path = Path(self.snapshot_path)
+        try:
+            data = await asyncio.to_thread(path.read_text, encoding="utf-8")
+            path.unlink()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.error("Failed to read the snapshot: %s", e)
+            return
+
+        try:
+            snapshot = json.loads(data)
+            await self._manager.seed_seqs(
+                [state["id"] for state in snapshot["channels"]]
+            )
+            self.restore(snapshot)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error("Ignoring a corrupt snapshot: %s", e)
+            return
+        except DatabaseUnavailable as e:
+            logger.error("Not restoring the snapshot, database unavailable: %s", e)
+            return
+        logger.info("Restored the snapshot from %s", self.snapshot_path)
+
+
+def _write_atomic(path: Path, data: str) -> None:
+    # Write aside and rename, a crash never leaves half a snapshot
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
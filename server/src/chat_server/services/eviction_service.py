@@ -0,0 +1,63 @@
+import asyncio
+import logging
+
+from chat_server.connection.manager import ConnectionManager
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class EvictionService:
+    """
+    Frees the memory of the Channels nobody uses.
+
+    Every CHANNEL_SWEEP_INTERVAL seconds, the Channels without members
+    for CHANNEL_IDLE_TTL seconds are evicted, with everything kept for
+    them: replay log, history cache, slow mode and mutes. They are created
+    again on the next join.
+    """
+
+    def __init__(self, manager: ConnectionManager) -> None:
+        self._manager = manager
+        self.interval = get_settings().CHANNEL_SWEEP_INTERVAL
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """
+        Start the eviction loop in the background.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="eviction")
+
+    async def stop(self) -> None:
+        """
+        Stop the eviction loop.
+        """
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Channel eviction sweep failed")
+
+    def sweep(self, now: float | None = None) -> int:
+        """
+        Evict the idle Channels.
+
+        Returns the number of Channels evicted.
+        """
+        evicted = self._manager.channel_srvc.evict_idle(now)
+        self._manager.slowmode.forget(evicted)
+        self._manager.moderation.forget(evicted)
+        return len(evicted)
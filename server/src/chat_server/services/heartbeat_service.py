@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+
+from fastapi import status
+
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.protocol.messages import Ping
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatService:
+    """
+    Keeps connections alive and reaps the dead ones.
+
+    Every HEARTBEAT_INTERVAL seconds, connections that have been silent
+    for HEARTBEAT_INTERVAL get a PING, and connections silent for
+    IDLE_TIMEOUT are closed and cleaned up. Work is done in batches of
+    HEARTBEAT_BATCH_SIZE so a large sweep never starves the event loop.
+    """
+
+    def __init__(self, manager: ConnectionManager) -> None:
+        settings = get_settings()
+        self._manager = manager
+        self.interval = settings.HEARTBEAT_INTERVAL
+        self.idle_timeout = settings.IDLE_TIMEOUT
+        self.batch_size = settings.HEARTBEAT_BATCH_SIZE
+        self.send_timeout = settings.HEARTBEAT_SEND_TIMEOUT
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """
+        Start the heartbeat loop in the background.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="heartbeat")
+
+    async def stop(self) -> None:
+        """
+        Stop the heartbeat loop.
+        """
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Heartbeat sweep failed")
+
+    async def sweep(self, now: float | None = None) -> tuple[int, int]:
+        """
+        Ping idle connections and reap the dead ones.
+
+        Returns the number of connections (pinged, reaped).
+        """
+        if now is None:
+            now = time.monotonic()
+
+        to_ping: list[ConnectionContext] = []
+        to_reap: list[ConnectionContext] = []
+
+        for ctx in self._manager.connections.get_all():
+            idle = now - ctx.last_seen
+            if idle >= self.idle_timeout:
+                to_reap.append(ctx)
+            elif idle >= self.interval:
+                to_ping.append(ctx)
+
+        # Serialize once, the PING is the same for everyone
+        ping = Ping().model_dump_json()
+
+        for batch in self._batches(to_ping):
+            await asyncio.gather(*(self._ping(ctx, ping) for ctx in batch))
+
+        for batch in self._batches(to_reap):
+            await asyncio.gather(*(self._reap(ctx) for ctx in batch))
+
+        if to_reap:
+            logger.info("Reaped %d idle connections", len(to_reap))
+
+        return len(to_ping), len(to_reap)
+
+    def _batches(self, contexts: list[ConnectionContext]):
+        for i in range(0, len(contexts), self.batch_size):
+            yield contexts[i : i + self.batch_size]
+
+    async def _ping(self, ctx: ConnectionContext, ping: str) -> None:
+        try:
+            await asyncio.wait_for(
+                self._manager.broker.send_text_to_websocket(ctx.websocket, ping),
+                self.send_timeout,
+            )
+        except asyncio.TimeoutError:
+            # A full send buffer means the peer is not reading, treat as dead
+            logger.debug("PING to %r timed out", ctx)
+            ctx.last_seen = float("-inf")
+
+    async def _reap(self, ctx: ConnectionContext) -> None:
+        logger.debug("Reaping idle connection %r", ctx)
+        try:
+            await asyncio.wait_for(
+                ctx.websocket.close(
+                    code=status.WS_1001_GOING_AWAY, reason="Idle timeout"
+                ),
+                self.send_timeout,
+            )
+        except Exception as e:
+            # The connection is most likely already broken
+            logger.debug("Failed to close %r: %s", ctx, e)
+
+        await self._manager.handle_disconnect(ctx.websocket)
@@ -1,6 +1,12 @@
 import logging
+from array import array
+
 from chat_server.connection.channel import Channel
 from chat_server.connection.user import User
+from chat_server.infrastructure.member_set import MemberSet
+from chat_server.infrastructure.username_index import UsernameIndex
+
+logger = logging.getLogger(__name__)
 
 
 class MembershipService:
@@ -11,64 +17,120 @@ class MembershipService:
     """
 
     def __init__(self) -> None:
-        self._channel_members: dict[Channel, set[User]] = {}
-        self._user_channels: dict[User, set[Channel]] = {}
-
-    def join(self, user: User, channel: Channel) -> None:
+        # Channel ID -> Channel, for every Channel with at least 1 member
+        self._channels: dict[int, Channel] = {}
+        # Channel ID -> IDs of its members
+        self._channel_members: dict[int, MemberSet] = {}
+        # Channel ID -> usernames of its members
+        self._channel_usernames: dict[int, UsernameIndex] = {}
+        # User ID -> Channels
+        self._user_channels: dict[int, set[Channel]] = {}
+        # User ID -> User, for every User in at least 1 Channel
+        self._users: dict[int, User] = {}
+
+    def join(self, user: User, channel: Channel) -> bool:
         """
         Join a User to a Channel.
+
+        Return False if the User was already a member.
         """
-        logging.info(f"{repr(user)} is joining {repr(channel)}")
+        logger.debug("%r is joining %r", user, channel)
+
+        members = self._channel_members.get(channel.id)
+        if members is None:
+            members = self._channel_members[channel.id] = MemberSet()
+            self._channel_usernames[channel.id] = UsernameIndex()
+            self._channels[channel.id] = channel
+        if not members.add(user.id):
+            return False
+        self._channel_usernames[channel.id].add(user.username, user.id)
+
+        channels = self._user_channels.get(user.id)
+        if channels is None:
+            channels = self._user_channels[user.id] = set()
+            self._users[user.id] = user
+        channels.add(channel)
+        return True
 
-        if channel not in self._channel_members:
-            self._channel_members[channel] = set()
-        self._channel_members[channel].add(user)
+    def leave(self, user: User, channel: Channel) -> None:
+        """
+        Remove a User from a Channel.
+        """
+        logger.debug("%r is leaving %r", user, channel)
 
-        if user not in self._user_channels:
-            self._user_channels[user] = set()
-        self._user_channels[user].add(channel)
+        self._discard_member(user, channel)
 
-        logging.debug(f"Join: {self._channel_members = }")
-        logging.debug(f"Join: {self._user_channels = }")
+        channels = self._user_channels.get(user.id)
+        if channels is not None:
+            channels.discard(channel)
+            if not channels:
+                del self._user_channels[user.id]
+                del self._users[user.id]
 
-    def leave(self, user: User, channel: Channel) -> None:
+    def get_channel_member_ids(self, channel: Channel) -> array:
         """
-        Remove a User from a Channel.
+        Sorted IDs of the members of a Channel.
+
+        This is a snapshot that is not copied, it must not be modified.
         """
-        logging.info(f"{repr(user)} is leaving {repr(channel)}")
+        members = self._channel_members.get(channel.id)
+        return members.snapshot() if members else array("q")
 
-        if channel in self._channel_members:
-            self._channel_members[channel].discard(user)
+    def get_channel_member_set(self, channel: Channel) -> MemberSet:
+        """
+        Members of a Channel, for set operations with other Channels.
+        """
+        return self._channel_members.get(channel.id) or MemberSet()
 
-        if user in self._user_channels:
-            self._user_channels[user].discard(channel)
+    def count_members(self, channel: Channel) -> int:
+        """
+        Get the number of members of a Channel.
+        """
+        members = self._channel_members.get(channel.id)
+        return len(members) if members else 0
 
-        logging.debug(f"Leave: {self._channel_members = }")
-        logging.debug(f"Leave: {self._user_channels = }")
+    def get_channel_members_page(
+        self, channel: Channel, offset: int, limit: int
+    ) -> list[User]:
+        """
+        Get a page of the Users members of a Channel, ordered by ID.
+        """
+        users = self._users
+        ids = self.get_channel_member_ids(channel)[offset : offset + limit]
+        return [users[user_id] for user_id in ids]
 
-    def get_channel_members(self, channel: Channel) -> set[User]:
+    def get_channel_members(self, channel: Channel) -> list[User]:
         """
         Get all Users members of a Channel.
         """
-        return self._channel_members.get(channel, set()).copy()
+        users = self._users
+        return [users[user_id] for user_id in self.get_channel_member_ids(channel)]
+
+    def get_user(self, user_id: int) -> User | None:
+        """
+        Get a User that is member of at least one Channel.
+        """
+        return self._users.get(user_id)
 
     def get_user_channels(self, user: User) -> set[Channel]:
         """
         Get all Channels a User is connected to.
         """
-        return self._user_channels.get(user, set()).copy()
+        channels = self._user_channels.get(user.id)
+        return channels.copy() if channels else set()
 
     def get_channels_in_use(self) -> list[Channel]:
         """
         Returns a list with all the Channels in use (at least 1 user online)
         """
-        return [ch for ch, users in self._channel_members.items() if users]
+        return list(self._channels.values())
 
     def is_member(self, user: User, channel: Channel) -> bool:
         """
         Check if User is member of a Channel.
         """
-        return channel in self._user_channels.get(user, set())
+        channels = self._user_channels.get(user.id)
+        return channels is not None and channel in channels
 
     def leave_all(self, user: User) -> set[Channel]:
         """
@@ -76,8 +138,56 @@ class MembershipService:
 
         Returns all Channels the User was disconnected from.
         """
-        channels = self.get_user_channels(user)
+        channels = self._user_channels.pop(user.id, None)
+        if not channels:
+            return set()
+        del self._users[user.id]
 
         for channel in channels:
-            self.leave(user, channel)
+            self._discard_member(user, channel)
         return channels
+
+    def _discard_member(self, user: User, channel: Channel) -> None:
+        members = self._channel_members.get(channel.id)
+        if members is None or not members.discard(user.id):
+            return
+        self._channel_usernames[channel.id].remove(user.username)
+
+        # The last member left, free the Channel
+        if not members:
+            del self._channel_members[channel.id]
+            del self._channel_usernames[channel.id]
+            del self._channels[channel.id]
+
+    def rename(self, user_id: int, username: str) -> None:
+        """
+        Change the username of a User in every Channel it is in.
+        """
+        user = self._users.get(user_id)
+        if user is None or user.username == username:
+            return
+
+        for channel in self._user_channels[user_id]:
+            index = self._channel_usernames[channel.id]
+            index.remove(user.username)
+            index.add(username, user_id)
+        user.username = username
+
+    def find_member(self, channel: Channel, username: str) -> User | None:
+        """
+        Find a member of a Channel by username.
+        """
+        index = self._channel_usernames.get(channel.id)
+        if index is None:
+            return None
+        user_id = index.get(username)
+        return self._users.get(user_id) if user_id is not None else None
+
+    def search_members(self, channel: Channel, prefix: str, limit: int) -> list[User]:
+        """
+        Members of a Channel whose username starts with `prefix` (case-insensitive).
+        """
+        index = self._channel_usernames.get(channel.id)
+        if index is None:
+            return []
+        return [self._users[user_id] for user_id in index.search(prefix, limit)]
@@ -1,11 +1,52 @@
+import asyncio
 import logging
+import time
+from dataclasses import dataclass
+from typing import Iterable, Sized
+
 from fastapi import WebSocket
+from chat_server import metrics
+from chat_server.connection.context import ConnectionContext
 from chat_server.connection.user import User
 from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.infrastructure.outbox import Outbox, Priority
 from chat_server.protocol.basemessage import BaseMessage
+from chat_server.protocol.enums import MessageType
+from chat_server.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Messages that can be coalesced or dropped under pressure. Anything else
+# (chat messages, moderation, membership) must arrive.
+LOW_PRIORITY = {
+    MessageType.TYPING_START,
+    MessageType.REACT_ADD,
+    MessageType.REACT_REMOVE,
+}
+
+
+def coalesce_key(message: BaseMessage):
+    """
+    Key under which a queued message is replaced by a newer one, if any.
+    """
+    if message.type is MessageType.TYPING_START:
+        # Only the latest typing indicator of a User matters
+        user = message.payload.user
+        return (message.type, message.payload.channel_id, user and user.username)
+    return None
+
+
+@dataclass(frozen=True)
+class BroadcastResult:
+    """
+    Outcome of a broadcast: connections it was queued for, out of the
+    connections open when it started, and how long (s) it took.
+    """
+
+    recipients: int
+    connections: int
+    duration: float
+
 
 class MessageBroker:
     """
@@ -21,31 +62,154 @@ class MessageBroker:
         """
         Send a message to a specific WebSocket.
         """
+        await self.send_text_to_websocket(websocket, message.model_dump_json())
+
+    async def send_text_to_websocket(self, websocket: WebSocket, data: str) -> None:
+        """
+        Send an already serialized message to a specific WebSocket.
+
+        Lets a caller serialize a message once for many recipients.
+        """
         try:
-            await websocket.send_text(message.model_dump_json())
-            logging.debug(f"Sent message to websocket: {message}")
+            await websocket.send_text(data)
+            logger.debug("Sent message to websocket")
         except Exception as e:
             ctx = self._registry.get_by_websocket(websocket)
-            logging.error(f"Failed to send message to {repr(ctx.user)}: {e}")
+            logger.error(
+                "Failed to send message to %r: %s", ctx.user if ctx else websocket, e
+            )
+
+    def _should_shed(self, message: BaseMessage, recipients: int) -> bool:
+        """
+        Drop low priority messages while the whole process is overloaded.
+        """
+        if message.type not in LOW_PRIORITY:
+            return False
+        if Outbox.pending_total < get_settings().OUTBOUND_SHED_WATERMARK:
+            return False
+
+        metrics.incr(f"outbound.shed.{message.type.value}", recipients)
+        return True
+
+    def _enqueue(self, ctx: ConnectionContext, data: str, message: BaseMessage, key):
+        priority = Priority.LOW if message.type in LOW_PRIORITY else Priority.HIGH
+        ctx.outbox.put(data, priority, message.type.value, key)
 
     async def send_to_user(self, user_to: User, message: BaseMessage) -> None:
         """
-        Send a message to a User.
+        Queue a message for a User.
         """
         ctx = self._registry.get_by_user(user_to)
 
         if ctx is None:
-            logging.warning(f"Cannot send message to {repr(user_to)}: Not connected")
+            logger.warning("Cannot send message to %r: Not connected", user_to)
+            return
+
+        if message.type in ctx.ignored:
+            metrics.incr(f"outbound.filtered.{message.type.value}")
             return
 
-        await self.send_to_websocket(ctx.websocket, message)
+        if self._should_shed(message, 1):
+            return
+
+        self._enqueue(ctx, message.model_dump_json(), message, coalesce_key(message))
 
-    async def send_to_channel(self, members: set[User], message: BaseMessage) -> None:
+    async def send_text_to_user(
+        self, user_to: User, data: str, message_type: MessageType
+    ) -> None:
         """
-        Send a message to all members in a channel.
+        Queue an already serialized message (of type `message_type`) for
+        a User, as must-arrive.
         """
-        for user in members:
-            await self.send_to_user(user, message)
+        ctx = self._registry.get_by_user(user_to)
+
+        if ctx is None:
+            logger.warning("Cannot send message to %r: Not connected", user_to)
+            return
+
+        if message_type in ctx.ignored:
+            metrics.incr(f"outbound.filtered.{message_type.value}")
+            return
+
+        ctx.outbox.put(data)
+
+    async def send_to_channel(
+        self, member_ids: Iterable[int], message: BaseMessage, data: str | None = None
+    ) -> None:
+        """
+        Queue a message for all members (by User ID) in a channel.
+
+        The message is serialized once for all the members, or not at all
+        if the caller passes it already serialized as `data`, or if every
+        member filters it out.
+        """
+        if not isinstance(member_ids, Sized):
+            member_ids = list(member_ids)
+
+        if self._should_shed(message, len(member_ids)):
+            return
+
+        key = coalesce_key(message)
+        filtered = 0
+
+        for user_id in member_ids:
+            ctx = self._registry.get_by_user_id(user_id)
+            if ctx is None:
+                # e.g. disconnected, within its grace period
+                logger.debug("Cannot send message to User %s: Not connected", user_id)
+                continue
+            if message.type in ctx.ignored:
+                filtered += 1
+                continue
+            if data is None:
+                data = message.model_dump_json()
+            self._enqueue(ctx, data, message, key)
+
+        if filtered:
+            metrics.incr(f"outbound.filtered.{message.type.value}", filtered)
+
+    async def send_broadcast(self, message: BaseMessage) -> BroadcastResult:
+        """
+        Queue a message for every connection of the server.
+
+        The message is serialized once, and the connections are walked in
+        chunks of BROADCAST_CHUNK_SIZE, yielding to the event loop between
+        two chunks so a broadcast to many connections does not stall the chat.
+        Connections opened meanwhile are not included.
+        """
+        start = time.monotonic()
+        chunk_size = get_settings().BROADCAST_CHUNK_SIZE
+
+        data = message.model_dump_json()
+        key = coalesce_key(message)
+        connections = self._registry.get_all()
+        recipients = 0
+
+        for i in range(0, len(connections), chunk_size):
+            for ctx in connections[i : i + chunk_size]:
+                if message.type in ctx.ignored:
+                    continue
+                # A closed connection's outbox drops the message
+                self._enqueue(ctx, data, message, key)
+                recipients += 1
+
+            logger.debug(
+                "Broadcast %s: %d/%d connections",
+                message.type,
+                min(i + chunk_size, len(connections)),
+                len(connections),
+            )
+            await asyncio.sleep(0)
 
-    # NOTE: send_broadcast() ?
-    # connections = self._registry.get_all()
+        result = BroadcastResult(
+            recipients, len(connections), time.monotonic() - start
+        )
+        metrics.incr(f"broadcast.{message.type.value}")
+        metrics.incr("broadcast.recipients", recipients)
+        logger.info(
+            "Broadcast %s to %d connections in %.3fs",
+            message.type,
+            result.recipients,
+            result.duration,
+        )
+        return result
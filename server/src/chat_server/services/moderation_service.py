@@ -1,9 +1,15 @@
 import logging
+import math
+import time
+from datetime import datetime, timezone
 
+from chat_server import metrics
 from chat_server.connection.channel import Channel
 from chat_server.connection.user import User
 from chat_server.db import crud
-from chat_server.db.db import async_session
+from chat_server.db.db import DatabaseUnavailable, async_session, db_guard
+
+logger = logging.getLogger(__name__)
 
 
 class ModerationService:
@@ -14,7 +20,10 @@ class ModerationService:
     """
 
     def __init__(self) -> None:
-        self._mutes = dict()
+        # (User ID, Channel ID) -> time.time() the mute ends, of the mutes
+        # known to this process. Serves `is_muted` while the database is
+        # unavailable
+        self._mutes: dict[tuple[int, int], float] = {}
 
     async def mute_user(
         self,
@@ -24,21 +33,63 @@ class ModerationService:
         duration: int | None = None,
         reason="",
     ):
-        async with async_session() as session:
-            await crud.mute_user(
-                session, target.id, issuer.id, channel.id, duration, reason
-            )
+        async with db_guard():
+            async with async_session() as session:
+                await crud.mute_user(
+                    session, target.id, issuer.id, channel.id, duration, reason
+                )
+        self._mutes[target.id, channel.id] = (
+            time.time() + duration if duration else math.inf
+        )
 
     async def unmute_user(self, target: User, channel: Channel):
         """
         Unmute user
+
+        The mute is still known to this process if the database call fails.
+        """
+        async with db_guard():
+            async with async_session() as session:
+                await crud.unmute_user(session, target.id, channel.id)
+        self._mutes.pop((target.id, channel.id), None)
+
+    def forget(self, channels: list[Channel]) -> None:
+        """
+        Drop the mutes known for Channels no longer in use (e.g. evicted),
+        they are read from the database again.
         """
-        async with async_session() as session:
-            await crud.unmute_user(session, target.id, channel.id)
+        channel_ids = {channel.id for channel in channels}
+        for key in [key for key in self._mutes if key[1] in channel_ids]:
+            del self._mutes[key]
 
     async def is_muted(self, target: User, channel: Channel) -> bool:
         """
         Check if `target` is muted at the `channel`.
+
+        While the database is unavailable, answer from the mutes known to
+        this process.
         """
-        async with async_session() as session:
-            return await crud.get_mute(session, target.id, channel.id) is not None
+        key = (target.id, channel.id)
+        try:
+            async with db_guard():
+                async with async_session() as session:
+                    mute = await crud.get_mute(session, target.id, channel.id)
+        except DatabaseUnavailable:
+            metrics.incr("db.degraded.mute_check")
+            return time.time() < self._mutes.get(key, 0)
+
+        if mute is None:
+            self._mutes.pop(key, None)
+            return False
+
+        self._mutes[key] = _mute_end(mute.expires_at)
+        return True
+
+
+def _mute_end(expires_at: datetime | None) -> float:
+    if expires_at is None:
+        return math.inf
+    # Stored naive, in UTC (func.now())
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at.timestamp()
@@ -0,0 +1,184 @@
+import logging
+import time
+from datetime import datetime
+
+from chat_server.connection.channel import Channel
+from chat_server.connection.user import User
+from chat_server.ids import new_id
+from chat_server.protocol.messages import SlowModeCommand, SlowModePayload
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SlowModeState:
+    """
+    Slow mode state of a Channel.
+    """
+
+    __slots__ = ("interval", "auto", "window_start", "window_count", "last_sent")
+
+    def __init__(self, now: float) -> None:
+        # Seconds between two messages of a User, 0 means off
+        self.interval = 0.0
+        # Turned on by the server, so it can also turn it off
+        self.auto = False
+        # Message rate measurement
+        self.window_start = now
+        self.window_count = 0
+        # User ID -> time.monotonic() of its last message, while slow mode is on.
+        # Kept here, not on the connection, so a reconnect does not reset it
+        self.last_sent: dict[int, float] = {}
+
+
+class SlowModeService:
+    """
+    Per Channel slow mode: each User may send one message every N seconds.
+
+    Slow mode is set by a moderator, or turned on automatically when
+    the message rate of a Channel crosses SLOWMODE_AUTO_THRESHOLD.
+    """
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self.auto_threshold = settings.SLOWMODE_AUTO_THRESHOLD
+        self.auto_interval = settings.SLOWMODE_AUTO_INTERVAL
+        self.window = settings.SLOWMODE_WINDOW
+        self._channels: dict[int, SlowModeState] = {}
+
+    def _state(self, channel: Channel, now: float) -> SlowModeState:
+        state = self._channels.get(channel.id)
+        if state is None:
+            state = self._channels[channel.id] = SlowModeState(now)
+        return state
+
+    def get_interval(self, channel: Channel) -> float:
+        """
+        Get the slow mode interval of a Channel, 0 if off.
+        """
+        state = self._channels.get(channel.id)
+        return state.interval if state else 0.0
+
+    def is_auto(self, channel: Channel) -> bool:
+        """
+        Check if the slow mode of a Channel was turned on automatically.
+        """
+        state = self._channels.get(channel.id)
+        return state.auto if state else False
+
+    def announcement(self, channel: Channel) -> SlowModeCommand:
+        """
+        Build the message announcing the current slow mode of a Channel.
+        """
+        payload = SlowModePayload(
+            channel_id=channel.id,
+            interval=self.get_interval(channel),
+            auto=self.is_auto(channel),
+        )
+        return SlowModeCommand(timestamp=datetime.now(), id=new_id(), payload=payload)
+
+    def set_interval(self, channel: Channel, interval: float, auto: bool = False):
+        """
+        Set the slow mode interval of a Channel. 0 turns it off.
+        """
+        state = self._state(channel, time.monotonic())
+        state.interval = interval
+        state.auto = auto and interval > 0
+        if not interval:
+            state.last_sent.clear()
+        logger.info("Slow mode of %r set to %ss (auto=%s)", channel, interval, auto)
+
+    def forget(self, channels: list[Channel]) -> None:
+        """
+        Drop the slow mode state of Channels (e.g. evicted).
+        """
+        for channel in channels:
+            self._channels.pop(channel.id, None)
+
+    def snapshot(self) -> dict[int, float]:
+        """
+        Get the slow mode intervals set by moderators, per Channel ID.
+
+        Automatic slow mode is not kept, the message rate is measured again.
+        """
+        return {
+            channel_id: state.interval
+            for channel_id, state in self._channels.items()
+            if state.interval and not state.auto
+        }
+
+    def restore(self, intervals: dict[int, float]) -> None:
+        """
+        Restore the slow mode intervals of a snapshot().
+        """
+        now = time.monotonic()
+        for channel_id, interval in intervals.items():
+            state = self._channels.get(channel_id)
+            if state is None:
+                state = self._channels[channel_id] = SlowModeState(now)
+            state.interval = interval
+
+    def retry_after(
+        self, user: User, channel: Channel, now: float | None = None
+    ) -> float:
+        """
+        Seconds the User must wait before sending to the Channel, 0 if allowed.
+        """
+        state = self._channels.get(channel.id)
+        if state is None or not state.interval:
+            return 0.0
+
+        last = state.last_sent.get(user.id)
+        if last is None:
+            return 0.0
+
+        if now is None:
+            now = time.monotonic()
+        return max(0.0, last + state.interval - now)
+
+    def record(
+        self, user: User, channel: Channel, now: float | None = None
+    ) -> bool:
+        """
+        Record a message sent by the User to the Channel.
+
+        Return True if the message rate turned the automatic slow mode
+        on or off, so the change can be announced.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        state = self._state(channel, now)
+        state.window_count += 1
+        if state.interval:
+            state.last_sent[user.id] = now
+
+        elapsed = now - state.window_start
+        if elapsed < self.window:
+            return False
+
+        rate = state.window_count / elapsed
+        state.window_start = now
+        state.window_count = 0
+
+        # Forget the Users free to send again
+        if state.last_sent:
+            state.last_sent = {
+                user_id: last
+                for user_id, last in state.last_sent.items()
+                if last + state.interval > now
+            }
+
+        if not self.auto_threshold:
+            return False
+
+        if not state.interval and rate >= self.auto_threshold:
+            self.set_interval(channel, self.auto_interval, auto=True)
+            return True
+
+        # Hysteresis, so a channel around the threshold does not flap
+        if state.auto and rate < self.auto_threshold / 2:
+            self.set_interval(channel, 0)
+            return True
+
+        return False
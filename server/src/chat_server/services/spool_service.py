@@ -0,0 +1,117 @@
+import asyncio
+import logging
+
+from chat_server import metrics
+from chat_server.db import crud
+from chat_server.db.db import DatabaseUnavailable, async_session, db_guard
+from chat_server.infrastructure.write_spool import WriteSpool
+from chat_server.protocol.messages import ChatSend
+from chat_server.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SpoolService:
+    """
+    Keeps the chat going while the database is unavailable.
+
+    Chat messages that could not be stored are spooled to disk (see
+    WriteSpool), and stored once the database is back: every
+    SPOOL_FLUSH_INTERVAL seconds, in batches of SPOOL_FLUSH_BATCH, oldest
+    first. Storing is idempotent, a message stored by a call that timed
+    out is not stored twice. A message the database refuses (e.g. its
+    sender was deleted) is dropped, it does not hold back the others.
+    """
+
+    def __init__(self, spool: WriteSpool | None = None) -> None:
+        settings = get_settings()
+        self.spool = spool or WriteSpool(
+            settings.SPOOL_DIR,
+            settings.SPOOL_MAX_MESSAGES,
+            settings.SPOOL_SEGMENT_BYTES,
+            settings.SPOOL_FSYNC_INTERVAL,
+        )
+        self.interval = settings.SPOOL_FLUSH_INTERVAL
+        self.batch_size = settings.SPOOL_FLUSH_BATCH
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """
+        Start the flush loop in the background.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="spool")
+
+    async def stop(self) -> None:
+        """
+        Stop the flush loop, and try to store what is left. The rest
+        stays on disk for the next start.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        await self.spool.close()
+        if self.spool:
+            logger.warning("%d spooled messages left on disk", len(self.spool))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Spool flush failed")
+
+    def add(self, message: ChatSend, sender_id: int) -> bool:
+        """
+        Spool a message to store later. Return False if the spool is full.
+        """
+        if not self.spool.append(message, sender_id):
+            metrics.incr("spool.full")
+            return False
+        metrics.incr("spool.added")
+        return True
+
+    async def flush(self) -> int:
+        """
+        Store the spooled messages, until done or the database fails.
+
+        Returns the number of messages stored.
+        """
+        stored = 0
+        while batch := self.spool.peek(self.batch_size):
+            try:
+                stored += await self._store(batch)
+            except DatabaseUnavailable:
+                break
+            self.spool.discard(len(batch))
+
+        if stored:
+            metrics.incr("spool.stored", stored)
+            logger.info("Stored %d spooled messages", stored)
+        return stored
+
+    async def _store(self, batch: list[tuple[ChatSend, int]]) -> int:
+        try:
+            async with db_guard():
+                async with async_session() as session:
+                    return await crud.create_messages(session, batch)
+        except DatabaseUnavailable:
+            raise
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error("Dropping spooled message %s: %s", batch[0][0].id, e)
+                metrics.incr("spool.dropped")
+                return 0
+
+        # Find the refused message(s), storing the others one by one
+        stored = 0
+        for entry in batch:
+            stored += await self._store([entry])
+        return stored
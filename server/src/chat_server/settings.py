@@ -17,6 +17,135 @@ class Settings(BaseSettings):
     PORT: int = 8000
     ENVIRONMENT: str
 
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    # Fraction of the per-message logs (e.g. every frame received) to keep
+    LOG_SAMPLE_RATE: float = 0.01
+
+    # Heartbeat (seconds)
+    # Max time to wait for the HELLO message after accepting a connection
+    HELLO_TIMEOUT: float = 10
+    # A connection silent for this long is sent a PING
+    HEARTBEAT_INTERVAL: float = 25
+    # A connection silent for this long is considered dead and reaped
+    IDLE_TIMEOUT: float = 60
+    # Number of connections pinged/reaped before yielding to the event loop
+    HEARTBEAT_BATCH_SIZE: int = 500
+    # Max time for a single ping/close on a connection
+    HEARTBEAT_SEND_TIMEOUT: float = 5
+
+    # Admission control
+    # Max open connections on the server, and per client IP
+    MAX_CONNECTIONS: int = 10000
+    MAX_CONNECTIONS_PER_IP: int = 20
+    # HELLO messages authenticated per second, and burst allowed
+    HELLO_RATE: float = 50
+    HELLO_BURST: int = 100
+    # Rejected clients are told to retry after this (ms), plus a random jitter
+    ADMISSION_RETRY_MS: int = 1000
+    ADMISSION_RETRY_JITTER_MS: int = 2000
+
+    # Inbound rate limiting (limits are in handler/rate_limit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    # Max Users/Channels tracked per limit
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+
+    # Slow mode
+    # Channel message rate (messages/s) that turns slow mode on automatically,
+    # 0 disables it. It is turned off again below half this rate
+    SLOWMODE_AUTO_THRESHOLD: float = 20
+    # Interval (s) between two messages of a User under automatic slow mode
+    SLOWMODE_AUTO_INTERVAL: float = 5
+    # Window (s) over which the channel message rate is measured
+    SLOWMODE_WINDOW: float = 10
+
+    # Outbound queues
+    # Queued must-arrive messages after which a connection is closed as too slow
+    OUTBOX_HIGH_CAPACITY: int = 1024
+    # Queued droppable messages (typing, reactions) per connection
+    OUTBOX_LOW_CAPACITY: int = 64
+    # Messages queued in the whole process after which droppable ones are shed
+    OUTBOUND_SHED_WATERMARK: int = 100_000
+
+    # Inbound queues
+    # Messages of a connection handled concurrently, one per channel at most
+    INBOUND_LANES: int = 4
+    # Messages of a connection queued or being handled before reading stops
+    INBOUND_QUEUE_SIZE: int = 32
+    # Max time (s) to finish handling the messages received before a disconnect
+    INBOUND_DRAIN_TIMEOUT: float = 5
+
+    # Handler deadlines
+    # Max time (s) to handle a message, unless set for its type
+    # in handler/deadlines.py
+    HANDLER_DEADLINE: float = 5
+
+    # Database circuit breaker and degraded mode
+    # Consecutive failed (or slow) database calls that open the circuit
+    DB_FAILURE_THRESHOLD: int = 5
+    # Time (s) the circuit stays open before a trial call is let through
+    DB_RESET_TIMEOUT: float = 10
+    # Max time (s) of a database call from the chat
+    DB_CALL_TIMEOUT: float = 2
+    # Chat messages kept while the database is unavailable, stored once it is back
+    SPOOL_MAX_MESSAGES: int = 10_000
+    # Directory of the spool files (a subdirectory per worker process),
+    # size (bytes) of a spool file, and max time (s) between fsyncs of the spool
+    SPOOL_DIR: str = "spool"
+    SPOOL_SEGMENT_BYTES: int = 4 * 1024 * 1024
+    SPOOL_FSYNC_INTERVAL: float = 0.05
+    # Interval (s) between attempts to store the spooled messages, and batch size
+    SPOOL_FLUSH_INTERVAL: float = 2
+    SPOOL_FLUSH_BATCH: int = 500
+    # Recent chat messages kept per channel, sent as history while the
+    # database is unavailable
+    HISTORY_CACHE_SIZE: int = 100
+
+    # Graceful drain, on shutdown
+    # Max time (s) to finish handling received messages and sending queued ones
+    DRAIN_TIMEOUT: float = 10
+    # Clients are told to reconnect after a random delay up to this (ms)
+    DRAIN_RECONNECT_SPREAD_MS: int = 10_000
+    # File the channel state is saved to on shutdown, and restored from
+    # on start. Empty disables it
+    DRAIN_SNAPSHOT_PATH: str = ""
+
+    # Channel lifecycle
+    # A channel without members for this long (s) is evicted from memory,
+    # with its replay log, history cache and slow mode
+    CHANNEL_IDLE_TTL: float = 300
+    # Interval (s) between two sweeps for idle channels
+    CHANNEL_SWEEP_INTERVAL: float = 60
+
+    # Presence
+    # A disconnected User stays in its channels this long (s), so a quick
+    # reconnect is not seen as a leave and a join
+    DISCONNECT_GRACE: float = 10
+    # Users whose grace period ends within this window (s) leave together,
+    # with a single members update per channel
+    PRESENCE_BATCH_WINDOW: float = 0.5
+    # Users leaving a channel together past which they get no individual
+    # leave alert, the members update says it all
+    PRESENCE_ALERT_LIMIT: int = 5
+
+    # Large channels
+    # Members past which a channel turns large: no members lists nor
+    # join/leave alerts, only its member count, sent periodically
+    LARGE_CHANNEL_MEMBERS: int = 1000
+    # Members below which a large channel turns back to normal
+    LARGE_CHANNEL_EXIT_MEMBERS: int = 800
+    # Interval (s) between two member count updates of a large channel
+    LARGE_CHANNEL_PRESENCE_INTERVAL: float = 5
+
+    # Broadcast
+    # Connections a broadcast is queued for before yielding to the event loop
+    BROADCAST_CHUNK_SIZE: int = 1000
+
+    # Session resume
+    # Events kept per channel for reconnecting clients, and for how long (s)
+    REPLAY_LOG_SIZE: int = 500
+    REPLAY_LOG_TTL: float = 300
+
     # CORS Origin allowed
     ORIGINS: str
 
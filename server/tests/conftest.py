@@ -1,15 +1,23 @@
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
 import pytest
 import pytest_asyncio
+from chat_server import metrics
 from chat_server.api.models import UserCreate
 from chat_server.connection.channel import Channel
 from chat_server.connection.manager import ConnectionManager
 from chat_server.connection.user import User
+from chat_server.db import db as db_module
 from chat_server.db.db import get_db
 from chat_server.db.models import Base
+from chat_server.handler import router
+from chat_server.handler import rate_limit
+from chat_server.handler.rate_limit import InboundRateLimiter
+from chat_server.infrastructure.circuit_breaker import CircuitBreaker
 from chat_server.main import app
 from chat_server.protocol.messages import ChatSend, ChatSendPayload, UserFrom
 from chat_server.security.utils import generate_access_token
@@ -17,12 +25,25 @@ from chat_server.services.channel_service import ChannelService
 from chat_server.services.dashboard_service import DashboardService
 from chat_server.services.message_broker import MessageBroker
 from chat_server.services.moderation_service import ModerationService
+from chat_server.services.slowmode_service import SlowModeService
+from chat_server.settings import get_settings
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy import StaticPool
+from sqlalchemy import StaticPool, event
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
+# Modules that import `async_session` directly and must use the test database
+ASYNC_SESSION_USERS = [
+    "chat_server.connection.manager",
+    "chat_server.db.db",
+    "chat_server.handler.channel_handler",
+    "chat_server.handler.chat_handler",
+    "chat_server.services.authorization_service",
+    "chat_server.services.moderation_service",
+    "chat_server.services.spool_service",
+]
+
 
 @pytest_asyncio.fixture(scope="function")
 async def test_engine():
@@ -81,6 +102,38 @@ def sample_chat_send() -> ChatSend:
 # Handler test fixtures
 
 
+@pytest.fixture(autouse=True)
+def spool_dir(monkeypatch, tmp_path):
+    """
+    Spool files go to a temporary directory.
+    """
+    path = tmp_path / "spool"
+    monkeypatch.setattr(get_settings(), "SPOOL_DIR", str(path))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def fresh_db_breaker(monkeypatch):
+    """
+    Every test starts with the database circuit closed.
+    """
+    breaker = CircuitBreaker(
+        "db",
+        db_module.db_breaker.failure_threshold,
+        db_module.db_breaker.reset_timeout,
+        db_module.db_breaker.failures,
+    )
+    monkeypatch.setattr(db_module, "db_breaker", breaker)
+    return breaker
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiter(monkeypatch):
+    """Rate limits and metrics must not leak between tests."""
+    monkeypatch.setattr(rate_limit, "rate_limiter", InboundRateLimiter())
+    metrics.reset()
+
+
 @pytest.fixture
 def mock_websocket():
     """Mock WebSocket for testing handlers."""
@@ -121,6 +174,10 @@ def test_channel():
     return Channel(id=1, name="general")
 
 
+async def run_now(channel, job, shielded=False):
+    return await job()
+
+
 @pytest.fixture
 def mock_manager():
     """Mock ConnectionManager with all services for handler tests."""
@@ -133,10 +190,16 @@ def mock_manager():
     manager.channel_srvc.leave_channel = AsyncMock()
     manager.channel_srvc.send_to_channel = AsyncMock()
     manager.channel_srvc.leave_all_channels = AsyncMock()
+    manager.channel_srvc.run_in_order = AsyncMock(side_effect=run_now)
+    manager.channel_srvc.get_or_create_channel.side_effect = lambda channel_id: (
+        Channel(id=channel_id, name=f"Channel {channel_id}")
+    )
     # Sync methods (is_member, get_channel_by_id, create_channel) work with MagicMock
 
     manager.broker = AsyncMock(spec=MessageBroker)
     manager.moderation = AsyncMock(spec=ModerationService)
+    manager.moderation.is_muted.return_value = False
+    manager.slowmode = SlowModeService()
     manager.send_error = AsyncMock()
     return manager
 
@@ -149,7 +212,11 @@ async def patched_session(test_engine):
     """
     async_session_maker = async_sessionmaker(test_engine, expire_on_commit=False)
 
-    with patch("chat_server.db.db.async_session", async_session_maker):
+    with ExitStack() as stack:
+        for module in ASYNC_SESSION_USERS:
+            stack.enter_context(
+                patch(f"{module}.async_session", async_session_maker)
+            )
         yield
 
 
@@ -191,3 +258,83 @@ def mock_dashboard_service():
     app.state.dashboard_service = mock_service
     yield mock_service
     app.state.dashboard_service = original
+
+
+# SQL query budgets
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    """
+    Maximum number of SQL statements and database round-trips for an operation.
+
+    Round-trips are the statements plus every COMMIT.
+    """
+
+    statements: int
+    round_trips: int
+
+
+@dataclass
+class QueryCounter:
+    """
+    Records every SQL statement and COMMIT executed through an engine.
+    """
+
+    statements: list[str] = field(default_factory=list)
+    commits: int = 0
+
+    @property
+    def round_trips(self) -> int:
+        return len(self.statements) + self.commits
+
+    def reset(self) -> None:
+        self.statements.clear()
+        self.commits = 0
+
+
+@pytest.fixture
+def query_counter(test_engine):
+    """
+    Count SQL statements and round-trips sent to the test database.
+    """
+    counter = QueryCounter()
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    def on_commit(conn):
+        counter.commits += 1
+
+    engine = test_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    event.listen(engine, "commit", on_commit)
+    yield counter
+    event.remove(engine, "before_cursor_execute", on_execute)
+    event.remove(engine, "commit", on_commit)
+
+
+@pytest.fixture
+def query_budget(query_counter):
+    """
+    Context manager asserting the block stays within a QueryBudget.
+
+        with query_budget(QueryBudget(statements=1, round_trips=2)):
+            ...
+    """
+
+    @contextmanager
+    def check(budget: QueryBudget):
+        query_counter.reset()
+        yield query_counter
+        statements = "\n".join(query_counter.statements)
+        assert len(query_counter.statements) <= budget.statements, (
+            f"{len(query_counter.statements)} SQL statements, "
+            f"budget is {budget.statements}:\n{statements}"
+        )
+        assert query_counter.round_trips <= budget.round_trips, (
+            f"{query_counter.round_trips} round-trips, "
+            f"budget is {budget.round_trips}:\n{statements}"
+        )
+
+    return check
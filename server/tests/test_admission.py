@@ -0,0 +1,138 @@
+"""
+Tests for admission control at connection accept.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import status
+from fastapi.websockets import WebSocketDisconnect
+
+from chat_server.connection.manager import ConnectionManager
+from chat_server.connection.user import User
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.infrastructure.token_bucket import TokenBucket
+from chat_server.services.admission_service import AdmissionService
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.message_broker import MessageBroker
+
+
+def make_ws(ip="10.0.0.1"):
+    ws = AsyncMock()
+    ws.client = SimpleNamespace(host=ip, port=1234)
+    ws.receive_text = AsyncMock(return_value='{"type":"hello","payload":{}}')
+    return ws
+
+
+@pytest.fixture
+def admission():
+    service = AdmissionService()
+    service.max_connections = 3
+    service.max_connections_per_ip = 2
+    service.retry_ms = 1000
+    service.retry_jitter_ms = 500
+    return service
+
+
+@pytest.fixture
+def manager(admission):
+    registry = ConnectionRegistry()
+    auth = AsyncMock()
+    auth.authenticate = AsyncMock(side_effect=lambda token: User("Guest", 1, True))
+    channel_srvc = MagicMock(spec=ChannelService)
+    channel_srvc.leave_all_channels = AsyncMock()
+    return ConnectionManager(
+        registry, auth, MessageBroker(registry), channel_srvc, AsyncMock(), admission
+    )
+
+
+class TestTokenBucket:
+    def test_burst_then_empty(self):
+        bucket = TokenBucket(rate=1, capacity=3, now=0)
+
+        assert [bucket.try_acquire(now=0) for _ in range(4)] == [True] * 3 + [False]
+
+    def test_refill(self):
+        bucket = TokenBucket(rate=2, capacity=2, now=0)
+        bucket.try_acquire(2, now=0)
+
+        assert bucket.retry_after(now=0) == 0.5
+        assert bucket.try_acquire(now=0.5)
+        assert not bucket.try_acquire(now=0.5)
+
+    def test_refill_capped(self):
+        bucket = TokenBucket(rate=10, capacity=2, now=0)
+        bucket.try_acquire(2, now=0)
+
+        assert bucket.retry_after(3, now=100) == 0.1
+
+
+class TestAdmissionService:
+    def test_global_cap(self, admission):
+        for i in range(3):
+            assert admission.admit(make_ws(f"10.0.0.{i}")) is None
+
+        retry = admission.admit(make_ws("10.0.0.9"))
+        assert 1000 <= retry <= 1500
+
+    def test_per_ip_cap(self, admission):
+        assert admission.admit(make_ws()) is None
+        assert admission.admit(make_ws()) is None
+        assert admission.admit(make_ws()) is not None
+        assert admission.admit(make_ws("10.0.0.2")) is None
+
+    def test_release(self, admission):
+        first = make_ws()
+        admission.admit(first)
+        admission.admit(make_ws())
+
+        admission.release(first)
+        admission.release(first)
+
+        assert admission.count() == 1
+        assert admission.admit(make_ws()) is None
+
+    def test_hello_rate(self, admission):
+        admission._hello_bucket = TokenBucket(rate=1, capacity=1)
+
+        assert admission.admit_hello() is None
+        assert admission.admit_hello() >= 0
+
+
+class TestAcceptConnection:
+    @pytest.mark.asyncio
+    async def test_rejected_with_retry_after(self, manager, admission):
+        admission.max_connections = 0
+        ws = make_ws()
+
+        with pytest.raises(WebSocketDisconnect):
+            await manager.accept_connection(ws)
+
+        close = ws.close.call_args.kwargs
+        assert close["code"] == status.WS_1013_TRY_AGAIN_LATER
+        assert close["reason"].startswith("Retry after ")
+        ws.receive_text.assert_not_called()
+        manager.auth.authenticate.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_hello_rate_limited_before_auth(self, manager, admission):
+        admission._hello_bucket = TokenBucket(rate=1, capacity=0)
+        ws = make_ws()
+
+        with pytest.raises(WebSocketDisconnect):
+            await manager.accept_connection(ws)
+
+        assert ws.close.call_args.kwargs["code"] == status.WS_1013_TRY_AGAIN_LATER
+        manager.auth.authenticate.assert_not_called()
+        assert admission.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_released_on_disconnect(self, manager, admission):
+        ws = make_ws()
+
+        await manager.accept_connection(ws)
+        assert admission.count() == 1
+
+        await manager.handle_disconnect(ws)
+        assert admission.count() == 0
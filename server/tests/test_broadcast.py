@@ -0,0 +1,110 @@
+"""
+Tests for the server-wide broadcast and its admin endpoint.
+"""
+
+import asyncio
+import json
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+
+from chat_server import metrics
+from chat_server.api.models import UserCreate
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.user import User
+from chat_server.db import crud
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.protocol.messages import Announcement, AnnouncementPayload
+from chat_server.security.utils import generate_access_token
+from chat_server.services.message_broker import BroadcastResult, MessageBroker
+from chat_server.settings import get_settings
+
+API_URL = "/api/v1/dashboard/broadcast"
+
+
+@pytest.fixture
+def registry():
+    registry = ConnectionRegistry()
+    for i in range(1, 8):
+        registry.add(ConnectionContext(AsyncMock(), User(f"user{i}", i)))
+    return registry
+
+
+def announcement() -> Announcement:
+    return Announcement(payload=AnnouncementPayload(content="Maintenance at 2am"))
+
+
+class TestSendBroadcast:
+    @pytest.mark.asyncio
+    async def test_every_connection(self, registry):
+        broker = MessageBroker(registry)
+
+        result = await broker.send_broadcast(announcement())
+        await asyncio.gather(*(ctx.outbox.flush() for ctx in registry.get_all()))
+
+        assert result.recipients == result.connections == 7
+        payloads = [
+            ctx.websocket.send_text.await_args.args[0] for ctx in registry.get_all()
+        ]
+        # Serialized once for all the connections
+        assert all(data is payloads[0] for data in payloads)
+        assert json.loads(payloads[0])["payload"]["content"] == "Maintenance at 2am"
+        assert metrics.get("broadcast.recipients") == 7
+
+    @pytest.mark.asyncio
+    async def test_yields_between_chunks(self, registry, monkeypatch):
+        monkeypatch.setattr(get_settings(), "BROADCAST_CHUNK_SIZE", 3)
+        broker = MessageBroker(registry)
+
+        with patch("asyncio.sleep", wraps=asyncio.sleep) as sleep:
+            await broker.send_broadcast(announcement())
+
+        assert sleep.await_count == 3
+
+
+class TestBroadcastEndpoint:
+    async def headers(self, session, username, is_superuser=False):
+        user = await crud.create_user(
+            session, UserCreate(username=username, password="Password1")
+        )
+        user.is_superuser = is_superuser  # type: ignore
+        await session.commit()
+        token = generate_access_token(user.id, timedelta(minutes=15))  # type: ignore
+        return {"Authorization": f"Bearer {token}"}
+
+    @pytest.mark.asyncio
+    async def test_superuser(
+        self, test_client: AsyncClient, test_session, mock_dashboard_service
+    ):
+        headers = await self.headers(test_session, "operator", is_superuser=True)
+        mock_dashboard_service.announce.return_value = BroadcastResult(
+            recipients=99_000, connections=100_000, duration=0.25
+        )
+
+        response = await test_client.post(
+            API_URL, json={"content": "Hello everyone"}, headers=headers
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "recipients": 99_000,
+            "connections": 100_000,
+            "duration_ms": 250.0,
+        }
+        mock_dashboard_service.announce.assert_awaited_once_with("Hello everyone")
+
+    @pytest.mark.asyncio
+    async def test_not_superuser(
+        self, test_client: AsyncClient, test_session, mock_dashboard_service
+    ):
+        # Not the flag, the username of the seeded superuser
+        headers = await self.headers(test_session, get_settings().SUPERUSER_USERNAME)
+
+        response = await test_client.post(
+            API_URL, json={"content": "Hello everyone"}, headers=headers
+        )
+
+        assert response.status_code == 403
+        mock_dashboard_service.announce.assert_not_called()
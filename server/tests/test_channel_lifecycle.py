@@ -0,0 +1,130 @@
+"""
+Tests for the channel lifecycle: lazy creation and idle eviction.
+"""
+
+import math
+from unittest.mock import AsyncMock
+
+import pytest
+
+from chat_server.api.models import UserCreate
+from chat_server.connection.manager import ConnectionManager
+from chat_server.connection.user import User
+from chat_server.db import crud
+from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.eviction_service import EvictionService
+from chat_server.services.membership_service import MembershipService
+from chat_server.services.message_broker import MessageBroker
+from chat_server.services.moderation_service import ModerationService
+from chat_server.settings import get_settings
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(get_settings(), "CHANNEL_IDLE_TTL", 100)
+    registry = ConnectionRegistry()
+    broker = MessageBroker(registry)
+    channel_srvc = ChannelService(ChannelManager(), MembershipService(), broker)
+    return ConnectionManager(
+        registry, AsyncMock(), broker, channel_srvc, ModerationService()
+    )
+
+
+@pytest.fixture
+def srvc(manager):
+    return manager.channel_srvc
+
+
+class TestGetOrCreate:
+    def test_created_once(self, srvc):
+        channel = srvc.get_or_create_channel(1)
+
+        assert channel.id == 1
+        assert srvc.get_or_create_channel(1) is channel
+        assert srvc.get_channel_by_id(1) is channel
+
+
+class TestEvictIdle:
+    def test_evicted_after_ttl(self, srvc):
+        channel = srvc.get_or_create_channel(1)
+        srvc.cache_history(channel, ["old"])
+
+        assert srvc.evict_idle(now=0) == []
+        assert srvc.evict_idle(now=99) == []
+        assert srvc.evict_idle(now=100) == [channel]
+
+        assert srvc.get_channel_by_id(1) is None
+        assert srvc.cached_history(channel) == []
+
+    @pytest.mark.asyncio
+    async def test_members_keep_channel(self, srvc):
+        channel = srvc.get_or_create_channel(1)
+        user = User("alice", 1)
+        await srvc.join_channel(user, channel)
+
+        srvc.evict_idle(now=0)
+        assert srvc.evict_idle(now=1000) == []
+
+        # Idle from the first sweep after the last member left
+        await srvc.leave_channel(user, channel)
+        assert srvc.evict_idle(now=1001) == []
+        assert srvc.evict_idle(now=1101) == [channel]
+
+    def test_use_resets_idle_time(self, srvc):
+        srvc.get_or_create_channel(1)
+        srvc.evict_idle(now=0)
+
+        # e.g. a join waiting on the history
+        srvc.get_or_create_channel(1)
+        assert srvc.evict_idle(now=100) == []
+
+    @pytest.mark.asyncio
+    async def test_seq_continues_after_eviction(
+        self, manager, srvc, patched_session, test_session, sample_chat_send
+    ):
+        await crud.create_user(
+            test_session, UserCreate(username="testuser", password="Password1")
+        )
+        channel = srvc.get_or_create_channel(1)
+        sample_chat_send.seq = srvc.next_seq(channel)
+        await crud.create_message(test_session, sample_chat_send)
+        # Spooled, not stored yet
+        spooled = sample_chat_send.model_copy(update={"seq": srvc.next_seq(channel)})
+        manager.spool.add(spooled, 1)
+
+        srvc.evict_idle(now=0)
+        srvc.evict_idle(now=100)
+        # Nothing kept for the evicted Channel
+        assert srvc._replay_logs == {}
+        assert not srvc.is_seeded(1)
+
+        await manager.seed_seqs([1])
+        channel = srvc.get_or_create_channel(1)
+        assert srvc.next_seq(channel) == 3
+        # The events before the eviction are gone
+        assert srvc.replay(channel, 0) is None
+
+
+class TestEvictionService:
+    def test_slowmode_forgotten(self, manager, srvc):
+        channel = srvc.get_or_create_channel(1)
+        manager.slowmode.set_interval(channel, 30)
+        eviction = EvictionService(manager)
+
+        assert eviction.sweep(now=0) == 0
+        assert eviction.sweep(now=100) == 1
+        assert manager.slowmode.get_interval(channel) == 0
+
+    def test_mutes_forgotten(self, manager, srvc):
+        used, idle = srvc.get_or_create_channel(1), srvc.get_or_create_channel(2)
+        manager.moderation._mutes = {(5, used.id): math.inf, (5, idle.id): math.inf}
+        eviction = EvictionService(manager)
+
+        srvc.get_or_create_channel(1)
+        eviction.sweep(now=0)
+        srvc.get_or_create_channel(1)
+        eviction.sweep(now=100)
+
+        assert manager.moderation._mutes == {(5, used.id): math.inf}
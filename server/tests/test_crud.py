@@ -1,9 +1,16 @@
+from datetime import datetime, timedelta
+
 import pytest
 import pytest_asyncio
 from chat_server.api.models import UserCreate
 from chat_server.db import crud
+from chat_server.db import db as db_module
+from chat_server.db.db import init_db, upgrade_schema
+from chat_server.ids import new_id
 from chat_server.protocol.messages import ChatSend
 from chat_server.security.utils import get_password_hash, verify_password_hash
+from chat_server.settings import get_settings
+from sqlalchemy import inspect, text
 
 
 class TestGetUserByUsername:
@@ -137,3 +144,206 @@ class TestCreateMessage:
         assert msg_db.sender_id == user_db.id, (
             "User that sent the message does not exist in the database."
         )
+
+
+class TestChannelMessages:
+    async def store(self, session, sample_chat_send: ChatSend, seqs):
+        for seq in seqs:
+            message = sample_chat_send.model_copy(update={"id": new_id(), "seq": seq})
+            await crud.create_message(session, message)
+
+    async def test_seq_stored(
+        self, test_session, user_create_obj, sample_chat_send: ChatSend
+    ):
+        await crud.create_user(test_session, user_create_obj)
+        sample_chat_send.seq = 7
+
+        msg_db = await crud.create_message(test_session, sample_chat_send)
+
+        assert msg_db is not None
+        assert msg_db.seq == 7
+
+    async def test_ordered_by_seq(
+        self, test_session, user_create_obj, sample_chat_send: ChatSend
+    ):
+        await crud.create_user(test_session, user_create_obj)
+        await self.store(test_session, sample_chat_send, [3, 1, 2])
+
+        messages = await crud.get_channel_messages(test_session, 1)
+
+        assert [m.seq for m in messages] == [1, 2, 3]
+
+    async def test_limit_keeps_last(
+        self, test_session, user_create_obj, sample_chat_send: ChatSend
+    ):
+        await crud.create_user(test_session, user_create_obj)
+        await self.store(test_session, sample_chat_send, range(1, 6))
+
+        messages = await crud.get_channel_messages(test_session, 1, limit=2)
+
+        assert [m.seq for m in messages] == [4, 5]
+
+    async def test_last_seqs(
+        self, test_session, user_create_obj, sample_chat_send: ChatSend
+    ):
+        await crud.create_user(test_session, user_create_obj)
+        await self.store(test_session, sample_chat_send, [1, 2, 5])
+        sample_chat_send.payload.channel_id = 2
+        await self.store(test_session, sample_chat_send, [3])
+
+        assert await crud.get_last_seqs(test_session, [1, 3]) == {1: 5}
+
+    async def test_channels_messages(
+        self, test_session, user_create_obj, sample_chat_send: ChatSend
+    ):
+        await crud.create_user(test_session, user_create_obj)
+        await self.store(test_session, sample_chat_send, [2, 1])
+        sample_chat_send.payload.channel_id = 2
+        await self.store(test_session, sample_chat_send, [1])
+
+        messages = await crud.get_channels_messages(test_session, [1, 2, 3])
+
+        assert {
+            channel_id: [m.seq for m in rows] for channel_id, rows in messages.items()
+        } == {1: [1, 2], 2: [1]}
+
+    async def test_channels_messages_limit(
+        self, test_session, user_create_obj, sample_chat_send: ChatSend
+    ):
+        await crud.create_user(test_session, user_create_obj)
+        await self.store(test_session, sample_chat_send, [3, 1, 2])
+        sample_chat_send.payload.channel_id = 2
+        await self.store(test_session, sample_chat_send, [1])
+
+        messages = await crud.get_channels_messages(test_session, [1, 2], limit=2)
+
+        assert {
+            channel_id: [m.seq for m in rows] for channel_id, rows in messages.items()
+        } == {1: [2, 3], 2: [1]}
+
+    async def test_stored_again_skipped(
+        self, test_session, user_create_obj, sample_chat_send: ChatSend
+    ):
+        await crud.create_user(test_session, user_create_obj)
+        sample_chat_send.seq = 1
+
+        assert await crud.create_messages(test_session, [(sample_chat_send, 1)]) == 1
+        assert await crud.create_messages(test_session, [(sample_chat_send, 1)]) == 0
+
+    async def test_same_seq_from_two_workers_stored(
+        self, test_session, user_create_obj, sample_chat_send: ChatSend
+    ):
+        await crud.create_user(test_session, user_create_obj)
+        sample_chat_send.seq = 1
+        other = sample_chat_send.model_copy(update={"id": new_id()})
+
+        await crud.create_message(test_session, sample_chat_send, 1)
+        await crud.create_message(test_session, other, 1)
+
+        messages = await crud.get_channel_messages(test_session, 1)
+        assert {m.id for m in messages} == {sample_chat_send.id, other.id}
+
+
+class TestUpgradeSchema:
+    async def test_seq_added_and_backfilled(self, test_engine):
+        start = datetime(2026, 1, 1)
+        async with test_engine.begin() as conn:
+            # As created before the sequence numbers
+            await conn.execute(text("DROP INDEX ix_messages_channel_seq"))
+            await conn.execute(text("ALTER TABLE messages DROP COLUMN seq"))
+            for i, channel_id in enumerate([1, 2, 1, 1]):
+                await conn.execute(
+                    text(
+                        "INSERT INTO messages (id, channel_id, sender_id, "
+                        "sender_username, timestamp, content) VALUES "
+                        "(:id, :channel_id, 1, 'alice', :timestamp, :content)"
+                    ),
+                    {
+                        "id": new_id().hex,
+                        "channel_id": channel_id,
+                        "timestamp": start + timedelta(seconds=i),
+                        "content": str(i),
+                    },
+                )
+
+            await conn.run_sync(upgrade_schema)
+            # Nothing left to do
+            await conn.run_sync(upgrade_schema)
+
+            res = await conn.execute(
+                text("SELECT channel_id, content, seq FROM messages ORDER BY content")
+            )
+            assert res.all() == [(1, "0", 1), (2, "1", 1), (1, "2", 2), (1, "3", 3)]
+            indexes = await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).get_indexes("messages")
+            )
+            assert [index["name"] for index in indexes] == ["ix_messages_channel_seq"]
+
+    async def test_unique_seq_index_relaxed(self, test_engine):
+        async with test_engine.begin() as conn:
+            # As created by an older version
+            await conn.execute(text("DROP INDEX ix_messages_channel_seq"))
+            await conn.execute(
+                text(
+                    "CREATE UNIQUE INDEX ix_messages_channel_seq "
+                    "ON messages (channel_id, seq)"
+                )
+            )
+
+            await conn.run_sync(upgrade_schema)
+
+            indexes = await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).get_indexes("messages")
+            )
+            assert [(index["name"], index["unique"]) for index in indexes] == [
+                ("ix_messages_channel_seq", 0)
+            ]
+
+    async def test_is_superuser_added(self, test_engine, test_session, user_create_obj):
+        await crud.create_user(test_session, user_create_obj)
+        # Seeded before the flag existed
+        await crud.create_user(
+            test_session,
+            UserCreate(username=get_settings().SUPERUSER_USERNAME, password="Password1"),
+        )
+        async with test_engine.begin() as conn:
+            # As created before the flag
+            await conn.execute(text('ALTER TABLE "user" DROP COLUMN is_superuser'))
+
+            await conn.run_sync(upgrade_schema)
+
+            res = await conn.execute(
+                text('SELECT username, is_superuser FROM "user" ORDER BY id')
+            )
+            assert res.all() == [
+                (user_create_obj.username, False),
+                (get_settings().SUPERUSER_USERNAME, True),
+            ]
+
+
+class TestInitDb:
+    async def test_superuser_created(self, test_engine, test_session, monkeypatch):
+        monkeypatch.setattr(db_module, "async_engine", test_engine)
+
+        await init_db()
+
+        user = await crud.get_user_by_username(
+            test_session, get_settings().SUPERUSER_USERNAME
+        )
+        assert user is not None and user.is_superuser
+
+    async def test_superuser_name_not_flagged(
+        self, test_engine, test_session, monkeypatch
+    ):
+        """A user who took the name (after a rename or a delete) is not an admin."""
+        monkeypatch.setattr(db_module, "async_engine", test_engine)
+        username = get_settings().SUPERUSER_USERNAME
+        await crud.create_user(
+            test_session, UserCreate(username=username, password="Password1")
+        )
+
+        await init_db()
+
+        test_session.expire_all()
+        user = await crud.get_user_by_username(test_session, username)
+        assert user is not None and not user.is_superuser
@@ -0,0 +1,133 @@
+"""
+Tests for the handler deadlines.
+"""
+
+import asyncio
+
+import pytest
+
+from chat_server import metrics
+from chat_server.connection.context import ConnectionContext
+from chat_server.handler import deadlines, router
+from chat_server.infrastructure.sequencer import Sequencer
+from chat_server.protocol.enums import ErrorCode, MessageType
+from chat_server.protocol.messages import ChatSend, ChatSendPayload
+
+
+def chat_send(channel_id=1):
+    return ChatSend(payload=ChatSendPayload(channel_id=channel_id, content="hi"))
+
+
+class TestDispatchDeadline:
+    @pytest.mark.asyncio
+    async def test_hung_handler_cancelled(
+        self, mock_websocket, test_user, mock_manager, monkeypatch
+    ):
+        ctx = ConnectionContext(mock_websocket, test_user)
+        cancelled = asyncio.Event()
+
+        async def hung(ctx, message, manager):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        monkeypatch.setitem(router.HANDLERS, MessageType.CHAT_SEND, hung)
+        monkeypatch.setitem(deadlines.DEADLINES, MessageType.CHAT_SEND, 0.01)
+
+        await router.dispatch(ctx, chat_send(), mock_manager)
+
+        assert cancelled.is_set()
+        mock_manager.send_error.assert_awaited_once_with(
+            mock_websocket,
+            "Request timed out",
+            code=ErrorCode.TIMEOUT,
+            message_type=MessageType.CHAT_SEND,
+        )
+        assert metrics.get("handler.timeout.chat_send") == 1
+
+    @pytest.mark.asyncio
+    async def test_fast_handler_untouched(
+        self, mock_websocket, test_user, mock_manager, monkeypatch
+    ):
+        ctx = ConnectionContext(mock_websocket, test_user)
+
+        async def fast(ctx, message, manager):
+            pass
+
+        monkeypatch.setitem(router.HANDLERS, MessageType.CHAT_SEND, fast)
+
+        await router.dispatch(ctx, chat_send(), mock_manager)
+
+        mock_manager.send_error.assert_not_called()
+        assert metrics.get("handler.timeout.chat_send") == 0
+
+    def test_default_deadline(self):
+        assert deadlines.deadline(MessageType.CHANNEL_JOIN) == 10
+        assert deadlines.deadline(MessageType.HELLO) > 0
+
+
+class TestSequencedCancel:
+    @pytest.mark.asyncio
+    async def test_timed_out_job_cancelled(self):
+        sequencer = Sequencer()
+        log = []
+
+        async def hung():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                log.append("cancelled")
+                raise
+
+        async def next_job():
+            log.append("next")
+
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.01):
+                await sequencer.submit(hung)
+        await sequencer.submit(next_job)
+
+        assert log == ["cancelled", "next"]
+        assert sequencer.idle()
+
+    @pytest.mark.asyncio
+    async def test_timed_out_shielded_job_finishes(self):
+        sequencer = Sequencer()
+        log = []
+
+        async def store_then_send():
+            log.append("stored")
+            await asyncio.sleep(0.02)
+            log.append("sent")
+            return "done"
+
+        async with asyncio.timeout(0.01):
+            result = await sequencer.submit(store_then_send, shielded=True)
+
+        assert result == "done"
+        assert log == ["stored", "sent"]
+        assert sequencer.idle()
+
+    @pytest.mark.asyncio
+    async def test_timed_out_shielded_job_dropped_while_queued(self):
+        sequencer = Sequencer()
+        log = []
+
+        async def slow():
+            await asyncio.sleep(0.02)
+            log.append("slow")
+
+        async def queued():
+            log.append("queued")
+
+        first = asyncio.create_task(sequencer.submit(slow))
+        await asyncio.sleep(0)
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.01):
+                await sequencer.submit(queued, shielded=True)
+        await first
+
+        assert log == ["slow"]
+        assert sequencer.idle()
@@ -0,0 +1,309 @@
+"""
+Tests for the database circuit breaker and the degraded mode.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from fastapi import status
+from fastapi.websockets import WebSocketDisconnect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from chat_server import metrics
+from chat_server.api.models import UserCreate
+from chat_server.connection.channel import Channel
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.connection.user import User
+from chat_server.db import crud
+from chat_server.db import db as db_module
+from chat_server.db.db import DatabaseUnavailable, db_guard
+from chat_server.handler import router
+from chat_server.handler.channel_handler import send_history
+from chat_server.ids import new_id
+from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    State,
+)
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.protocol.messages import ChatSend, ChatSendPayload, UserFrom
+from chat_server.services.authorization_service import AuthenticationService
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.membership_service import MembershipService
+from chat_server.services.message_broker import MessageBroker
+from chat_server.services.moderation_service import ModerationService
+
+
+def open_circuit(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10)
+
+        for _ in range(2):
+            breaker.record_failure(now=0)
+        assert breaker.state is State.CLOSED
+
+        breaker.record_failure(now=0)
+        assert breaker.state is State.OPEN
+        assert not breaker.allow(now=5)
+        assert breaker.is_open(now=5)
+
+    def test_success_resets_count(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+
+        breaker.record_failure(now=0)
+        breaker.record_success()
+        breaker.record_failure(now=0)
+
+        assert breaker.state is State.CLOSED
+
+    def test_single_trial_after_timeout(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10)
+        breaker.record_failure(now=0)
+
+        assert breaker.allow(now=10)
+        assert breaker.state is State.HALF_OPEN
+        assert not breaker.allow(now=10)
+
+        breaker.record_success()
+        assert breaker.state is State.CLOSED
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10)
+        breaker.record_failure(now=0)
+
+        assert breaker.allow(now=10)
+        breaker.record_failure(now=10)
+
+        assert breaker.state is State.OPEN
+        assert not breaker.allow(now=15)
+        assert breaker.allow(now=20)
+
+    @pytest.mark.asyncio
+    async def test_guard(self):
+        breaker = CircuitBreaker(
+            "test", failure_threshold=1, reset_timeout=10, failures=(OSError,)
+        )
+
+        # Not a failure of the dependency
+        with pytest.raises(ValueError):
+            async with breaker.guard():
+                raise ValueError
+        assert breaker.state is State.CLOSED
+
+        with pytest.raises(OSError):
+            async with breaker.guard():
+                raise OSError
+        assert breaker.state is State.OPEN
+
+        with pytest.raises(CircuitOpenError):
+            async with breaker.guard():
+                pass
+
+
+class TestDbGuard:
+    @pytest.mark.asyncio
+    async def test_slow_call_unavailable(self, monkeypatch, fresh_db_breaker):
+        monkeypatch.setattr(db_module.settings, "DB_CALL_TIMEOUT", 0.01)
+
+        with pytest.raises(DatabaseUnavailable):
+            async with db_guard():
+                await asyncio.sleep(1)
+
+        assert fresh_db_breaker._failure_count == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_unavailable(self, fresh_db_breaker):
+        open_circuit(fresh_db_breaker)
+
+        with pytest.raises(DatabaseUnavailable):
+            async with db_guard():
+                pytest.fail("The database should not be called")
+
+
+@pytest_asyncio.fixture
+async def sender(test_session):
+    user_db = await crud.create_user(
+        test_session, UserCreate(username="alice", password="Password1")
+    )
+    return User(user_db.username, user_db.id)
+
+
+@pytest.fixture
+def manager(patched_session):
+    registry = ConnectionRegistry()
+    broker = MessageBroker(registry)
+    channel_srvc = ChannelService(ChannelManager(), MembershipService(), broker)
+    return ConnectionManager(
+        registry, AuthenticationService(), broker, channel_srvc, ModerationService()
+    )
+
+
+@pytest_asyncio.fixture
+async def joined(manager, sender, mock_websocket):
+    channel = manager.channel_srvc.create_channel(Channel(id=1, name="Channel 1"))
+    ctx = ConnectionContext(mock_websocket, sender)
+    manager.connections.add(ctx)
+    await manager.channel_srvc.join_channel(sender, channel)
+    await ctx.outbox.flush()
+    mock_websocket.send_text.reset_mock()
+    return ctx, channel
+
+
+async def received(ctx: ConnectionContext) -> list[dict]:
+    await ctx.outbox.flush()
+    return [json.loads(c.args[0]) for c in ctx.websocket.send_text.await_args_list]
+
+
+def chat(content: str) -> ChatSend:
+    return ChatSend(payload=ChatSendPayload(channel_id=1, content=content))
+
+
+class TestDegradedChat:
+    @pytest.mark.asyncio
+    async def test_chat_spooled_and_stored_later(
+        self, manager, joined, test_session, fresh_db_breaker
+    ):
+        ctx, _ = joined
+        open_circuit(fresh_db_breaker)
+
+        await router.dispatch(ctx, chat("while down"), manager)
+
+        sent = await received(ctx)
+        assert [m["type"] for m in sent] == ["chat_send"]
+        assert len(manager.spool.spool) == 1
+        assert await manager.spool.flush() == 0
+
+        # The database is back
+        fresh_db_breaker.record_success()
+        assert await manager.spool.flush() == 1
+
+        stored = await crud.get_channel_messages(test_session, 1)
+        assert [m.content for m in stored] == ["while down"]
+        assert stored[0].seq == sent[0]["seq"]
+
+    @pytest.mark.asyncio
+    async def test_replay_idempotent(self, manager, joined, test_session):
+        ctx, _ = joined
+        payload = ChatSendPayload(
+            channel_id=1, sender=UserFrom.model_validate(ctx.user), content="once"
+        )
+        message = ChatSend(
+            timestamp=datetime.now(), id=new_id(), seq=1, payload=payload
+        )
+
+        # Stored by a call that timed out, then spooled anyway
+        await crud.create_messages(test_session, [(message, ctx.user.id)])
+        manager.spool.add(message, ctx.user.id)
+        await manager.spool.flush()
+
+        stored = await crud.get_channel_messages(test_session, 1)
+        assert len(stored) == 1
+
+    @pytest.mark.asyncio
+    async def test_refused_message_dropped(self, manager, joined, test_session):
+        ctx, _ = joined
+        sender = UserFrom.model_validate(ctx.user)
+        good, bad = (
+            ChatSend(
+                timestamp=timestamp,
+                id=new_id(),
+                seq=seq,
+                payload=ChatSendPayload(channel_id=1, sender=sender, content="hi"),
+            )
+            for seq, timestamp in [(1, datetime.now()), (2, None)]
+        )
+        manager.spool.add(bad, ctx.user.id)
+        manager.spool.add(good, ctx.user.id)
+
+        assert await manager.spool.flush() == 1
+        assert len(manager.spool.spool) == 0
+        assert metrics.get("spool.dropped") == 1
+
+    @pytest.mark.asyncio
+    async def test_history_from_cache(
+        self, manager, joined, fresh_db_breaker
+    ):
+        ctx, channel = joined
+        await router.dispatch(ctx, chat("first"), manager)
+        # Seeds the cache
+        await send_history(ctx, channel, manager)
+        await router.dispatch(ctx, chat("second"), manager)
+        await ctx.outbox.flush()
+        ctx.websocket.send_text.reset_mock()
+
+        open_circuit(fresh_db_breaker)
+        await send_history(ctx, channel, manager)
+
+        history = [m["payload"]["content"] for m in await received(ctx)]
+        assert history == ["first", "second"]
+        assert metrics.get("db.degraded.history") == 1
+
+    @pytest.mark.asyncio
+    async def test_mute_state_from_cache(
+        self, manager, joined, test_session, fresh_db_breaker
+    ):
+        ctx, channel = joined
+        target_db = await crud.create_user(
+            test_session, UserCreate(username="bob", password="Password1")
+        )
+        target = User(target_db.username, target_db.id)
+        await manager.moderation.mute_user(target, ctx.user, channel, duration=60)
+
+        open_circuit(fresh_db_breaker)
+
+        assert await manager.moderation.is_muted(target, channel)
+        assert not await manager.moderation.is_muted(ctx.user, channel)
+        with pytest.raises(DatabaseUnavailable):
+            await manager.moderation.unmute_user(target, channel)
+
+    @pytest.mark.asyncio
+    async def test_failed_unmute_keeps_mute(
+        self, manager, joined, test_session, fresh_db_breaker
+    ):
+        ctx, channel = joined
+        target_db = await crud.create_user(
+            test_session, UserCreate(username="bob", password="Password1")
+        )
+        target = User(target_db.username, target_db.id)
+        await manager.moderation.mute_user(target, ctx.user, channel)
+
+        down = OperationalError("DELETE", {}, Exception("connection lost"))
+        with patch.object(AsyncSession, "execute", side_effect=down):
+            with pytest.raises(DatabaseUnavailable):
+                await manager.moderation.unmute_user(target, channel)
+
+        assert fresh_db_breaker._failure_count == 1
+        open_circuit(fresh_db_breaker)
+        assert await manager.moderation.is_muted(target, channel)
+
+
+class TestDegradedHello:
+    @pytest.mark.asyncio
+    async def test_hello_rejected_with_retry(self, manager, fresh_db_breaker):
+        open_circuit(fresh_db_breaker)
+        ws = AsyncMock()
+        ws.client = SimpleNamespace(host="10.0.0.1", port=1234)
+        ws.receive_text = AsyncMock(
+            return_value=json.dumps({"type": "hello", "payload": {}})
+        )
+
+        with pytest.raises(WebSocketDisconnect):
+            await manager.accept_connection(ws)
+
+        close = ws.close.await_args.kwargs
+        assert close["code"] == status.WS_1013_TRY_AGAIN_LATER
+        assert close["reason"].startswith("Retry after")
+        assert manager.admission.count() == 0
@@ -0,0 +1,255 @@
+"""
+Tests for the graceful drain on shutdown, and the warm start snapshot.
+"""
+
+import asyncio
+import json
+import re
+from unittest.mock import AsyncMock
+
+import pytest
+import uvicorn
+from fastapi import FastAPI, WebSocket, status
+from fastapi.websockets import WebSocketDisconnect
+from websockets.asyncio.client import connect as ws_connect
+from websockets.exceptions import ConnectionClosed
+
+from chat_server.connection.channel import Channel
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.connection.user import User
+from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.infrastructure.replay_log import ReplayLog
+from chat_server.server import ChatServer
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.drain_service import DrainService
+from chat_server.services.membership_service import MembershipService
+from chat_server.services.message_broker import MessageBroker
+from chat_server.settings import get_settings
+
+
+def make_ws():
+    ws = AsyncMock()
+    ws.close = AsyncMock()
+    return ws
+
+
+def retry_ms(ws) -> int:
+    reason = ws.close.call_args.kwargs["reason"]
+    return int(re.fullmatch(r"Retry after (\d+) ms", reason).group(1))
+
+
+def make_manager():
+    registry = ConnectionRegistry()
+    broker = MessageBroker(registry)
+    channel_srvc = ChannelService(ChannelManager(), MembershipService(), broker)
+    return ConnectionManager(registry, AsyncMock(), broker, channel_srvc, AsyncMock())
+
+
+@pytest.fixture
+def manager():
+    return make_manager()
+
+
+@pytest.fixture
+def drain(manager, monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        get_settings(), "DRAIN_SNAPSHOT_PATH", str(tmp_path / "snapshot.json")
+    )
+    return DrainService(manager)
+
+
+def connect(manager, user_id):
+    ctx = ConnectionContext(make_ws(), User(f"user{user_id}", user_id))
+    manager.connections.add(ctx)
+    return ctx
+
+
+class TestDrain:
+    @pytest.mark.asyncio
+    async def test_connections_flushed_then_closed(self, manager, drain):
+        contexts = [connect(manager, i) for i in range(1, 4)]
+        for ctx in contexts:
+            ctx.outbox.put("queued")
+
+        assert await drain.drain() == 3
+
+        for ctx in contexts:
+            ctx.websocket.send_text.assert_awaited_once_with("queued")
+            ctx.websocket.close.assert_awaited_once()
+            assert (
+                ctx.websocket.close.call_args.kwargs["code"]
+                == status.WS_1012_SERVICE_RESTART
+            )
+            spread = get_settings().DRAIN_RECONNECT_SPREAD_MS
+            assert 0 <= retry_ms(ctx.websocket) <= spread
+        assert manager.connections.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_no_leave_alerts(self, manager, drain):
+        """Everyone is leaving, the members are not told about each other."""
+        channel = manager.channel_srvc.create_channel(Channel(id=1, name="general"))
+        first, second = connect(manager, 1), connect(manager, 2)
+        await manager.channel_srvc.join_channel(first.user, channel)
+        await manager.channel_srvc.join_channel(second.user, channel)
+        await first.outbox.flush()
+        await second.outbox.flush()
+        sent = first.websocket.send_text.await_count
+
+        await drain.drain()
+
+        assert first.websocket.send_text.await_count == sent
+
+    @pytest.mark.asyncio
+    async def test_new_connection_rejected(self, manager, drain):
+        await drain.drain()
+        ws = make_ws()
+
+        with pytest.raises(WebSocketDisconnect):
+            await manager.accept_connection(ws)
+
+        assert ws.close.call_args.kwargs["code"] == status.WS_1012_SERVICE_RESTART
+        retry_ms(ws)
+        ws.receive_text.assert_not_called()
+
+
+class TestChatServer:
+    """
+    Through the shutdown of a real uvicorn server, as on SIGTERM.
+    """
+
+    def make_app(self, manager) -> FastAPI:
+        app = FastAPI()
+
+        # As chat_server.main
+        @app.websocket("/ws")
+        async def websocket_endpoint(websocket: WebSocket):
+            try:
+                await manager.accept_connection(websocket)
+            except WebSocketDisconnect:
+                return
+            try:
+                while True:
+                    data = await websocket.receive_text()
+                    await manager.handle_message(websocket, data)
+            except WebSocketDisconnect:
+                await manager.handle_disconnect(websocket)
+
+        return app
+
+    @pytest.mark.asyncio
+    async def test_drained_before_uvicorn_closes(self, manager):
+        manager.auth.authenticate = AsyncMock(return_value=User("alice", 1))
+        channel = manager.channel_srvc.create_channel(Channel(id=1, name="general"))
+        config = uvicorn.Config(
+            self.make_app(manager), port=0, lifespan="off", log_level="warning"
+        )
+        server = ChatServer(config, DrainService(manager).drain)
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+
+        async with ws_connect(f"ws://127.0.0.1:{port}/ws") as client:
+            await client.send(json.dumps({"type": "hello", "payload": {}}))
+            assert json.loads(await client.recv())["type"] == "hello"
+            ctx = manager.connections.get_all()[0]
+            await manager.channel_srvc.join_channel(ctx.user, channel)
+            ctx.outbox.put("queued")
+
+            # What uvicorn does on SIGTERM
+            server.should_exit = True
+            received = []
+            with pytest.raises(ConnectionClosed) as closed:
+                while True:
+                    received.append(await client.recv())
+
+        await serving
+        assert received[-1] == "queued"
+        assert closed.value.rcvd.code == status.WS_1012_SERVICE_RESTART
+        assert re.fullmatch(r"Retry after \d+ ms", closed.value.rcvd.reason)
+        # Closed while draining, no leave scheduled for the grace period
+        assert manager.connections.count() == 0
+        assert manager.channel_srvc._pending_leaves == {}
+
+
+class TestReplayLogDump:
+    def test_dump_load_keeps_age(self):
+        log = ReplayLog(10, 100)
+        for i in range(3):
+            log.append(log.next_seq(), f"event {i + 1}", now=i)
+
+        restored = ReplayLog(10, 100)
+        restored.load(log.dump(now=50), now=1000)
+
+        assert restored.last_seq == 3
+        assert restored.since(1, now=1000) == ["event 2", "event 3"]
+        # event 1 was logged 50s before the dump
+        assert restored.since(0, now=1050.5) is None
+
+
+class TestSnapshot:
+    @pytest.mark.asyncio
+    async def test_save_and_load(self, manager, drain, tmp_path, patched_session):
+        srvc = manager.channel_srvc
+        channel = srvc.create_channel(Channel(id=7, name="general"))
+        srvc.cache_history(channel, ["old"])
+        user = connect(manager, 1).user
+        await srvc.join_channel(user, channel)
+        manager.slowmode.set_interval(channel, 30)
+
+        await drain.save()
+
+        # Next process
+        new = make_manager()
+        await DrainService(new).load()
+
+        restored = new.channel_srvc.get_channel_by_id(7)
+        assert restored == channel
+        assert new.channel_srvc.replay(restored, 0) == srvc.replay(channel, 0)
+        assert new.channel_srvc.next_seq(restored) == srvc.next_seq(channel)
+        assert new.channel_srvc.cached_history(restored) == ["old"]
+        assert new.slowmode.get_interval(restored) == 30
+        # Used once
+        assert not (tmp_path / "snapshot.json").exists()
+
+    def test_stale_snapshot_not_restored(self, manager, drain):
+        srvc = manager.channel_srvc
+        channel = srvc.create_channel(Channel(id=7, name="general"))
+        srvc._replay_log(channel).append(srvc.next_seq(channel), "event 1")
+        snapshot = drain.snapshot()
+
+        # Next process, messages were stored after the snapshot was taken
+        new = make_manager()
+        new.channel_srvc.seed_seq(7, 5)
+        DrainService(new).restore(snapshot)
+
+        restored = new.channel_srvc.get_channel_by_id(7)
+        assert new.channel_srvc.replay(restored, 0) is None
+        assert new.channel_srvc.next_seq(restored) == 6
+
+    @pytest.mark.asyncio
+    async def test_missing_or_corrupt_snapshot(self, drain, tmp_path):
+        await drain.load()
+
+        path = tmp_path / "snapshot.json"
+        path.write_text("{not json")
+        await drain.load()
+
+        assert not path.exists()
+
+    @pytest.mark.asyncio
+    async def test_single_worker_uses_snapshot(self, manager, drain, tmp_path):
+        path = tmp_path / "snapshot.json"
+        path.write_text("{}")
+        # Another worker process started first
+        other = DrainService(make_manager())
+        await other.load()
+
+        await drain.load()
+        await drain.save()
+        assert not path.exists()
+
+        await other.save()
+        assert path.exists()
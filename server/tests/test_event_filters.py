@@ -0,0 +1,114 @@
+"""
+Tests for the per-connection event filters declared in the HELLO.
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pydantic import ValidationError
+
+from chat_server import metrics
+from chat_server.connection.channel import Channel
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.connection.user import User
+from chat_server.handler.channel_handler import resume_channels
+from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.protocol.enums import MessageType
+from chat_server.protocol.messages import (
+    ChatSend,
+    ChatSendPayload,
+    HelloPayload,
+    TypingStart,
+    TypingStartPayload,
+    UserFrom,
+)
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.membership_service import MembershipService
+from chat_server.services.message_broker import MessageBroker
+
+
+def sent(websocket) -> list[str]:
+    return [call.args[0] for call in websocket.send_text.await_args_list]
+
+
+@pytest.fixture
+def registry():
+    registry = ConnectionRegistry()
+    registry.add(ConnectionContext(AsyncMock(), User("user1", 1)))
+    registry.add(
+        ConnectionContext(
+            AsyncMock(), User("bot", 2), ignored=[MessageType.TYPING_START]
+        )
+    )
+    return registry
+
+
+def typing() -> TypingStart:
+    return TypingStart(
+        payload=TypingStartPayload(channel_id=1, user=UserFrom(username="user1"))
+    )
+
+
+class TestHelloFilters:
+    def test_filterable_event(self):
+        payload = HelloPayload.model_validate({"ignore": ["chat_typing"]})
+        assert payload.ignore == [MessageType.TYPING_START]
+
+    def test_chat_messages_not_filterable(self):
+        with pytest.raises(ValidationError):
+            HelloPayload.model_validate({"ignore": ["chat_send"]})
+
+
+class TestBrokerFilters:
+    @pytest.mark.asyncio
+    async def test_filtered_for_channel(self, registry):
+        broker = MessageBroker(registry)
+
+        await broker.send_to_channel([1, 2], typing())
+        await broker.send_to_channel(
+            [1, 2], ChatSend(payload=ChatSendPayload(channel_id=1, content="hi"))
+        )
+        await asyncio.gather(*(ctx.outbox.flush() for ctx in registry.get_all()))
+
+        user, bot = registry.get_by_user_id(1), registry.get_by_user_id(2)
+        assert len(sent(user.websocket)) == 2
+        assert len(sent(bot.websocket)) == 1
+        assert metrics.get("outbound.filtered.chat_typing") == 1
+
+    @pytest.mark.asyncio
+    async def test_not_encoded_when_all_filter(self, registry):
+        broker = MessageBroker(registry)
+        msg = typing()
+
+        with patch.object(TypingStart, "model_dump_json") as dump:
+            await broker.send_to_channel([2], msg)
+            await broker.send_to_user(User("bot", 2), msg)
+
+        dump.assert_not_called()
+        assert metrics.get("outbound.filtered.chat_typing") == 2
+
+    @pytest.mark.asyncio
+    async def test_filtered_in_replay(self, registry):
+        broker = MessageBroker(registry)
+        channel_srvc = ChannelService(ChannelManager(), MembershipService(), broker)
+        manager = ConnectionManager(
+            registry, AsyncMock(), broker, channel_srvc, AsyncMock()
+        )
+        channel = channel_srvc.create_channel(Channel(id=1, name="Channel 1"))
+        bot = registry.get_by_user_id(2)
+        bot.ignored = frozenset([MessageType.CHANNEL_JOIN])
+
+        await channel_srvc.join_channel(User("user1", 1), channel)
+        await channel_srvc.send_to_channel(
+            channel, ChatSend(payload=ChatSendPayload(channel_id=1, content="hi"))
+        )
+        await resume_channels(bot, {1: 0}, manager)
+        await bot.outbox.flush()
+
+        types = [json.loads(data)["type"] for data in sent(bot.websocket)]
+        assert "chat_send" in types
+        assert "channel_join" not in types
@@ -13,9 +13,11 @@ from uuid import uuid4
 import pytest
 
 from chat_server.connection.context import ConnectionContext
+from chat_server.db import crud
 from chat_server.handler.channel_handler import (
     handler_channel_join,
     handler_channel_leave,
+    handler_channel_subscribe,
 )
 from chat_server.handler.chat_handler import handler_chat_send
 from chat_server.handler.commands_handler import (
@@ -28,6 +30,8 @@ from chat_server.protocol.messages import (
     ChannelJoinPayload,
     ChannelLeave,
     ChannelLeavePayload,
+    ChannelSubscribe,
+    ChannelSubscribePayload,
     ChatSend,
     ChatSendPayload,
     KickCommand,
@@ -37,11 +41,12 @@ from chat_server.protocol.messages import (
     UnMuteCommand,
     UnMuteCommandPayload,
 )
+from chat_server.settings import get_settings
 
 
 def make_context(websocket, user):
-    """Create ConnectionContext bypassing Pydantic validation for mocks."""
-    return ConnectionContext.model_construct(websocket=websocket, user=user)
+    """Create ConnectionContext for mocks."""
+    return ConnectionContext(websocket, user)
 
 
 class TestChannelJoinHandler:
@@ -63,9 +68,9 @@ class TestChannelJoinHandler:
         await handler_channel_join(ctx, msg, mock_manager)
 
         # Verify channel was created
-        mock_manager.channel_srvc.create_channel.assert_called_once()
-        created_channel = mock_manager.channel_srvc.create_channel.call_args[0][0]
-        assert created_channel.id == 1
+        mock_manager.channel_srvc.get_or_create_channel.assert_called_once_with(1)
+        joined_channel = mock_manager.channel_srvc.join_channel.call_args[0][1]
+        assert joined_channel.id == 1
 
     @pytest.mark.asyncio
     async def test_channel_join_adds_user_to_channel(
@@ -100,8 +105,88 @@ class TestChannelJoinHandler:
 
         await handler_channel_join(ctx, msg, mock_manager)
 
-        # broker.send_to_user should not be called (no history)
-        mock_manager.broker.send_to_user.assert_not_called()
+        # No message should be sent (no history)
+        mock_manager.broker.send_text_to_user.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_channel_join_sends_last_history(
+        self,
+        mock_websocket,
+        test_user,
+        mock_manager,
+        patched_session,
+        test_session,
+        user_create_obj,
+        sample_chat_send,
+        monkeypatch,
+    ):
+        """Only the last HISTORY_CACHE_SIZE messages are sent."""
+        monkeypatch.setattr(get_settings(), "HISTORY_CACHE_SIZE", 2)
+        await crud.create_user(test_session, user_create_obj)
+        for seq in range(1, 4):
+            await crud.create_message(
+                test_session,
+                sample_chat_send.model_copy(update={"id": uuid4(), "seq": seq}),
+            )
+        ctx = make_context(mock_websocket, test_user)
+        msg = ChannelJoin(
+            timestamp=datetime.now(),
+            id=uuid4(),
+            payload=ChannelJoinPayload(channel_id=1),
+        )
+
+        await handler_channel_join(ctx, msg, mock_manager)
+
+        sent = [
+            ChatSend.model_validate_json(call.args[1]).seq
+            for call in mock_manager.broker.send_text_to_user.call_args_list
+        ]
+        assert sent == [2, 3]
+
+
+class TestChannelSubscribeHandler:
+    """Tests for handler_channel_subscribe."""
+
+    @pytest.mark.asyncio
+    async def test_subscribe_joins_each_channel_once(
+        self, mock_websocket, test_user, mock_manager, patched_session
+    ):
+        """Duplicate channel IDs are joined once."""
+        ctx = make_context(mock_websocket, test_user)
+        msg = ChannelSubscribe(
+            timestamp=datetime.now(),
+            id=uuid4(),
+            payload=ChannelSubscribePayload(channel_ids=[1, 2, 1]),
+        )
+
+        await handler_channel_subscribe(ctx, msg, mock_manager)
+
+        joined = [
+            call.args[1].id
+            for call in mock_manager.channel_srvc.join_channel.call_args_list
+        ]
+        assert joined == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_subscribe_single_response(
+        self, mock_websocket, test_user, mock_manager, patched_session
+    ):
+        """The history of all the channels is sent in one message."""
+        ctx = make_context(mock_websocket, test_user)
+        msg = ChannelSubscribe(
+            timestamp=datetime.now(),
+            id=uuid4(),
+            payload=ChannelSubscribePayload(channel_ids=[1, 2]),
+        )
+
+        await handler_channel_subscribe(ctx, msg, mock_manager)
+
+        mock_manager.broker.send_to_user.assert_called_once()
+        response = mock_manager.broker.send_to_user.call_args[0][1]
+        assert isinstance(response, ChannelSubscribe)
+        assert response.payload.channel_ids == [1, 2]
+        assert response.payload.history == []
+        mock_manager.broker.send_text_to_user.assert_not_called()
 
 
 class TestChatSendHandler:
@@ -618,7 +703,13 @@ class TestUnmuteHandler:
 
     @pytest.mark.asyncio
     async def test_unmute_target_can_send_message(
-        self, mock_websocket, test_user, test_channel, target_user, mock_manager
+        self,
+        mock_websocket,
+        test_user,
+        test_channel,
+        target_user,
+        mock_manager,
+        patched_session,
     ):
         """Target is unmuted and can send message."""
         ctx = make_context(mock_websocket, test_user)
@@ -0,0 +1,148 @@
+"""
+Tests for the heartbeat: HELLO deadline, PING/PONG and the idle reaper.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import status
+from fastapi.websockets import WebSocketDisconnect
+
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.connection.user import User
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.heartbeat_service import HeartbeatService
+from chat_server.services.message_broker import MessageBroker
+
+
+def make_ws():
+    ws = AsyncMock()
+    ws.close = AsyncMock()
+    return ws
+
+
+@pytest.fixture
+def manager():
+    registry = ConnectionRegistry()
+    channel_srvc = MagicMock(spec=ChannelService)
+    channel_srvc.leave_all_channels = AsyncMock()
+    return ConnectionManager(
+        registry, AsyncMock(), MessageBroker(registry), channel_srvc, AsyncMock()
+    )
+
+
+@pytest.fixture
+def heartbeat(manager):
+    service = HeartbeatService(manager)
+    service.interval = 10
+    service.idle_timeout = 30
+    service.batch_size = 2
+    return service
+
+
+def connect(manager, user_id, last_seen):
+    ctx = ConnectionContext(make_ws(), User(f"user{user_id}", user_id))
+    ctx.last_seen = last_seen
+    manager.connections.add(ctx)
+    return ctx
+
+
+class TestSweep:
+    @pytest.mark.asyncio
+    async def test_fresh_connection_untouched(self, manager, heartbeat):
+        ctx = connect(manager, 1, last_seen=100)
+
+        assert await heartbeat.sweep(now=105) == (0, 0)
+        ctx.websocket.send_text.assert_not_called()
+        ctx.websocket.close.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_idle_connection_pinged(self, manager, heartbeat):
+        ctx = connect(manager, 1, last_seen=100)
+
+        assert await heartbeat.sweep(now=115) == (1, 0)
+        sent = ctx.websocket.send_text.call_args.args[0]
+        assert '"type":"ping"' in sent
+        assert manager.connections.get_by_user_id(1) is ctx
+
+    @pytest.mark.asyncio
+    async def test_dead_connections_reaped(self, manager, heartbeat):
+        dead = [connect(manager, i, last_seen=0) for i in range(1, 6)]
+        alive = connect(manager, 6, last_seen=100)
+
+        assert await heartbeat.sweep(now=105) == (0, 5)
+
+        for ctx in dead:
+            ctx.websocket.close.assert_awaited_once_with(
+                code=status.WS_1001_GOING_AWAY, reason="Idle timeout"
+            )
+            assert manager.connections.get_by_websocket(ctx.websocket) is None
+        assert manager.connections.count() == 1
+        assert manager.connections.get_by_user_id(6) is alive
+        assert manager.channel_srvc.disconnect.call_count == 5
+
+    @pytest.mark.asyncio
+    async def test_reap_survives_broken_close(self, manager, heartbeat):
+        ctx = connect(manager, 1, last_seen=0)
+        ctx.websocket.close.side_effect = RuntimeError("already closed")
+
+        assert await heartbeat.sweep(now=100) == (0, 1)
+        assert manager.connections.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_reap_keeps_newer_connection(self, manager, heartbeat):
+        """A reconnected User keeps its channels when the old socket is reaped."""
+        old = connect(manager, 1, last_seen=0)
+        new = connect(manager, 1, last_seen=100)
+
+        await heartbeat.sweep(now=100)
+
+        old.websocket.close.assert_awaited_once()
+        assert manager.connections.get_by_user_id(1) is new
+        manager.channel_srvc.disconnect.assert_not_called()
+
+
+class TestHandleMessage:
+    @pytest.mark.asyncio
+    async def test_any_frame_touches_connection(self, manager):
+        ctx = connect(manager, 1, last_seen=0)
+
+        await manager.handle_message(ctx.websocket, '{"type":"pong","payload":{}}')
+
+        assert ctx.last_seen > 0
+        ctx.websocket.send_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_client_ping_answered(self, manager):
+        ctx = connect(manager, 1, last_seen=0)
+
+        await manager.handle_message(ctx.websocket, '{"type":"ping","payload":{}}')
+        await ctx.inbox.flush()
+
+        sent = ctx.websocket.send_text.call_args.args[0]
+        assert '"type":"pong"' in sent
+
+
+class TestHelloTimeout:
+    @pytest.mark.asyncio
+    async def test_no_hello_closes_connection(self, manager, monkeypatch):
+        from chat_server.settings import get_settings
+
+        monkeypatch.setattr(get_settings(), "HELLO_TIMEOUT", 0.01)
+        ws = make_ws()
+
+        async def never():
+            await asyncio.sleep(10)
+
+        ws.receive_text = never
+
+        with pytest.raises(WebSocketDisconnect):
+            await manager.accept_connection(ws)
+
+        ws.close.assert_awaited_once_with(
+            code=status.WS_1008_POLICY_VIOLATION, reason="HELLO timeout"
+        )
+        assert manager.connections.count() == 0
@@ -0,0 +1,29 @@
+"""
+Tests for the time-ordered message ids.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from chat_server.ids import id_time, new_id
+
+
+class TestNewId:
+    def test_version_7(self):
+        id_ = new_id()
+
+        assert id_.version == 7
+        assert id_.variant == "specified in RFC 4122"
+
+    def test_strictly_increasing(self):
+        ids = [new_id() for _ in range(10000)]
+
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+        assert [str(id_) for id_ in ids] == sorted(str(id_) for id_ in ids)
+
+    def test_id_time(self):
+        before = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+        id_ = new_id()
+        after = datetime.now(timezone.utc) + timedelta(seconds=1)
+
+        assert before <= id_time(id_) <= after
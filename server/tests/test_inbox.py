@@ -0,0 +1,93 @@
+"""
+Tests for the pipelined receive loop (per connection Inbox).
+"""
+
+import asyncio
+
+import pytest
+
+from chat_server import metrics
+from chat_server.infrastructure.inbox import Inbox
+
+
+def recorder(log: list, name, delay: float = 0):
+    async def job():
+        await asyncio.sleep(delay)
+        log.append(name)
+
+    return job
+
+
+class TestInbox:
+    @pytest.mark.asyncio
+    async def test_same_key_in_order(self):
+        inbox = Inbox(lanes=4, capacity=10)
+        log = []
+
+        for i in range(5):
+            await inbox.put("channel", recorder(log, i, delay=(5 - i) / 1000))
+        await inbox.flush()
+
+        assert log == [0, 1, 2, 3, 4]
+        assert len(inbox) == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_key_does_not_block_others(self):
+        inbox = Inbox(lanes=2, capacity=10)
+        log = []
+
+        await inbox.put(0, recorder(log, "slow", delay=0.02))
+        await inbox.put(1, recorder(log, "fast"))
+        await inbox.flush()
+
+        assert log == ["fast", "slow"]
+
+    @pytest.mark.asyncio
+    async def test_full_inbox_pushes_back(self):
+        metrics.reset()
+        inbox = Inbox(lanes=1, capacity=2)
+        release = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+
+        await inbox.put(None, blocked)
+        await inbox.put(None, blocked)
+        third = asyncio.create_task(inbox.put(None, blocked))
+        await asyncio.sleep(0)
+
+        assert not third.done()
+        assert metrics.get("inbound.backpressure") == 1
+
+        release.set()
+        await third
+        await inbox.flush()
+
+    @pytest.mark.asyncio
+    async def test_failed_job_does_not_stop_lane(self):
+        inbox = Inbox(lanes=1, capacity=10)
+        log = []
+
+        async def fail():
+            raise ValueError("boom")
+
+        await inbox.put(None, fail)
+        await inbox.put(None, recorder(log, "after"))
+        await inbox.flush()
+
+        assert log == ["after"]
+
+    @pytest.mark.asyncio
+    async def test_close_drops_queued(self):
+        inbox = Inbox(lanes=1, capacity=10)
+        log = []
+
+        await inbox.put(None, recorder(log, 1, delay=0.01))
+        await inbox.put(None, recorder(log, 2))
+        await asyncio.sleep(0)
+        inbox.close()
+        await inbox.put(None, recorder(log, 3))
+        await asyncio.sleep(0.02)
+
+        assert log == []
+        assert len(inbox) == 0
@@ -0,0 +1,149 @@
+"""
+Tests for large channel mode: aggregated presence and paged member lists.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.connection.user import User
+from chat_server.handler.channel_handler import handler_member_list
+from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.protocol.messages import MemberList, MemberListPayload
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.membership_service import MembershipService
+from chat_server.services.message_broker import MessageBroker
+from chat_server.settings import get_settings
+
+
+@pytest.fixture(autouse=True)
+def small_thresholds(monkeypatch):
+    monkeypatch.setattr(get_settings(), "LARGE_CHANNEL_MEMBERS", 3)
+    monkeypatch.setattr(get_settings(), "LARGE_CHANNEL_EXIT_MEMBERS", 2)
+    monkeypatch.setattr(get_settings(), "LARGE_CHANNEL_PRESENCE_INTERVAL", 0.01)
+
+
+@pytest.fixture
+def manager():
+    registry = ConnectionRegistry()
+    broker = MessageBroker(registry)
+    channel_srvc = ChannelService(ChannelManager(), MembershipService(), broker)
+    return ConnectionManager(registry, AsyncMock(), broker, channel_srvc, AsyncMock())
+
+
+@pytest.fixture
+def srvc(manager):
+    return manager.channel_srvc
+
+
+def connect(manager, user_id):
+    ctx = ConnectionContext(AsyncMock(), User(f"user{user_id}", user_id))
+    manager.connections.add(ctx)
+    return ctx
+
+
+async def received(ctx) -> list[dict]:
+    await ctx.outbox.flush()
+    events = [
+        json.loads(call.args[0]) for call in ctx.websocket.send_text.await_args_list
+    ]
+    ctx.websocket.send_text.reset_mock()
+    return events
+
+
+async def wait_for_presence(srvc):
+    while srvc._presence_task is not None:
+        await asyncio.sleep(0.01)
+
+
+class TestLargeMode:
+    @pytest.mark.asyncio
+    async def test_switch_to_large(self, manager, srvc):
+        channel = srvc.get_or_create_channel(1)
+        members = [connect(manager, i) for i in range(1, 4)]
+        for ctx in members[:2]:
+            await srvc.join_channel(ctx.user, channel)
+        await received(members[0])
+
+        await srvc.join_channel(members[2].user, channel)
+
+        assert srvc.is_large(channel)
+        events = await received(members[0])
+        # Only the switch, no members list nor join alert
+        assert [event["type"] for event in events] == ["channel_presence"]
+        assert events[0]["payload"] == {"channel_id": 1, "count": 3, "large": True}
+
+    @pytest.mark.asyncio
+    async def test_presence_aggregated(self, manager, srvc):
+        channel = srvc.get_or_create_channel(1)
+        members = [connect(manager, i) for i in range(1, 7)]
+        for ctx in members[:3]:
+            await srvc.join_channel(ctx.user, channel)
+        await received(members[0])
+
+        for ctx in members[3:]:
+            await srvc.join_channel(ctx.user, channel)
+        # A new member gets the count right away
+        newest = await received(members[5])
+        assert newest[0]["payload"]["count"] == 6
+
+        await wait_for_presence(srvc)
+
+        events = await received(members[0])
+        assert [event["type"] for event in events] == ["channel_presence"]
+        assert events[0]["payload"]["count"] == 6
+
+    @pytest.mark.asyncio
+    async def test_hysteresis(self, manager, srvc):
+        channel = srvc.get_or_create_channel(1)
+        members = [connect(manager, i) for i in range(1, 4)]
+        for ctx in members:
+            await srvc.join_channel(ctx.user, channel)
+
+        # Still above the exit threshold
+        await srvc.leave_channel(members[2].user, channel)
+        assert srvc.is_large(channel)
+
+        await srvc.leave_channel(members[1].user, channel)
+        assert not srvc.is_large(channel)
+
+        await wait_for_presence(srvc)
+        events = await received(members[0])
+        # The switch back, then the members list
+        assert [event["type"] for event in events][-2:] == [
+            "channel_presence",
+            "channel_members",
+        ]
+        assert events[-2]["payload"]["large"] is False
+
+
+class TestMemberList:
+    @pytest.mark.asyncio
+    async def test_pages(self, manager, srvc, patched_session):
+        channel = srvc.get_or_create_channel(1)
+        members = [connect(manager, i) for i in range(1, 6)]
+        for ctx in members:
+            await srvc.join_channel(ctx.user, channel)
+        await received(members[0])
+
+        msg = MemberList(
+            timestamp=datetime.now(),
+            id=uuid4(),
+            payload=MemberListPayload(channel_id=1, offset=2, limit=2),
+        )
+        await handler_member_list(members[0], msg, manager)
+
+        [event] = await received(members[0])
+        assert event["type"] == "channel_member_list"
+        assert [m["username"] for m in event["payload"]["members"]] == [
+            "user3",
+            "user4",
+        ]
+        assert event["payload"]["total"] == 5
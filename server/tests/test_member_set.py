@@ -0,0 +1,48 @@
+"""
+Tests for the MemberSet membership index.
+"""
+
+from chat_server.infrastructure.member_set import MemberSet
+
+
+class TestMemberSet:
+    def test_add_and_discard(self):
+        members = MemberSet()
+
+        assert members.add(3)
+        assert members.add(1)
+        assert not members.add(3), "Adding an existing ID should return False"
+        assert list(members) == [1, 3], "IDs should be kept sorted"
+
+        assert members.discard(3)
+        assert not members.discard(3), "Removing a missing ID should return False"
+        assert 3 not in members
+        assert 1 in members
+        assert len(members) == 1
+
+    def test_snapshot_is_not_modified_by_later_changes(self):
+        members = MemberSet([1, 2, 3])
+
+        snapshot = members.snapshot()
+        members.add(4)
+        members.discard(1)
+
+        assert list(snapshot) == [1, 2, 3], "Snapshot changed after a mutation"
+        assert list(members) == [2, 3, 4]
+
+    def test_snapshot_is_not_copied(self):
+        members = MemberSet([1, 2, 3])
+
+        assert members.snapshot() is members.snapshot()
+
+    def test_set_algebra(self):
+        channel = MemberSet([1, 2, 3, 4, 5])
+        muted = MemberSet([2, 4, 6])
+
+        assert channel.difference(muted) == [1, 3, 5]
+        assert channel.difference({1, 5}) == [2, 3, 4]
+        assert channel.intersection(muted) == [2, 4]
+        assert channel.intersection([5, 6, 7]) == [5]
+
+    def test_contains_non_int(self):
+        assert "1" not in MemberSet([1])
@@ -0,0 +1,120 @@
+"""
+Tests for the MembershipService username index.
+"""
+
+import pytest
+
+from chat_server.connection.channel import Channel
+from chat_server.connection.user import User
+from chat_server.services.membership_service import MembershipService
+
+
+@pytest.fixture
+def membership():
+    return MembershipService()
+
+
+@pytest.fixture
+def channel():
+    return Channel(id=1, name="general")
+
+
+class TestFindMember:
+    def test_find_member(self, membership, channel):
+        alice = User("alice", 1)
+        membership.join(alice, channel)
+
+        assert membership.find_member(channel, "alice") is alice
+        assert membership.find_member(channel, "bob") is None
+
+    def test_find_member_after_leave(self, membership, channel):
+        alice = User("alice", 1)
+        membership.join(alice, channel)
+        membership.leave(alice, channel)
+
+        assert membership.find_member(channel, "alice") is None
+
+    def test_find_member_after_leave_all(self, membership, channel):
+        alice = User("alice", 1)
+        other = Channel(id=2, name="other")
+        membership.join(alice, channel)
+        membership.join(alice, other)
+        membership.leave_all(alice)
+
+        assert membership.find_member(channel, "alice") is None
+        assert membership.find_member(other, "alice") is None
+
+    def test_find_member_other_channel(self, membership, channel):
+        membership.join(User("alice", 1), Channel(id=2, name="other"))
+
+        assert membership.find_member(channel, "alice") is None
+
+
+class TestRename:
+    def test_rename_updates_every_channel(self, membership, channel):
+        alice = User("alice", 1)
+        other = Channel(id=2, name="other")
+        membership.join(alice, channel)
+        membership.join(alice, other)
+
+        membership.rename(alice.id, "alice2")
+
+        assert alice.username == "alice2"
+        for ch in (channel, other):
+            assert membership.find_member(ch, "alice") is None
+            assert membership.find_member(ch, "alice2") is alice
+
+    def test_leave_after_rename(self, membership, channel):
+        alice = User("alice", 1)
+        membership.join(alice, channel)
+        membership.rename(alice.id, "alice2")
+        membership.leave(alice, channel)
+
+        assert membership.find_member(channel, "alice2") is None
+        assert membership.search_members(channel, "", 10) == []
+
+
+class TestSearchMembers:
+    def test_prefix_search(self, membership, channel):
+        for i, name in enumerate(["bob", "Alice", "alex", "albert", "carol"]):
+            membership.join(User(name, i), channel)
+
+        found = membership.search_members(channel, "al", 10)
+
+        assert [u.username for u in found] == ["albert", "alex", "Alice"]
+
+    def test_prefix_search_limit(self, membership, channel):
+        for i in range(20):
+            membership.join(User(f"user{i:02}", i), channel)
+
+        found = membership.search_members(channel, "user", 5)
+
+        assert [u.username for u in found] == [f"user{i:02}" for i in range(5)]
+
+    def test_prefix_search_unknown_channel(self, membership, channel):
+        assert membership.search_members(channel, "a", 10) == []
+
+
+class TestEmptyChannels:
+    def test_last_leave_frees_channel(self, membership, channel):
+        alice, bob = User("alice", 1), User("bob", 2)
+        membership.join(alice, channel)
+        membership.join(bob, channel)
+
+        membership.leave(alice, channel)
+        assert membership.count_members(channel) == 1
+        assert membership.get_channels_in_use() == [channel]
+
+        membership.leave_all(bob)
+        assert membership.count_members(channel) == 0
+        assert membership.get_channels_in_use() == []
+        assert membership._channel_members == {}
+        assert membership._channel_usernames == {}
+
+    def test_rejoin_after_freed(self, membership, channel):
+        alice = User("alice", 1)
+        membership.join(alice, channel)
+        membership.leave(alice, channel)
+        membership.join(alice, channel)
+
+        assert membership.find_member(channel, "alice") is alice
@@ -0,0 +1,140 @@
+"""
+Tests for outbound priority lanes and load shedding.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import status
+
+from chat_server import metrics
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.user import User
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.infrastructure.outbox import Outbox, Priority
+from chat_server.protocol.messages import (
+    ChatSend,
+    ChatSendPayload,
+    TypingStart,
+    TypingStartPayload,
+    UserFrom,
+)
+from chat_server.services.message_broker import MessageBroker
+from chat_server.settings import get_settings
+
+
+def sent(websocket) -> list[str]:
+    return [call.args[0] for call in websocket.send_text.await_args_list]
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "OUTBOX_HIGH_CAPACITY", 4)
+    monkeypatch.setattr(settings, "OUTBOX_LOW_CAPACITY", 2)
+    return settings
+
+
+@pytest.fixture
+def outbox(mock_websocket):
+    outbox = Outbox(mock_websocket)
+    yield outbox
+    outbox.close()
+
+
+class TestOutbox:
+    @pytest.mark.asyncio
+    async def test_high_lane_first(self, outbox, mock_websocket, settings):
+        outbox.put("typing", Priority.LOW, "chat_typing")
+        outbox.put("chat", Priority.HIGH, "chat_send")
+
+        await outbox.flush()
+
+        assert sent(mock_websocket) == ["chat", "typing"]
+        assert len(outbox) == 0
+
+    @pytest.mark.asyncio
+    async def test_coalesce(self, outbox, mock_websocket, settings):
+        outbox.put("typing 1", Priority.LOW, "chat_typing", key="alice")
+        outbox.put("typing 2", Priority.LOW, "chat_typing", key="alice")
+
+        await outbox.flush()
+
+        assert sent(mock_websocket) == ["typing 2"]
+        assert metrics.get("outbound.coalesced.chat_typing") == 1
+
+    @pytest.mark.asyncio
+    async def test_low_lane_drops_oldest(self, outbox, mock_websocket, settings):
+        for i in range(4):
+            outbox.put(f"react {i}", Priority.LOW, "chat_react_add")
+
+        await outbox.flush()
+
+        assert sent(mock_websocket) == ["react 2", "react 3"]
+        assert metrics.get("outbound.dropped.chat_react_add") == 2
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_closed(self, outbox, mock_websocket, settings):
+        for i in range(5):
+            outbox.put(f"chat {i}", Priority.HIGH, "chat_send")
+
+        await outbox.flush()
+
+        assert outbox.closed
+        assert sent(mock_websocket) == []
+        mock_websocket.close.assert_awaited_once_with(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Too slow"
+        )
+        assert metrics.get("outbound.slow_consumer") == 1
+
+    @pytest.mark.asyncio
+    async def test_pending_total(self, outbox, settings):
+        before = Outbox.pending_total
+        outbox.put("chat", Priority.HIGH)
+        outbox.put("typing", Priority.LOW)
+
+        assert Outbox.pending_total == before + 2
+
+        outbox.close()
+        assert Outbox.pending_total == before
+
+
+class TestMessageBroker:
+    @pytest.fixture
+    def registry(self):
+        registry = ConnectionRegistry()
+        for i in range(1, 4):
+            ws = AsyncMock()
+            registry.add(ConnectionContext(ws, User(f"user{i}", i)))
+        return registry
+
+    @pytest.mark.asyncio
+    async def test_fan_out_encodes_once(self, registry):
+        broker = MessageBroker(registry)
+        msg = ChatSend(payload=ChatSendPayload(channel_id=1, content="hi"))
+
+        await broker.send_to_channel([1, 2, 3], msg)
+        await asyncio.gather(*(ctx.outbox.flush() for ctx in registry.get_all()))
+
+        payloads = [sent(ctx.websocket)[0] for ctx in registry.get_all()]
+        assert payloads[0] is payloads[1] is payloads[2]
+
+    @pytest.mark.asyncio
+    async def test_low_priority_shed_when_overloaded(
+        self, registry, settings, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "OUTBOUND_SHED_WATERMARK", 0)
+        broker = MessageBroker(registry)
+        typing = TypingStart(
+            payload=TypingStartPayload(channel_id=1, user=UserFrom(username="user1"))
+        )
+        chat = ChatSend(payload=ChatSendPayload(channel_id=1, content="hi"))
+
+        await broker.send_to_channel([1, 2, 3], typing)
+        await broker.send_to_channel([1, 2, 3], chat)
+        await asyncio.gather(*(ctx.outbox.flush() for ctx in registry.get_all()))
+
+        assert metrics.get("outbound.shed.chat_typing") == 3
+        for ctx in registry.get_all():
+            assert len(sent(ctx.websocket)) == 1
@@ -0,0 +1,155 @@
+"""
+Tests for presence: disconnect grace period and batched leaves.
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from chat_server import metrics
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.connection.user import User
+from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.membership_service import MembershipService
+from chat_server.services.message_broker import MessageBroker
+from chat_server.settings import get_settings
+
+
+@pytest.fixture(autouse=True)
+def short_grace(monkeypatch):
+    monkeypatch.setattr(get_settings(), "DISCONNECT_GRACE", 0.05)
+    monkeypatch.setattr(get_settings(), "PRESENCE_BATCH_WINDOW", 0.05)
+    monkeypatch.setattr(get_settings(), "PRESENCE_ALERT_LIMIT", 2)
+
+
+@pytest.fixture
+def manager():
+    registry = ConnectionRegistry()
+    broker = MessageBroker(registry)
+    channel_srvc = ChannelService(ChannelManager(), MembershipService(), broker)
+    return ConnectionManager(registry, AsyncMock(), broker, channel_srvc, AsyncMock())
+
+
+@pytest.fixture
+def srvc(manager):
+    return manager.channel_srvc
+
+
+def connect(manager, user_id):
+    ctx = ConnectionContext(AsyncMock(), User(f"user{user_id}", user_id))
+    manager.connections.add(ctx)
+    return ctx
+
+
+async def sent_types(ctx) -> list[str]:
+    await ctx.outbox.flush()
+    types = [
+        json.loads(call.args[0])["type"]
+        for call in ctx.websocket.send_text.await_args_list
+    ]
+    ctx.websocket.send_text.reset_mock()
+    return types
+
+
+async def wait_for_leaves(srvc):
+    while srvc._leave_task is not None:
+        await asyncio.sleep(0.01)
+
+
+class TestGracePeriod:
+    @pytest.mark.asyncio
+    async def test_leave_after_grace(self, manager, srvc):
+        channel = srvc.get_or_create_channel(1)
+        alice, bob = connect(manager, 1), connect(manager, 2)
+        await srvc.join_channel(alice.user, channel)
+        await srvc.join_channel(bob.user, channel)
+        await sent_types(alice)
+
+        manager.connections.remove(bob.websocket)
+        srvc.disconnect(bob.user)
+        assert srvc.is_member(bob.user, channel)
+
+        await wait_for_leaves(srvc)
+
+        assert not srvc.is_member(bob.user, channel)
+        assert await sent_types(alice) == ["channel_members", "channel_leave"]
+
+    @pytest.mark.asyncio
+    async def test_quick_reconnect_is_silent(self, manager, srvc):
+        channel = srvc.get_or_create_channel(1)
+        alice, bob = connect(manager, 1), connect(manager, 2)
+        await srvc.join_channel(alice.user, channel)
+        await srvc.join_channel(bob.user, channel)
+        await sent_types(alice)
+
+        manager.connections.remove(bob.websocket)
+        srvc.disconnect(bob.user)
+        bob = connect(manager, 2)
+        await srvc.reconnect(bob.user, {1: 0})
+        await srvc.join_channel(bob.user, channel)
+        await wait_for_leaves(srvc)
+
+        assert srvc.is_member(bob.user, channel)
+        assert await sent_types(alice) == []
+        # Only the reconnected User gets the members list
+        assert await sent_types(bob) == ["channel_members"]
+        assert metrics.get("presence.reconnected") == 1
+
+    @pytest.mark.asyncio
+    async def test_reconnect_leaves_channels_not_resumed(self, manager, srvc):
+        first = srvc.get_or_create_channel(1)
+        second = srvc.get_or_create_channel(2)
+        bob = connect(manager, 2)
+        await srvc.join_channel(bob.user, first)
+        await srvc.join_channel(bob.user, second)
+
+        manager.connections.remove(bob.websocket)
+        srvc.disconnect(bob.user)
+        bob = connect(manager, 2)
+        await srvc.reconnect(bob.user, {2: 0})
+
+        assert not srvc.is_member(bob.user, first)
+        assert srvc.is_member(bob.user, second)
+
+
+class TestBatchedLeaves:
+    @pytest.mark.asyncio
+    async def test_mass_disconnect_one_update(self, manager, srvc):
+        channel = srvc.get_or_create_channel(1)
+        alice = connect(manager, 1)
+        await srvc.join_channel(alice.user, channel)
+        others = [connect(manager, i) for i in range(2, 6)]
+        for ctx in others:
+            await srvc.join_channel(ctx.user, channel)
+        await sent_types(alice)
+
+        for ctx in others:
+            manager.connections.remove(ctx.websocket)
+            srvc.disconnect(ctx.user)
+        await wait_for_leaves(srvc)
+
+        # Past PRESENCE_ALERT_LIMIT, no individual leave alerts
+        assert await sent_types(alice) == ["channel_members"]
+        assert srvc.get_channel_members(channel) == [alice.user]
+        assert metrics.get("presence.alerts_suppressed") == 4
+
+    @pytest.mark.asyncio
+    async def test_few_leaves_alerted(self, srvc, manager):
+        channel = srvc.get_or_create_channel(1)
+        alice, bob, carol = (connect(manager, i) for i in range(1, 4))
+        for ctx in (alice, bob, carol):
+            await srvc.join_channel(ctx.user, channel)
+        await sent_types(alice)
+
+        await srvc.leave_users([bob.user, carol.user])
+
+        assert await sent_types(alice) == [
+            "channel_members",
+            "channel_leave",
+            "channel_leave",
+        ]
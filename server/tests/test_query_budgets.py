@@ -0,0 +1,285 @@
+"""
+SQL query budgets for every WebSocket operation and REST endpoint.
+
+Every operation declares the maximum number of SQL statements and database
+round-trips it may use. Adding a query (e.g. an N+1 lookup) to any of them
+fails these tests, raise the budget only if the extra query is intended.
+"""
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from chat_server.api.models import UserCreate
+from chat_server.connection.channel import Channel
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.connection.user import User
+from chat_server.db import crud
+from chat_server.handler import router
+from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.protocol.messages import (
+    ChannelJoin,
+    ChannelJoinPayload,
+    ChannelLeave,
+    ChannelLeavePayload,
+    ChannelSubscribe,
+    ChannelSubscribePayload,
+    ChatSend,
+    ChatSendPayload,
+    KickCommand,
+    KickCommandPayload,
+    MemberSearch,
+    MemberSearchPayload,
+    MuteCommand,
+    MuteCommandPayload,
+    ReactAdd,
+    ReactPayload,
+    SlowModeCommand,
+    SlowModePayload,
+    TypingStart,
+    TypingStartPayload,
+    UnMuteCommand,
+    UnMuteCommandPayload,
+)
+from chat_server.security.utils import generate_access_token
+from chat_server.services.authorization_service import AuthenticationService
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.membership_service import MembershipService
+from chat_server.services.message_broker import MessageBroker
+from chat_server.services.moderation_service import ModerationService
+from tests.conftest import QueryBudget
+
+QUERY_BUDGETS = {
+    # WebSocket
+    "hello_guest": QueryBudget(statements=3, round_trips=4),
+    "hello_token": QueryBudget(statements=1, round_trips=1),
+    # First use of the channels, their last sequence numbers are read
+    "channel_join": QueryBudget(statements=2, round_trips=2),
+    "channel_subscribe": QueryBudget(statements=2, round_trips=2),
+    "channel_leave": QueryBudget(statements=0, round_trips=0),
+    "chat_send": QueryBudget(statements=2, round_trips=3),
+    "chat_react": QueryBudget(statements=0, round_trips=0),
+    "chat_typing": QueryBudget(statements=1, round_trips=1),
+    "chat_kick": QueryBudget(statements=0, round_trips=0),
+    "chat_mute": QueryBudget(statements=2, round_trips=3),
+    "chat_unmute": QueryBudget(statements=1, round_trips=2),
+    "member_search": QueryBudget(statements=0, round_trips=0),
+    "chat_slowmode": QueryBudget(statements=0, round_trips=0),
+    # REST
+    "signup": QueryBudget(statements=2, round_trips=3),
+    "login": QueryBudget(statements=1, round_trips=1),
+    "list_users": QueryBudget(statements=3, round_trips=3),
+    "get_user": QueryBudget(statements=2, round_trips=2),
+    "get_user_messages": QueryBudget(statements=4, round_trips=4),
+    "update_user": QueryBudget(statements=5, round_trips=6),
+    "delete_user": QueryBudget(statements=2, round_trips=3),
+    "active_channels": QueryBudget(statements=1, round_trips=1),
+    "channel_members": QueryBudget(statements=1, round_trips=1),
+}
+
+API_URL = "/api/v1"
+
+
+@pytest_asyncio.fixture
+async def db_users(test_session):
+    """
+    Two registered users: an issuer and a target.
+    """
+    issuer = await crud.create_user(
+        test_session, UserCreate(username="issuer", password="Password1")
+    )
+    target = await crud.create_user(
+        test_session, UserCreate(username="target", password="Password1")
+    )
+    return (
+        User(issuer.username, issuer.id),  # type: ignore
+        User(target.username, target.id),  # type: ignore
+    )
+
+
+@pytest.fixture
+def manager(patched_session):
+    """
+    ConnectionManager wired with the real services.
+    """
+    registry = ConnectionRegistry()
+    broker = MessageBroker(registry)
+    channel_srvc = ChannelService(ChannelManager(), MembershipService(), broker)
+    return ConnectionManager(
+        registry,
+        AuthenticationService(),
+        broker,
+        channel_srvc,
+        ModerationService(),
+    )
+
+
+@pytest_asyncio.fixture
+async def ws_env(manager, db_users, mock_websocket):
+    """
+    Issuer and target connected and joined to channel 1.
+    """
+    issuer, target = db_users
+    channel = manager.channel_srvc.create_channel(Channel(id=1, name="Channel 1"))
+
+    ctx = ConnectionContext(mock_websocket, issuer)
+    manager.connections.add(ctx)
+    await manager.channel_srvc.join_channel(issuer, channel)
+    await manager.channel_srvc.join_channel(target, channel)
+    return ctx, target
+
+
+def _messages(target: User):
+    return {
+        "channel_join": ChannelJoin(payload=ChannelJoinPayload(channel_id=2)),
+        "channel_subscribe": ChannelSubscribe(
+            payload=ChannelSubscribePayload(channel_ids=[2, 3, 4])
+        ),
+        "chat_send": ChatSend(
+            payload=ChatSendPayload(channel_id=1, content="Hello, world!")
+        ),
+        "chat_react": ReactAdd(
+            payload=ReactPayload(emote=":+1:", message_id=uuid4(), channel_id=1)
+        ),
+        "chat_typing": TypingStart(payload=TypingStartPayload(channel_id=1)),
+        "chat_mute": MuteCommand(
+            payload=MuteCommandPayload(
+                channel_id=1, target=target.username, duration=60
+            )
+        ),
+        "chat_unmute": UnMuteCommand(
+            payload=UnMuteCommandPayload(channel_id=1, target=target.username)
+        ),
+        "chat_kick": KickCommand(
+            payload=KickCommandPayload(channel_id=1, target=target.username)
+        ),
+        "channel_leave": ChannelLeave(payload=ChannelLeavePayload(channel_id=1)),
+        "member_search": MemberSearch(
+            payload=MemberSearchPayload(channel_id=1, prefix="tar")
+        ),
+        "chat_slowmode": SlowModeCommand(
+            payload=SlowModePayload(channel_id=1, interval=10)
+        ),
+    }
+
+
+class TestWebSocketQueryBudgets:
+    """
+    Query budgets of the WebSocket handlers, dispatched through the router.
+    """
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "operation",
+        [
+            "channel_join",
+            "channel_subscribe",
+            "chat_send",
+            "chat_react",
+            "chat_typing",
+            "chat_mute",
+            "chat_unmute",
+            "chat_kick",
+            "channel_leave",
+            "member_search",
+            "chat_slowmode",
+        ],
+    )
+    async def test_handler_budget(self, operation, ws_env, manager, query_budget):
+        ctx, target = ws_env
+        msg = _messages(target)[operation]
+
+        ctx.websocket.send_text.reset_mock()
+
+        with query_budget(QUERY_BUDGETS[operation]):
+            await router.dispatch(ctx, msg, manager)
+
+        # The handler must have succeeded, not bailed out early with an error
+        sent = [call.args[0] for call in ctx.websocket.send_text.call_args_list]
+        assert not any('"type":"error"' in data for data in sent)
+
+    @pytest.mark.asyncio
+    async def test_hello_guest_budget(self, manager, query_budget):
+        with query_budget(QUERY_BUDGETS["hello_guest"]):
+            user = await manager.auth.authenticate(None)
+        assert user.is_guest
+
+    @pytest.mark.asyncio
+    async def test_hello_token_budget(self, manager, db_users, query_budget):
+        issuer, _ = db_users
+        token = generate_access_token(issuer.id, timedelta(minutes=15))
+
+        with query_budget(QUERY_BUDGETS["hello_token"]):
+            user = await manager.auth.authenticate(token)
+        assert user.username == issuer.username
+
+
+class TestRestQueryBudgets:
+    """
+    Query budgets of the REST endpoints, including the authentication lookup.
+    """
+
+    @pytest_asyncio.fixture
+    async def headers(self, db_users):
+        issuer, _ = db_users
+        token = generate_access_token(issuer.id, timedelta(minutes=15))
+        return {"Authorization": f"Bearer {token}"}
+
+    @pytest.mark.asyncio
+    async def test_signup_budget(self, test_client: AsyncClient, query_budget):
+        with query_budget(QUERY_BUDGETS["signup"]):
+            response = await test_client.post(
+                f"{API_URL}/auth/signup",
+                json={"username": "newuser", "password": "Password1"},
+            )
+        assert response.status_code == 201
+
+    @pytest.mark.asyncio
+    async def test_login_budget(self, test_client: AsyncClient, db_users, query_budget):
+        with query_budget(QUERY_BUDGETS["login"]):
+            response = await test_client.post(
+                f"{API_URL}/auth/login",
+                data={"username": "issuer", "password": "Password1"},
+            )
+        assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "operation, method, url, body, status",
+        [
+            ("list_users", "GET", "/dashboard/users/", None, 200),
+            ("get_user", "GET", "/dashboard/users/2", None, 200),
+            ("get_user_messages", "GET", "/dashboard/users/2/messages", None, 200),
+            (
+                "update_user",
+                "PATCH",
+                "/dashboard/users/2",
+                {"username": "renamed"},
+                200,
+            ),
+            ("delete_user", "DELETE", "/dashboard/users/2", None, 204),
+            ("active_channels", "GET", "/dashboard/channels/active", None, 200),
+            ("channel_members", "GET", "/dashboard/channels/members/1", None, 404),
+        ],
+    )
+    async def test_dashboard_budget(
+        self,
+        operation,
+        method,
+        url,
+        body,
+        status,
+        test_client: AsyncClient,
+        headers,
+        query_budget,
+    ):
+        with query_budget(QUERY_BUDGETS[operation]):
+            response = await test_client.request(
+                method, f"{API_URL}{url}", json=body, headers=headers
+            )
+        assert response.status_code == status
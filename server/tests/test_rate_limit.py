@@ -0,0 +1,148 @@
+"""
+Tests for inbound rate limiting.
+"""
+
+import pytest
+
+from chat_server import metrics
+from chat_server.connection.channel import Channel
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.user import User
+from chat_server.handler import rate_limit, router
+from chat_server.infrastructure.rate_limiter import RateLimiter
+from chat_server.protocol.messages import (
+    ChatSend,
+    ChatSendPayload,
+    TypingStart,
+    TypingStartPayload,
+)
+
+
+def chat_send(channel_id=1):
+    return ChatSend(payload=ChatSendPayload(channel_id=channel_id, content="spam"))
+
+
+class TestRateLimiter:
+    def test_per_key(self):
+        limiter = RateLimiter(rate=1, capacity=2)
+
+        assert [limiter.allow("a", now=0) for _ in range(3)] == [True, True, False]
+        assert limiter.allow("b", now=0)
+        assert limiter.allow("a", now=1)
+
+    def test_idle_keys_evicted(self):
+        limiter = RateLimiter(rate=1, capacity=1)
+        for i in range(10):
+            limiter.allow(i, now=0)
+
+        # Every bucket refilled, each call evicts some of them
+        for _ in range(5):
+            limiter.allow("active", now=10)
+
+        assert len(limiter) == 1
+
+    def test_max_keys(self):
+        limiter = RateLimiter(rate=1, capacity=1, max_keys=3)
+        for i in range(10):
+            limiter.allow(i, now=0)
+
+        assert len(limiter) <= 4
+
+
+def rate_limited(manager):
+    return [
+        call
+        for call in manager.send_error.await_args_list
+        if call.args[1] == "Rate limit exceeded"
+    ]
+
+
+class TestDispatch:
+    @pytest.mark.asyncio
+    async def test_chat_send_limited(self, mock_websocket, test_user, mock_manager):
+        ctx = ConnectionContext(mock_websocket, test_user)
+        rate_limit.rate_limiter._user[chat_send().type] = RateLimiter(0.001, 3)
+
+        for _ in range(4):
+            await router.dispatch(ctx, chat_send(), mock_manager)
+
+        assert len(rate_limited(mock_manager)) == 1
+        assert metrics.get("rate_limited.user.chat_send") == 1
+
+    @pytest.mark.asyncio
+    async def test_typing_dropped_silently(
+        self, mock_websocket, test_user, mock_manager
+    ):
+        ctx = ConnectionContext(mock_websocket, test_user)
+        typing = TypingStart(payload=TypingStartPayload(channel_id=1))
+
+        for _ in range(10):
+            await router.dispatch(ctx, typing, mock_manager)
+
+        assert rate_limited(mock_manager) == []
+        assert metrics.get("rate_limited.user.chat_typing") > 0
+
+    @pytest.mark.asyncio
+    async def test_channel_limit(self, mock_websocket, mock_manager):
+        rate_limit.rate_limiter._channel[chat_send().type] = RateLimiter(0.001, 3)
+
+        for i in range(4):
+            ctx = ConnectionContext(mock_websocket, User(f"user{i}", i + 1))
+            await router.dispatch(ctx, chat_send(), mock_manager)
+
+        assert metrics.get("rate_limited.channel.chat_send") == 1
+        assert metrics.get("rate_limited.user.chat_send") == 0
+
+    @pytest.mark.asyncio
+    async def test_non_member_spends_no_channel_budget(
+        self, mock_websocket, mock_manager
+    ):
+        rate_limit.rate_limiter._channel[chat_send().type] = RateLimiter(0.001, 1)
+        mock_manager.channel_srvc.is_member.return_value = False
+
+        outsider = ConnectionContext(mock_websocket, User("outsider", 1))
+        for _ in range(5):
+            await router.dispatch(outsider, chat_send(), mock_manager)
+
+        mock_manager.channel_srvc.is_member.return_value = True
+        member = ConnectionContext(mock_websocket, User("member", 2))
+        await router.dispatch(member, chat_send(), mock_manager)
+
+        assert metrics.get("rate_limited.channel.chat_send") == 0
+
+    @pytest.mark.asyncio
+    async def test_muted_spends_no_channel_budget(self, mock_websocket, mock_manager):
+        rate_limit.rate_limiter._channel[chat_send().type] = RateLimiter(0.001, 1)
+        mock_manager.moderation.is_muted.return_value = True
+
+        muted = ConnectionContext(mock_websocket, User("muted", 1))
+        for _ in range(5):
+            await router.dispatch(muted, chat_send(), mock_manager)
+
+        mock_manager.moderation.is_muted.return_value = False
+        member = ConnectionContext(mock_websocket, User("member", 2))
+        await router.dispatch(member, chat_send(), mock_manager)
+
+        assert metrics.get("rate_limited.channel.chat_send") == 0
+
+    @pytest.mark.asyncio
+    async def test_channel_rejection_keeps_user_token(
+        self, mock_websocket, test_user, mock_manager
+    ):
+        rate_limit.rate_limiter._user[chat_send().type] = RateLimiter(0.001, 1)
+        channel_limiter = RateLimiter(0.001, 1)
+        channel_limiter.allow(1)
+        rate_limit.rate_limiter._channel[chat_send().type] = channel_limiter
+
+        mock_manager.channel_srvc.get_channel_by_id.side_effect = lambda id: Channel(
+            id=id, name=f"Channel {id}"
+        )
+
+        ctx = ConnectionContext(mock_websocket, test_user)
+        await router.dispatch(ctx, chat_send(channel_id=1), mock_manager)
+        # The User still has its token for another channel
+        await router.dispatch(ctx, chat_send(channel_id=2), mock_manager)
+
+        assert metrics.get("rate_limited.channel.chat_send") == 1
+        assert metrics.get("rate_limited.user.chat_send") == 0
+        assert len(rate_limited(mock_manager)) == 1
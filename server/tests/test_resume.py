@@ -0,0 +1,238 @@
+"""
+Tests for session resume: per-channel sequence numbers and replay.
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from chat_server.connection.channel import Channel
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.manager import ConnectionManager
+from chat_server.connection.user import User
+from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.infrastructure.replay_log import ReplayLog
+from chat_server.protocol.messages import (
+    ChatSend,
+    ChatSendPayload,
+    ReactAdd,
+    ReactPayload,
+    TypingStart,
+    TypingStartPayload,
+    UserFrom,
+)
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.membership_service import MembershipService
+from chat_server.services.message_broker import MessageBroker
+
+
+class TestReplayLog:
+    def make_log(self, size=3, ttl=100, events=5):
+        log = ReplayLog(size, ttl)
+        for i in range(events):
+            log.append(log.next_seq(), f"event {i + 1}", now=i)
+        return log
+
+    def test_since(self):
+        log = self.make_log()
+
+        assert log.since(3, now=5) == ["event 4", "event 5"]
+        assert log.since(5, now=5) == []
+
+    def test_gap_aged_out_by_size(self):
+        log = self.make_log()
+
+        assert log.since(2, now=5) == ["event 3", "event 4", "event 5"]
+        assert log.since(1, now=5) is None
+
+    def test_gap_aged_out_by_ttl(self):
+        log = self.make_log(size=10, ttl=2)
+
+        assert log.since(2, now=5) is None
+        assert log.since(3, now=5) == ["event 4", "event 5"]
+
+    def test_unknown_seq(self):
+        log = self.make_log()
+
+        assert log.since(42, now=5) is None
+        assert log.since(-1, now=5) is None
+
+    def test_out_of_order_append(self):
+        log = ReplayLog(3, 100)
+        first, second = log.next_seq(), log.next_seq()
+
+        log.append(second, "event 2", now=0)
+        log.append(first, "event 1", now=0)
+
+        assert log.since(0, now=0) == ["event 1", "event 2"]
+
+
+def chat(content: str, channel_id: int = 1):
+    return ChatSend(
+        payload=ChatSendPayload(
+            channel_id=channel_id, sender=UserFrom(username="alice"), content=content
+        )
+    )
+
+
+@pytest.fixture
+def channel_srvc():
+    registry = ConnectionRegistry()
+    srvc = ChannelService(ChannelManager(), MembershipService(), MessageBroker(registry))
+    srvc.create_channel(Channel(id=1, name="Channel 1"))
+    srvc.create_channel(Channel(id=2, name="Channel 2"))
+    return srvc
+
+
+@pytest.fixture
+def manager(channel_srvc):
+    registry = channel_srvc._broker._registry
+    auth = AsyncMock()
+    auth.authenticate = AsyncMock(return_value=User("alice", 1))
+    return ConnectionManager(
+        registry, auth, channel_srvc._broker, channel_srvc, AsyncMock()
+    )
+
+
+def hello_ws(resume: dict[int, int]):
+    ws = AsyncMock()
+    ws.client = SimpleNamespace(host="10.0.0.1", port=1234)
+    hello = {"type": "hello", "payload": {"resume": resume}}
+    ws.receive_text = AsyncMock(return_value=json.dumps(hello))
+    return ws
+
+
+async def received(ctx: ConnectionContext) -> list[dict]:
+    await ctx.outbox.flush()
+    return [json.loads(c.args[0]) for c in ctx.websocket.send_text.await_args_list]
+
+
+class TestSequenceNumbers:
+    @pytest.mark.asyncio
+    async def test_consecutive_per_channel(self, channel_srvc):
+        ch1, ch2 = Channel(id=1, name=""), Channel(id=2, name="")
+        messages = [chat("a"), chat("b"), chat("c", 2)]
+
+        await channel_srvc.send_to_channel(ch1, messages[0])
+        await channel_srvc.send_to_channel(ch1, messages[1])
+        await channel_srvc.send_to_channel(ch2, messages[2])
+
+        assert [m.seq for m in messages] == [1, 2, 1]
+
+    @pytest.mark.asyncio
+    async def test_reserved_seq_kept(self, channel_srvc):
+        ch1 = Channel(id=1, name="")
+        stored = chat("stored")
+        stored.seq = channel_srvc.next_seq(ch1)
+        other = chat("other")
+
+        await channel_srvc.send_to_channel(ch1, other)
+        await channel_srvc.send_to_channel(ch1, stored)
+
+        assert (stored.seq, other.seq) == (1, 2)
+        assert len(channel_srvc.replay(ch1, 0)) == 2
+
+    @pytest.mark.asyncio
+    async def test_seeded_seqs_continue(self, channel_srvc):
+        ch1, ch3 = Channel(id=1, name=""), Channel(id=3, name="")
+        await channel_srvc.send_to_channel(ch1, chat("a"))
+        channel_srvc.seed_seq(1, 41)
+        channel_srvc.seed_seq(3, 41)
+        messages = [chat("b"), chat("c", 3)]
+
+        await channel_srvc.send_to_channel(ch1, messages[0])
+        await channel_srvc.send_to_channel(ch3, messages[1])
+
+        # Already numbered, left as it is
+        assert [m.seq for m in messages] == [2, 42]
+
+    @pytest.mark.asyncio
+    async def test_typing_not_sequenced(self, channel_srvc):
+        ch1 = Channel(id=1, name="")
+        typing = TypingStart(payload=TypingStartPayload(channel_id=1))
+
+        await channel_srvc.send_to_channel(ch1, typing)
+
+        assert typing.seq is None
+        assert channel_srvc.replay(ch1, 0) == []
+
+    @pytest.mark.asyncio
+    async def test_reactions_not_sequenced(self, channel_srvc):
+        """Low priority, they can be sent after later events, or dropped."""
+        ch1 = Channel(id=1, name="")
+        react = ReactAdd(
+            payload=ReactPayload(emote=":+1:", message_id=uuid4(), channel_id=1)
+        )
+
+        await channel_srvc.send_to_channel(ch1, react)
+
+        assert react.seq is None
+        assert channel_srvc.replay(ch1, 0) == []
+
+
+class TestResume:
+    @pytest.mark.asyncio
+    async def test_resume_replays_gap(self, manager, channel_srvc):
+        ch1 = Channel(id=1, name="")
+        for content in ("seen", "missed 1", "missed 2"):
+            await channel_srvc.send_to_channel(ch1, chat(content))
+
+        ws = hello_ws({1: 1})
+        await manager.accept_connection(ws)
+        events = await received(manager.connections.get_by_websocket(ws))
+
+        # HELLO, the resume notice, then the gap, then the join
+        assert events[1]["type"] == "channel_resume"
+        assert events[1]["payload"] == {
+            "channel_id": 1,
+            "last_seq": 1,
+            "snapshot": False,
+        }
+        chats = [e["payload"]["content"] for e in events if e["type"] == "chat_send"]
+        assert chats == ["missed 1", "missed 2"]
+        assert [e["seq"] for e in events if e["type"] == "chat_send"] == [2, 3]
+        assert channel_srvc.is_member(User("alice", 1), ch1)
+
+    @pytest.mark.asyncio
+    async def test_resume_falls_back_to_snapshot(
+        self, manager, channel_srvc, patched_session
+    ):
+        ws = hello_ws({2: 7})
+        await manager.accept_connection(ws)
+        events = await received(manager.connections.get_by_websocket(ws))
+
+        assert events[1]["type"] == "channel_resume"
+        assert events[1]["payload"]["snapshot"] is True
+        assert channel_srvc.is_member(User("alice", 1), Channel(id=2, name=""))
+
+    @pytest.mark.asyncio
+    async def test_event_during_resume_sent_once(self, manager, channel_srvc):
+        alice, ch1 = User("alice", 1), Channel(id=1, name="")
+        await channel_srvc.join_channel(alice, ch1)
+        seen = chat("seen")
+        await channel_srvc.send_to_channel(ch1, seen)
+        await channel_srvc.send_to_channel(ch1, chat("missed"))
+        # Disconnected, still a member within its grace period
+        channel_srvc.disconnect(alice)
+
+        reconnect = channel_srvc.reconnect
+
+        async def reconnect_then_send(user, channel_ids):
+            await reconnect(user, channel_ids)
+            # Registered, its replay not sent yet
+            await channel_srvc.send_to_channel(ch1, chat("live"))
+
+        channel_srvc.reconnect = reconnect_then_send
+
+        ws = hello_ws({1: seen.seq})
+        await manager.accept_connection(ws)
+        events = await received(manager.connections.get_by_websocket(ws))
+
+        chats = [e for e in events if e["type"] == "chat_send"]
+        assert [e["payload"]["content"] for e in chats] == ["missed", "live"]
+        assert [e["seq"] for e in chats] == [seen.seq + 1, seen.seq + 2]
+        assert channel_srvc._resuming == {}
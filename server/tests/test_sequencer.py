@@ -0,0 +1,129 @@
+"""
+Tests for the per-channel Sequencer.
+"""
+
+import asyncio
+
+import pytest
+
+from chat_server.connection.channel import Channel
+from chat_server.infrastructure.channel_manager import ChannelManager
+from chat_server.infrastructure.connection_registry import ConnectionRegistry
+from chat_server.infrastructure.sequencer import Sequencer
+from chat_server.services.channel_service import ChannelService
+from chat_server.services.membership_service import MembershipService
+from chat_server.services.message_broker import MessageBroker
+
+
+def recorder(log: list, name: str, delay: float = 0):
+    async def job():
+        await asyncio.sleep(delay)
+        log.append(name)
+        return name
+
+    return job
+
+
+class TestSequencer:
+    @pytest.mark.asyncio
+    async def test_submission_order(self):
+        sequencer = Sequencer()
+        log = []
+
+        # The first job is the slowest, it still finishes first
+        results = await asyncio.gather(
+            *(
+                sequencer.submit(recorder(log, i, delay=(5 - i) / 1000))
+                for i in range(5)
+            )
+        )
+
+        assert log == [0, 1, 2, 3, 4]
+        assert results == [0, 1, 2, 3, 4]
+        assert sequencer.idle()
+
+    @pytest.mark.asyncio
+    async def test_error_does_not_stop_worker(self):
+        sequencer = Sequencer()
+        log = []
+
+        async def fail():
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            sequencer.submit(fail),
+            sequencer.submit(recorder(log, "after")),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], ValueError)
+        assert results[1] == "after"
+
+    @pytest.mark.asyncio
+    async def test_nested_submit_runs_inline(self):
+        sequencer = Sequencer()
+        log = []
+
+        async def outer():
+            await sequencer.submit(recorder(log, "inner"))
+            log.append("outer")
+
+        await asyncio.wait_for(sequencer.submit(outer), timeout=1)
+
+        assert log == ["inner", "outer"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_submission_skipped(self):
+        sequencer = Sequencer()
+        log = []
+
+        first = asyncio.create_task(sequencer.submit(recorder(log, 1, delay=0.01)))
+        second = asyncio.create_task(sequencer.submit(recorder(log, 2)))
+        await asyncio.sleep(0)
+        second.cancel()
+        await first
+
+        assert log == [1]
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_pending(self):
+        sequencer = Sequencer()
+
+        first = asyncio.create_task(sequencer.submit(recorder([], 1, delay=1)))
+        second = asyncio.create_task(sequencer.submit(recorder([], 2)))
+        await asyncio.sleep(0)
+        sequencer.close()
+
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+
+class TestChannelSequencers:
+    @pytest.fixture
+    def channel_srvc(self):
+        registry = ConnectionRegistry()
+        return ChannelService(
+            ChannelManager(), MembershipService(), MessageBroker(registry)
+        )
+
+    @pytest.mark.asyncio
+    async def test_channels_run_concurrently(self, channel_srvc):
+        ch1, ch2 = Channel(id=1, name=""), Channel(id=2, name="")
+        log = []
+
+        await asyncio.gather(
+            channel_srvc.run_in_order(ch1, recorder(log, "slow", delay=0.02)),
+            channel_srvc.run_in_order(ch2, recorder(log, "fast")),
+        )
+
+        assert log == ["fast", "slow"]
+
+    @pytest.mark.asyncio
+    async def test_idle_sequencer_dropped(self, channel_srvc):
+        ch1 = Channel(id=1, name="")
+
+        await channel_srvc.run_in_order(ch1, recorder([], "job"))
+
+        assert channel_srvc._sequencers == {}
@@ -0,0 +1,147 @@
+"""
+Tests for channel slow mode.
+"""
+
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from chat_server.connection.context import ConnectionContext
+from chat_server.connection.user import User
+from chat_server.handler.chat_handler import handler_chat_send
+from chat_server.handler.commands_handler import handler_slowmode
+from chat_server.protocol.messages import (
+    ChatSend,
+    ChatSendPayload,
+    SlowModeCommand,
+    SlowModePayload,
+)
+from chat_server.services.slowmode_service import SlowModeService
+
+
+def chat_send():
+    return ChatSend(
+        timestamp=datetime.now(),
+        id=uuid4(),
+        payload=ChatSendPayload(channel_id=1, content="Hello"),
+    )
+
+
+@pytest.fixture
+def slowmode():
+    service = SlowModeService()
+    service.auto_threshold = 10
+    service.auto_interval = 5
+    service.window = 1
+    return service
+
+
+class TestSlowModeService:
+    def test_off_by_default(self, slowmode, test_user, test_channel):
+        slowmode.record(test_user, test_channel, now=0)
+
+        assert slowmode.retry_after(test_user, test_channel, now=0) == 0
+
+    def test_interval(self, slowmode, test_user, test_channel):
+        slowmode.set_interval(test_channel, 10)
+        slowmode.record(test_user, test_channel, now=100)
+
+        assert slowmode.retry_after(test_user, test_channel, now=104) == 6
+        assert slowmode.retry_after(test_user, test_channel, now=110) == 0
+
+    def test_per_user_not_per_connection(self, slowmode, test_user, test_channel):
+        slowmode.set_interval(test_channel, 10)
+        slowmode.record(test_user, test_channel, now=100)
+
+        # Same User on a new connection (reconnect, second tab)
+        same_user = User(test_user.username, test_user.id)
+        assert slowmode.retry_after(same_user, test_channel, now=101) == 9
+        assert slowmode.retry_after(User("other", 99), test_channel, now=101) == 0
+
+    def test_cleared_when_turned_off_or_evicted(
+        self, slowmode, test_user, test_channel
+    ):
+        slowmode.set_interval(test_channel, 10)
+        slowmode.record(test_user, test_channel, now=100)
+        slowmode.set_interval(test_channel, 0)
+        slowmode.set_interval(test_channel, 10)
+        assert slowmode.retry_after(test_user, test_channel, now=101) == 0
+
+        slowmode.record(test_user, test_channel, now=101)
+        slowmode.forget([test_channel])
+        slowmode.set_interval(test_channel, 10)
+        assert slowmode.retry_after(test_user, test_channel, now=102) == 0
+
+    def test_auto_on_and_off(self, slowmode, test_user, test_channel):
+        slowmode._state(test_channel, 0)
+
+        # 20 messages/s, over the threshold
+        changed = [slowmode.record(test_user, test_channel, now=i / 20) for i in range(21)]
+        assert changed.count(True) == 1
+        assert slowmode.get_interval(test_channel) == 5
+        assert slowmode.is_auto(test_channel)
+
+        # Quiet window, under half the threshold
+        assert slowmode.record(test_user, test_channel, now=10)
+        assert slowmode.get_interval(test_channel) == 0
+        assert not slowmode.is_auto(test_channel)
+
+    def test_auto_does_not_override_manual(self, slowmode, test_user, test_channel):
+        slowmode._state(test_channel, 0)
+        slowmode.set_interval(test_channel, 30)
+
+        for i in range(21):
+            slowmode.record(test_user, test_channel, now=i / 20)
+        slowmode.record(test_user, test_channel, now=10)
+
+        assert slowmode.get_interval(test_channel) == 30
+
+
+class TestSlowModeHandlers:
+    @pytest.mark.asyncio
+    async def test_second_message_blocked(
+        self, mock_websocket, test_user, test_channel, mock_manager, patched_session
+    ):
+        ctx = ConnectionContext(mock_websocket, test_user)
+        mock_manager.channel_srvc.get_channel_by_id.return_value = test_channel
+        mock_manager.channel_srvc.is_member.return_value = True
+        mock_manager.moderation.is_muted.return_value = False
+        mock_manager.slowmode.set_interval(test_channel, 60)
+
+        await handler_chat_send(ctx, chat_send(), mock_manager)
+        await handler_chat_send(ctx, chat_send(), mock_manager)
+
+        mock_manager.channel_srvc.send_to_channel.assert_called_once()
+        detail = mock_manager.send_error.call_args.args[1]
+        assert detail.startswith("Slow mode is on")
+
+    @pytest.mark.asyncio
+    async def test_slowmode_command_broadcast(
+        self, mock_websocket, test_user, test_channel, mock_manager
+    ):
+        ctx = ConnectionContext(mock_websocket, test_user)
+        mock_manager.channel_srvc.get_channel_by_id.return_value = test_channel
+        mock_manager.channel_srvc.is_member.return_value = True
+        msg = SlowModeCommand(payload=SlowModePayload(channel_id=1, interval=15))
+
+        await handler_slowmode(ctx, msg, mock_manager)
+
+        assert mock_manager.slowmode.get_interval(test_channel) == 15
+        sent = mock_manager.channel_srvc.send_to_channel.call_args.args[1]
+        assert sent.payload.interval == 15
+        assert sent.payload.auto is False
+
+    @pytest.mark.asyncio
+    async def test_slowmode_command_no_permission(
+        self, mock_websocket, guest_user, test_channel, mock_manager
+    ):
+        ctx = ConnectionContext(mock_websocket, guest_user)
+        mock_manager.channel_srvc.get_channel_by_id.return_value = test_channel
+        mock_manager.channel_srvc.is_member.return_value = True
+        msg = SlowModeCommand(payload=SlowModePayload(channel_id=1, interval=15))
+
+        await handler_slowmode(ctx, msg, mock_manager)
+
+        assert mock_manager.slowmode.get_interval(test_channel) == 0
+        mock_manager.channel_srvc.send_to_channel.assert_not_called()
@@ -0,0 +1,124 @@
+"""
+Tests for the on-disk write spool.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from chat_server.ids import new_id
+from chat_server.infrastructure.write_spool import WriteSpool
+from chat_server.protocol.messages import ChatSend, ChatSendPayload, UserFrom
+
+
+def chat(seq: int, channel_id: int = 1) -> ChatSend:
+    return ChatSend(
+        timestamp=datetime.now(),
+        id=new_id(),
+        seq=seq,
+        payload=ChatSendPayload(
+            channel_id=channel_id, sender=UserFrom(username="alice"), content=str(seq)
+        ),
+    )
+
+
+def segments(spool: WriteSpool):
+    return sorted(p.name for p in spool.directory.glob("spool-*.log"))
+
+
+class TestWriteSpool:
+    @pytest.mark.asyncio
+    async def test_survives_restart(self, tmp_path):
+        spool = WriteSpool(tmp_path, capacity=10)
+        messages = [chat(1), chat(2)]
+        for message in messages:
+            spool.append(message, sender_id=7)
+        await spool.close()
+
+        reloaded = WriteSpool(tmp_path, capacity=10)
+
+        assert reloaded.peek(10) == [(message, 7) for message in messages]
+
+    @pytest.mark.asyncio
+    async def test_sync_persists(self, tmp_path):
+        spool = WriteSpool(tmp_path, capacity=10, sync_interval=0)
+        spool.append(chat(1), sender_id=7)
+
+        await spool.sync()
+
+        path = spool.directory / segments(spool)[0]
+        assert len(path.read_text().splitlines()) == 1
+        await spool.close()
+
+    @pytest.mark.asyncio
+    async def test_segments_rotated_and_deleted(self, tmp_path):
+        spool = WriteSpool(tmp_path, capacity=10, segment_bytes=1)
+        for seq in range(1, 4):
+            spool.append(chat(seq), sender_id=7)
+        assert len(segments(spool)) == 3
+
+        spool.discard(2)
+        assert segments(spool) == ["spool-00000003.log"]
+
+        spool.discard(1)
+        spool.append(chat(4), sender_id=7)
+        assert segments(spool) == ["spool-00000004.log"]
+        await spool.close()
+
+    @pytest.mark.asyncio
+    async def test_torn_line_skipped(self, tmp_path):
+        spool = WriteSpool(tmp_path, capacity=10)
+        spool.append(chat(1), sender_id=7)
+        await spool.close()
+        with (spool.directory / segments(spool)[0]).open("a") as f:
+            f.write('7\t{"type": "chat_se')
+
+        reloaded = WriteSpool(tmp_path, capacity=10)
+
+        assert len(reloaded) == 1
+
+    @pytest.mark.asyncio
+    async def test_capacity(self, tmp_path):
+        spool = WriteSpool(tmp_path, capacity=1)
+
+        assert spool.append(chat(1), sender_id=7)
+        assert not spool.append(chat(2), sender_id=7)
+        await spool.close()
+
+    @pytest.mark.asyncio
+    async def test_last_seqs(self, tmp_path):
+        spool = WriteSpool(tmp_path, capacity=10)
+        for seq, channel_id in [(4, 1), (9, 2), (5, 1)]:
+            spool.append(chat(seq, channel_id), sender_id=7)
+
+        assert spool.last_seqs() == {1: 5, 2: 9}
+        await spool.close()
+
+    @pytest.mark.asyncio
+    async def test_one_slot_per_spool(self, tmp_path):
+        first = WriteSpool(tmp_path, capacity=10)
+        second = WriteSpool(tmp_path, capacity=10)
+        first.append(chat(1), sender_id=7)
+        second.append(chat(2), sender_id=7)
+
+        assert first.directory != second.directory
+        assert segments(first) == segments(second) == ["spool-00000001.log"]
+
+        second.discard(1)
+        assert segments(first) == ["spool-00000001.log"]
+        await first.close()
+        await second.close()
+
+    @pytest.mark.asyncio
+    async def test_slot_with_messages_claimed_first(self, tmp_path):
+        first = WriteSpool(tmp_path, capacity=10)
+        second = WriteSpool(tmp_path, capacity=10)
+        second.append(chat(1), sender_id=7)
+        await second.close()
+        await first.close()
+
+        reloaded = WriteSpool(tmp_path, capacity=10)
+
+        assert reloaded.directory == second.directory
+        assert len(reloaded) == 1
+        await reloaded.close()